@@ -0,0 +1,201 @@
+"""Per-backend circuit breakers.
+
+A breaker watches the outcome of the last ``window`` calls to its backend.
+Once at least ``min_calls`` were seen and the share of failures (transport
+errors, timeouts, 5xx answers) reaches ``failure_rate`` the breaker *opens*:
+calls fail immediately with `BackendUnavailable` (503 + ``Retry-After``)
+instead of each waiting for ``DEFAULT_HTTP_TIMEOUT``.  After ``open_seconds``
+it turns *half-open* and lets ``half_open_calls`` probe calls through; a
+successful probe closes it again, a failed one re-opens it.
+
+`app.cache.QueryCache` catches `BackendUnavailable` and, when enabled, answers
+with the last-known-good result flagged as stale.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import math
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict
+
+import httpx
+from fastapi import HTTPException, status
+from opentelemetry import metrics
+
+from app.bulkhead import Bulkhead, backend_slot
+from app.config import Settings, get_settings
+from app.deadline import DeadlineExceeded, expired
+from app.retry import UpstreamError
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+_meter = metrics.get_meter(__name__)
+_transitions_counter = _meter.create_counter(
+    "mcp.breaker.transitions",
+    description="Circuit-breaker state changes by backend and new state",
+)
+_short_circuit_counter = _meter.create_counter(
+    "mcp.breaker.rejected",
+    description="Backend calls failed fast because the circuit breaker was open",
+)
+
+
+class BackendUnavailable(HTTPException):
+    """Raised instead of calling a backend whose breaker is open."""
+
+
+def _is_failure(exc: BaseException) -> bool | None:
+    """Classify a call outcome: ``True`` failure, ``False`` success, ``None`` skip."""
+
+    if isinstance(exc, httpx.TimeoutException) and expired():
+        return None  # the caller's deadline was too short, not a slow backend
+    if isinstance(exc, httpx.HTTPError):
+        return True
+    if isinstance(exc, (BackendUnavailable, DeadlineExceeded)):
+        return None
+    if isinstance(exc, UpstreamError):
+        # Reported as 502, but a 4xx (bad query, not found, rate limited) means
+        # the backend is up and answering.
+        return exc.upstream_status >= 500
+    if isinstance(exc, HTTPException):
+        if exc.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+            return None  # local bulkhead rejection, not the backend's fault
+        return exc.status_code >= 500
+    if isinstance(exc, Exception):
+        return False  # e.g. a bad response payload – the backend answered
+    return None  # cancellation
+
+
+class CircuitBreaker:
+    """Closed → open → half-open state machine for one backend."""
+
+    def __init__(
+        self,
+        backend: str,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window: int = 20,
+        open_seconds: float = 10.0,
+        half_open_calls: int = 1,
+    ):
+        self.backend = backend
+        self.config = (failure_rate, min_calls, window, open_seconds, half_open_calls)
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._probes = 0
+
+    def before_call(self) -> None:
+        """Raise `BackendUnavailable` unless a call may go through now."""
+
+        if self.state == OPEN:
+            remaining = self.opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                _short_circuit_counter.add(1, {"backend": self.backend})
+                raise BackendUnavailable(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"{self.backend.capitalize()} is unavailable (circuit open)",
+                    headers={"Retry-After": str(max(1, math.ceil(remaining)))},
+                )
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probes >= self.half_open_calls:
+                _short_circuit_counter.add(1, {"backend": self.backend})
+                raise BackendUnavailable(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"{self.backend.capitalize()} is unavailable (probing)",
+                    headers={"Retry-After": "1"},
+                )
+            self._probes += 1
+
+    def record(self, failed: bool | None, probe: bool) -> None:
+        if probe:
+            self._probes -= 1
+        if failed is None:
+            return
+        if self.state == HALF_OPEN:
+            if failed:
+                self._open()
+            else:
+                self._outcomes.clear()
+                self._transition(CLOSED)
+            return
+        if self.state == OPEN:
+            return
+        self._outcomes.append(failed)
+        if len(self._outcomes) >= self.min_calls and sum(
+            self._outcomes
+        ) >= self.failure_rate * len(self._outcomes):
+            self._open()
+
+    @contextlib.asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        self.before_call()
+        probe = self.state == HALF_OPEN
+        try:
+            yield
+        except BaseException as exc:
+            self.record(_is_failure(exc), probe)
+            raise
+        self.record(False, probe)
+
+    def _open(self) -> None:
+        self.opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            self.state = state
+            _transitions_counter.add(1, {"backend": self.backend, "state": state})
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(
+    backend: str, settings: Settings | None = None
+) -> CircuitBreaker | None:
+    """Return the shared breaker for *backend*, or ``None`` when disabled."""
+
+    settings = settings or get_settings()
+    if not settings.BREAKER_ENABLED:
+        return None
+    config = (
+        settings.BREAKER_FAILURE_RATE,
+        settings.BREAKER_MIN_CALLS,
+        settings.BREAKER_WINDOW,
+        settings.BREAKER_OPEN_SECONDS,
+        settings.BREAKER_HALF_OPEN_CALLS,
+    )
+    breaker = _breakers.get(backend)
+    if breaker is None or breaker.config != config:
+        breaker = CircuitBreaker(backend, *config)
+        _breakers[backend] = breaker
+    return breaker
+
+
+def reset_breakers() -> None:
+    """Forget all breaker state (used by tests)."""
+
+    _breakers.clear()
+
+
+@contextlib.asynccontextmanager
+async def guarded(
+    breaker: CircuitBreaker | None, bulkhead: Bulkhead | None
+) -> AsyncIterator[None]:
+    """Run a backend call behind its circuit breaker and inside its bulkhead."""
+
+    if breaker is None:
+        async with backend_slot(bulkhead):
+            yield
+        return
+    async with breaker.guard(), backend_slot(bulkhead):
+        yield
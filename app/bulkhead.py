@@ -0,0 +1,216 @@
+"""Per-backend bulkheads with adaptive (AIMD) concurrency limits.
+
+Every backend call runs inside its backend's bulkhead, so a slow Tempo can
+only tie up Tempo's slots and never starves Loki or Prometheus calls sharing
+the event loop.  The limit adapts to observed latency:
+
+* a call that finishes within twice the baseline latency (a slow moving
+  average) raises the limit additively, by one per ``limit`` calls;
+* a slower call or a timeout shrinks it multiplicatively (at most once per
+  call duration, so one slow period counts as one signal).
+
+When all slots are taken requests wait in a bounded FIFO queue for at most
+``queue_timeout`` seconds; a full queue or an expired wait fails fast with
+503 and ``Retry-After`` rather than piling more work onto a struggling
+backend.  Limits, in-flight calls and queue depths are exported as gauges.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import math
+import time
+from collections import deque
+from typing import Any, AsyncContextManager, AsyncIterator, Deque, Dict, Iterable
+
+import httpx
+from fastapi import HTTPException, status
+from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
+
+from app.config import Settings, get_settings
+from app.deadline import expired
+
+_BACKOFF = 0.9
+_TOLERANCE = 2.0
+_BASELINE_ALPHA = 0.05
+# Ignore slowdowns smaller than this (jitter on very fast calls).
+_MIN_SLOWDOWN = 0.05
+
+_bulkheads: Dict[str, "Bulkhead"] = {}
+
+
+def _observe(attribute: str) -> Any:
+    def callback(_options: CallbackOptions) -> Iterable[Observation]:
+        for backend, bulkhead in list(_bulkheads.items()):
+            yield Observation(getattr(bulkhead, attribute), {"backend": backend})
+
+    return callback
+
+
+_meter = metrics.get_meter(__name__)
+_meter.create_observable_gauge(
+    "mcp.bulkhead.limit",
+    callbacks=[_observe("limit")],
+    description="Current adaptive concurrency limit per backend",
+)
+_meter.create_observable_gauge(
+    "mcp.bulkhead.in_flight",
+    callbacks=[_observe("in_flight")],
+    description="Backend calls currently running per backend",
+)
+_meter.create_observable_gauge(
+    "mcp.bulkhead.queue_depth",
+    callbacks=[_observe("queue_depth")],
+    description="Backend calls waiting for a bulkhead slot per backend",
+)
+_rejected_counter = _meter.create_counter(
+    "mcp.bulkhead.rejected",
+    description="Backend calls rejected with 503 by a bulkhead (queue full/timeout)",
+)
+
+
+class Bulkhead:
+    """Adaptive concurrency limiter with a bounded, deadline-aware queue."""
+
+    def __init__(
+        self,
+        backend: str,
+        initial_limit: int = 20,
+        min_limit: int = 2,
+        max_limit: int = 100,
+        max_queue: int = 50,
+        queue_timeout: float = 2.0,
+    ):
+        self.backend = backend
+        self.config = (initial_limit, min_limit, max_limit, max_queue, queue_timeout)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._limit = float(initial_limit)
+        self.in_flight = 0
+        self.baseline: float | None = None
+        self._last_backoff = 0.0
+        self._waiters: Deque[asyncio.Future[None]] = deque()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the backend's slots for the duration of the block."""
+
+        await self._acquire()
+        started = time.monotonic()
+        overloaded: bool | None = False
+        try:
+            yield
+        except httpx.TimeoutException:
+            # A timeout forced by the caller's short deadline says nothing
+            # about the backend's load.
+            overloaded = None if expired() else True
+            raise
+        except asyncio.CancelledError:
+            overloaded = None  # abandoned call (deadline, disconnect): no signal
+            raise
+        finally:
+            self._release()
+            if overloaded is not None:
+                self._adapt(time.monotonic() - started, overloaded)
+
+    async def _acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Waiters from another (finished) event loop can never be woken.
+            self._loop, self._waiters = loop, deque()
+            self.in_flight = 0
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue full")
+        waiter: asyncio.Future[None] = loop.create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                return  # slot was handed over just as the wait expired
+            waiter.cancel()
+            self._waiters.remove(waiter)
+            raise self._reject("queue timeout") from None
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # give the handed-over slot to the next waiter
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _adapt(self, latency: float, overloaded: bool) -> None:
+        baseline = latency if self.baseline is None else self.baseline
+        if not overloaded:
+            # Track drift of the backend's normal latency.
+            self.baseline = baseline + _BASELINE_ALPHA * (latency - baseline)
+        slow = latency > max(baseline * _TOLERANCE, baseline + _MIN_SLOWDOWN)
+        if overloaded or slow:
+            # Back off at most once per call duration: calls overlapping the
+            # same slow period are one congestion signal, not many.
+            now = time.monotonic()
+            if now - self._last_backoff >= latency:
+                self._last_backoff = now
+                self._limit = max(self.min_limit, self._limit * _BACKOFF)
+        else:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+    def _reject(self, reason: str) -> HTTPException:
+        _rejected_counter.add(1, {"backend": self.backend, "reason": reason})
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{self.backend.capitalize()} is overloaded ({reason}), retry later",
+            headers={"Retry-After": str(max(1, math.ceil(self.queue_timeout)))},
+        )
+
+
+def get_bulkhead(backend: str, settings: Settings | None = None) -> Bulkhead | None:
+    """Return the shared bulkhead for *backend*, or ``None`` when disabled."""
+
+    settings = settings or get_settings()
+    if not settings.BULKHEAD_ENABLED:
+        return None
+    config = (
+        settings.BULKHEAD_INITIAL_LIMIT,
+        settings.BULKHEAD_MIN_LIMIT,
+        settings.BULKHEAD_MAX_LIMIT,
+        settings.BULKHEAD_MAX_QUEUE,
+        settings.BULKHEAD_QUEUE_TIMEOUT,
+    )
+    bulkhead = _bulkheads.get(backend)
+    if bulkhead is None or bulkhead.config != config:
+        bulkhead = Bulkhead(backend, *config)
+        _bulkheads[backend] = bulkhead
+    return bulkhead
+
+
+def backend_slot(bulkhead: Bulkhead | None) -> AsyncContextManager[None]:
+    """``bulkhead.slot()`` or a no-op context when bulkheads are disabled."""
+
+    if bulkhead is None:
+        return contextlib.nullcontext()
+    return bulkhead.slot()
@@ -0,0 +1,708 @@
+"""Query-result cache shared by the backend clients.
+
+Results are cached under a key built from the *normalised* query plus a time
+bucket (``floor(now / ttl)``), so every caller asking the same question inside
+the same bucket shares one upstream round trip and entries expire exactly at
+the bucket boundary.  Values are stored JSON-serialised which gives us exact
+byte accounting and keeps storage backends pluggable: the default
+``MemoryBackend`` is a byte-bounded LRU, other backends only need to implement
+``get``/``set`` on raw bytes.
+
+Immutable results (closed Prometheus range chunks, settled Tempo traces) can
+also be written to an optional ``SQLiteBackend`` tier so they survive
+restarts; the most recently used part of it is warm-loaded into memory on
+startup.
+
+With several replicas an optional *shared* tier (``app.redis_cache``) sits
+between memory and upstream: results fetched by one replica are served to the
+others, and a short-lived lock per cache key makes sure only one replica runs
+a given query while the others wait for its result.
+
+When a backend's circuit breaker is open (`app.breaker`) bucketed lookups fall
+back to the last-known-good result for the query, and the response is
+flagged as stale.  Those copies live in a separate, smaller LRU so they never
+take space from the fresh results.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import sqlite3
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from pathlib import Path
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from fastapi import Header
+from opentelemetry import metrics
+
+from app.breaker import BackendUnavailable
+from app.config import Settings, get_settings
+from app.deadline import remaining
+
+_meter = metrics.get_meter(__name__)
+_requests_counter = _meter.create_counter(
+    "mcp.cache.requests",
+    description="Query-result cache lookups by endpoint and result (hit/miss/bypass)",
+)
+_evictions_counter = _meter.create_counter(
+    "mcp.cache.evictions",
+    description="Entries evicted from a result-cache tier to stay under its byte budget",
+)
+
+# ---------------------------------------------------------------------------
+# Storage backends -----------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+class CacheBackend:
+    """Interface for result-cache storage backends (values are raw bytes)."""
+
+    async def get(self, key: str) -> bytes | None:  # pragma: no cover – interface
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:  # pragma: no cover
+        raise NotImplementedError
+
+
+class SharedBackend(CacheBackend):
+    """Cache backend shared between replicas that also provides simple locks."""
+
+    async def acquire(self, key: str, ttl: float) -> str | None:  # pragma: no cover
+        """Take the lock *key*; return the token that releases it, else ``None``."""
+        raise NotImplementedError
+
+    async def release(self, key: str, token: str) -> None:  # pragma: no cover
+        """Release *key* only if it is still held with *token*."""
+        raise NotImplementedError
+
+    async def locked(self, key: str) -> bool:  # pragma: no cover
+        raise NotImplementedError
+
+    def close(self) -> None:  # pragma: no cover
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU bounded by the total size of the stored values."""
+
+    def __init__(self, max_bytes: int, tier: str = "memory"):
+        self.max_bytes = max_bytes
+        self.tier = tier
+        self.size_bytes = 0
+        self._entries: OrderedDict[str, Tuple[float, bytes]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if key in self._entries:
+            self._remove(key)
+        # Never let a single oversized result flush the whole cache.
+        if ttl <= 0 or len(value) > self.max_bytes:
+            return
+        while self._entries and self.size_bytes + len(value) > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            _evictions_counter.add(1, {"tier": self.tier})
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self.size_bytes += len(value)
+
+    def _remove(self, key: str) -> None:
+        _expires_at, value = self._entries.pop(key)
+        self.size_bytes -= len(value)
+
+
+class SQLiteBackend(CacheBackend):
+    """Persistent, size-bounded cache tier stored in a single SQLite file.
+
+    Expiry uses wall-clock time so entries stay valid across restarts; when the
+    file exceeds *max_bytes* the least recently accessed entries are evicted.
+    Queries run in a worker thread so disk I/O never blocks the event loop.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)"
+            )
+            self._conn.execute(
+                "DELETE FROM entries WHERE expires_at <= ?", (time.time(),)
+            )
+            self.size_bytes: int = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()[0]
+
+    async def get(self, key: str) -> bytes | None:
+        entry = await self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    async def get_entry(self, key: str) -> Tuple[bytes, float] | None:
+        """Return ``(value, seconds_left)`` for *key* or ``None``."""
+
+        return await asyncio.to_thread(self._get_entry, key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def recent(self, max_bytes: int) -> List[Tuple[str, bytes, float]]:
+        """Return the most recently used live entries totalling <= *max_bytes*."""
+
+        return await asyncio.to_thread(self._recent, max_bytes)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _get_entry(self, key: str) -> Tuple[bytes, float] | None:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._delete(key)
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return bytes(row[0]), row[1] - now
+
+    def _set(self, key: str, value: bytes, ttl: float) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._delete(key)
+            if ttl <= 0 or len(value) > self.max_bytes:
+                return
+            if self.size_bytes + len(value) > self.max_bytes:
+                self._evict(len(value), now)
+            self._conn.execute(
+                "INSERT INTO entries (key, value, size, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now + ttl, now),
+            )
+            self.size_bytes += len(value)
+
+    def _evict(self, incoming: int, now: float) -> None:
+        self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        self.size_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        while self.size_bytes + incoming > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key FROM entries ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for (key,) in rows:
+                self._delete(key)
+                _evictions_counter.add(1, {"tier": "disk"})
+                if self.size_bytes + incoming <= self.max_bytes:
+                    break
+
+    def _delete(self, key: str) -> None:
+        row = self._conn.execute(
+            "SELECT size FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.size_bytes -= row[0]
+
+    def _recent(self, max_bytes: int) -> List[Tuple[str, bytes, float]]:
+        now = time.time()
+        entries: List[Tuple[str, bytes, float]] = []
+        total = 0
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value, expires_at FROM entries WHERE expires_at > ?"
+                " ORDER BY accessed_at DESC",
+                (now,),
+            )
+            for key, value, expires_at in rows:
+                if total + len(value) > max_bytes:
+                    break
+                entries.append((key, bytes(value), expires_at - now))
+                total += len(value)
+        return entries
+
+
+# ---------------------------------------------------------------------------
+# Query cache ----------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+# Set per request by `track_stale_results`; flipped when a stale
+# last-known-good result was served so the response can be flagged.
+_stale_results: ContextVar[List[bool] | None] = ContextVar(
+    "stale_results", default=None
+)
+
+
+def track_stale_results() -> List[bool]:
+    """Start tracking stale answers for the current request; return the flag."""
+
+    flag = [False]
+    _stale_results.set(flag)
+    return flag
+
+
+def _mark_stale() -> None:
+    flag = _stale_results.get()
+    if flag is not None:
+        flag[0] = True
+
+
+def normalize_query(query: str, *params: Any) -> str:
+    """Return a canonical form of *query* (whitespace collapsed) plus params."""
+
+    canonical = " ".join(query.split())
+    if params:
+        canonical = f"{canonical}|{json.dumps(params, sort_keys=True, default=str)}"
+    return canonical
+
+
+class QueryCache:
+    """TTL cache keyed on ``endpoint`` + normalised query + time bucket."""
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttls: Dict[str, float] | None = None,
+        default_ttl: float = 15.0,
+        disk: SQLiteBackend | None = None,
+        shared: SharedBackend | None = None,
+        lock_ttl: float = 5.0,
+        lock_poll_interval: float = 0.05,
+        stale_ttl: float = 0.0,
+        stale_max_bytes: int = 8 * 1024 * 1024,
+    ):
+        self.backend = backend
+        self.disk = disk
+        self.shared = shared
+        self.lock_ttl = lock_ttl
+        self.lock_poll_interval = lock_poll_interval
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "bypass": 0}
+        # Lookups answered by waiting for another replica's fetch.
+        self.shared_waits = 0
+        # Last-known-good results are kept this long for open circuits, in
+        # their own LRU so they do not compete with fresh entries.
+        self.stale_ttl = stale_ttl
+        self.stale: MemoryBackend | None = None
+        if stale_ttl > 0:
+            self.stale = MemoryBackend(stale_max_bytes, tier="stale")
+        self.stale_served = 0
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def key_for(
+        self, endpoint: str, canonical: str, now: float | None = None
+    ) -> Tuple[str, float]:
+        """Return ``(key, seconds_left_in_bucket)`` for a canonical query."""
+
+        ttl = self.ttl_for(endpoint)
+        now = time.time() if now is None else now
+        bucket = int(now // ttl)
+        digest = hashlib.sha256(canonical.encode()).hexdigest()
+        return f"{endpoint}:{bucket}:{digest}", (bucket + 1) * ttl - now
+
+    async def get_or_fetch(
+        self,
+        endpoint: str,
+        canonical: str,
+        fetch: Callable[[], Awaitable[Any]],
+        *,
+        bypass: bool = False,
+    ) -> Any:
+        """Return the cached result for *canonical* or call *fetch* and store it.
+
+        With ``bypass=True`` (``Cache-Control: no-cache``) the backend is always
+        queried; the fresh result still replaces the cached entry.
+        """
+
+        if self.ttl_for(endpoint) <= 0:
+            return await fetch()
+
+        key, remaining = self.key_for(endpoint, canonical)
+        if bypass:
+            self._record(endpoint, "bypass")
+        else:
+            cached = await self._lookup(key, remaining)
+            if cached is not None:
+                self._record(endpoint, "hits")
+                return json.loads(cached)
+            self._record(endpoint, "misses")
+
+        stale_key = endpoint + ":" + key.split(":", 2)[-1]
+        try:
+            if self.shared is not None and not bypass:
+                result = await self._fetch_once_shared(key, remaining, fetch)
+                data = json.dumps(result).encode() if self.stale is not None else b""
+            else:
+                result = await fetch()
+                data = json.dumps(result).encode()
+                await self._store(key, data, remaining)
+        except BackendUnavailable:
+            # Circuit open: fall back to the last-known-good result, if any.
+            stale = await self.stale.get(stale_key) if self.stale is not None else None
+            if stale is None:
+                raise
+            self.stale_served += 1
+            _requests_counter.add(1, {"endpoint": endpoint, "result": "stale"})
+            _mark_stale()
+            return json.loads(stale)
+        if self.stale is not None:
+            await self.stale.set(stale_key, data, self.stale_ttl)
+        return result
+
+    async def _fetch_once_shared(
+        self, key: str, ttl: float, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Run *fetch* on one replica only; the others wait for its result.
+
+        The lock expires after ``lock_ttl`` so a crashed leader cannot block
+        anyone for long; if the leader fails (lock released without a result)
+        or the wait times out, the waiter fetches by itself.  The wait never
+        outlasts the caller's own deadline: once it has passed, *fetch* fails
+        fast with 504.
+        """
+
+        assert self.shared is not None
+        lock = f"lock:{key}"
+        token = await self.shared.acquire(lock, self.lock_ttl)
+        if token is None:
+            left = remaining()
+            wait = self.lock_ttl if left is None else min(self.lock_ttl, left)
+            deadline = time.monotonic() + wait
+            while time.monotonic() < deadline:
+                await asyncio.sleep(
+                    min(self.lock_poll_interval, max(deadline - time.monotonic(), 0))
+                )
+                cached = await self.shared.get(key)
+                if cached is not None:
+                    self.shared_waits += 1
+                    await self.backend.set(key, cached, ttl)
+                    return json.loads(cached)
+                if not await self.shared.locked(lock):
+                    break
+            result = await fetch()
+            await self._store(key, json.dumps(result).encode(), ttl)
+            return result
+        try:
+            result = await fetch()
+            await self._store(key, json.dumps(result).encode(), ttl)
+            return result
+        finally:
+            await self.shared.release(lock, token)
+
+    async def _lookup(
+        self, key: str, ttl: float, persistent: bool = False, memory: bool = True
+    ) -> bytes | None:
+        """Check memory, then the shared tier, then (if *persistent*) disk.
+
+        Hits in a slower tier are promoted into memory; *ttl* bounds how long
+        a result from the shared tier is kept locally.
+        """
+
+        if memory:
+            cached = await self.backend.get(key)
+            if cached is not None:
+                return cached
+        if self.shared is not None:
+            cached = await self.shared.get(key)
+            if cached is not None:
+                if memory:
+                    await self.backend.set(key, cached, ttl)
+                return cached
+        if persistent and self.disk is not None:
+            entry = await self.disk.get_entry(key)
+            if entry is not None:
+                cached, remaining = entry
+                if memory:
+                    await self.backend.set(key, cached, remaining)
+                return cached
+        return None
+
+    async def _store(
+        self,
+        key: str,
+        data: bytes,
+        ttl: float,
+        persistent: bool = False,
+        memory: bool = True,
+    ) -> None:
+        if memory:
+            await self.backend.set(key, data, ttl)
+        if self.shared is not None:
+            await self.shared.set(key, data, ttl)
+        if persistent and self.disk is not None:
+            await self.disk.set(key, data, ttl)
+
+    async def get_json(
+        self,
+        endpoint: str,
+        key: str,
+        *,
+        persistent: bool = False,
+        memory: bool = True,
+    ) -> Any | None:
+        """Look up an entry stored with `set_json` (no time bucketing).
+
+        With ``persistent=True`` a memory miss falls through to the disk tier
+        and the entry found there is promoted back into memory.  Callers that
+        keep their own in-process copy pass ``memory=False`` to use only the
+        shared and disk tiers.
+        """
+
+        full_key = f"{endpoint}:{key}"
+        cached = await self._lookup(full_key, self.default_ttl, persistent, memory)
+        self._record(endpoint, "misses" if cached is None else "hits")
+        return None if cached is None else json.loads(cached)
+
+    async def set_json(
+        self,
+        endpoint: str,
+        key: str,
+        value: Any,
+        ttl: float,
+        *,
+        persistent: bool = False,
+        memory: bool = True,
+    ) -> None:
+        """Store a result for *ttl* seconds, also on disk when *persistent*.
+
+        Only immutable results (e.g. a closed range chunk) should be persisted.
+        """
+
+        full_key = f"{endpoint}:{key}"
+        data = json.dumps(value).encode()
+        await self._store(full_key, data, ttl, persistent, memory)
+
+    async def warm(self, max_bytes: int, traces: TraceCache | None = None) -> int:
+        """Load the most recently used disk entries into memory; return count.
+
+        Traces are read through their own in-process cache and never from the
+        memory tier, so they go to *traces* (parsed) instead, or are skipped.
+        """
+
+        if self.disk is None:
+            return 0
+        entries = await self.disk.recent(max_bytes)
+        loaded = 0
+        # Insert oldest first so the most recent entries end up MRU.
+        for key, value, remaining in reversed(entries):
+            if key.startswith("trace:"):
+                if traces is None:
+                    continue
+                traces.put(key.removeprefix("trace:"), json.loads(value), len(value))
+            else:
+                await self.backend.set(key, value, remaining)
+            loaded += 1
+        return loaded
+
+    def _record(self, endpoint: str, outcome: str) -> None:
+        self.stats[outcome] += 1
+        _requests_counter.add(1, {"endpoint": endpoint, "result": outcome})
+
+
+class TraceCache:
+    """In-process LRU of parsed Tempo traces bounded by their serialised size.
+
+    Completed traces never change, so by default entries do not expire; they
+    are only evicted to stay under *max_bytes*.  A trace that may still be
+    receiving spans is stored with a *ttl* instead.  Keeping the parsed object means a hit
+    costs no JSON decoding – callers must treat returned traces as read-only.
+    Trace IDs Tempo answered with 404 are remembered for *not_found_ttl*
+    seconds so repeated lookups of a missing (or not yet ingested) trace do
+    not hit Tempo again.
+    """
+
+    def __init__(self, max_bytes: int, not_found_ttl: float = 30.0):
+        self.max_bytes = max_bytes
+        self.not_found_ttl = not_found_ttl
+        self.size_bytes = 0
+        self._entries: OrderedDict[str, Tuple[int, float, Any]] = OrderedDict()
+        self._not_found: OrderedDict[str, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, trace_id: str) -> Any | None:
+        entry = self._entries.get(trace_id)
+        if entry is None:
+            return None
+        _size, expires_at, trace = entry
+        if expires_at <= time.monotonic():
+            self.size_bytes -= self._entries.pop(trace_id)[0]
+            return None
+        self._entries.move_to_end(trace_id)
+        return trace
+
+    def put(
+        self, trace_id: str, trace: Any, size: int, ttl: float | None = None
+    ) -> None:
+        """Store *trace* whose serialised form is *size* bytes long.
+
+        Without *ttl* the entry never expires.
+        """
+
+        self._not_found.pop(trace_id, None)
+        if trace_id in self._entries:
+            self.size_bytes -= self._entries.pop(trace_id)[0]
+        if size > self.max_bytes or (ttl is not None and ttl <= 0):
+            return
+        while self._entries and self.size_bytes + size > self.max_bytes:
+            _oldest, (evicted, _expires_at, _trace) = self._entries.popitem(last=False)
+            self.size_bytes -= evicted
+            _evictions_counter.add(1, {"tier": "trace"})
+        expires_at = math.inf if ttl is None else time.monotonic() + ttl
+        self._entries[trace_id] = (size, expires_at, trace)
+        self.size_bytes += size
+
+    def is_missing(self, trace_id: str) -> bool:
+        expires_at = self._not_found.get(trace_id)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._not_found[trace_id]
+            return False
+        return True
+
+    def mark_missing(self, trace_id: str) -> None:
+        if self.not_found_ttl <= 0:
+            return
+        self._not_found[trace_id] = time.monotonic() + self.not_found_ttl
+        self._not_found.move_to_end(trace_id)
+        # Bound the negative cache: drop the oldest markers first.
+        while len(self._not_found) > 10_000:
+            self._not_found.popitem(last=False)
+
+
+_query_cache: QueryCache | None = None
+
+
+def get_query_cache(settings: Settings | None = None) -> QueryCache | None:
+    """Return the process-wide query cache, or ``None`` when caching is disabled."""
+
+    global _query_cache
+    settings = settings or get_settings()
+    if not settings.CACHE_ENABLED:
+        return None
+    if _query_cache is None:
+        disk = None
+        if settings.CACHE_DISK_PATH:
+            disk = SQLiteBackend(
+                settings.CACHE_DISK_PATH, settings.CACHE_DISK_MAX_BYTES
+            )
+        shared = None
+        if settings.CACHE_REDIS_URL:
+            from app.redis_cache import RedisBackend
+
+            shared = RedisBackend(
+                settings.CACHE_REDIS_URL,
+                prefix=settings.CACHE_REDIS_PREFIX,
+                timeout=settings.CACHE_REDIS_TIMEOUT,
+            )
+        _query_cache = QueryCache(
+            MemoryBackend(settings.CACHE_MAX_BYTES),
+            ttls=settings.CACHE_TTLS,
+            default_ttl=settings.CACHE_DEFAULT_TTL,
+            disk=disk,
+            shared=shared,
+            lock_ttl=settings.CACHE_LOCK_TTL,
+            stale_ttl=settings.BREAKER_STALE_TTL if settings.BREAKER_ENABLED else 0.0,
+            stale_max_bytes=settings.BREAKER_STALE_MAX_BYTES,
+        )
+    return _query_cache
+
+
+_trace_cache: TraceCache | None = None
+
+
+def get_trace_cache(settings: Settings | None = None) -> TraceCache | None:
+    """Return the process-wide trace cache, or ``None`` when caching is disabled."""
+
+    global _trace_cache
+    settings = settings or get_settings()
+    if not settings.CACHE_ENABLED:
+        return None
+    if _trace_cache is None:
+        _trace_cache = TraceCache(
+            settings.TEMPO_TRACE_CACHE_MAX_BYTES, settings.TEMPO_NOT_FOUND_TTL
+        )
+    return _trace_cache
+
+
+async def warm_query_cache(settings: Settings | None = None) -> int:
+    """Warm the memory tier and the trace cache from disk (called once from the
+    app lifespan)."""
+
+    settings = settings or get_settings()
+    cache = get_query_cache(settings)
+    if cache is None:
+        return 0
+    return await cache.warm(settings.CACHE_WARM_BYTES, get_trace_cache(settings))
+
+
+def close_query_cache() -> None:
+    """Close the disk and shared tiers (if any) and drop the process-wide caches."""
+
+    global _query_cache, _trace_cache
+    _trace_cache = None
+    if _query_cache is not None and _query_cache.disk is not None:
+        _query_cache.disk.close()
+    if _query_cache is not None and _query_cache.shared is not None:
+        _query_cache.shared.close()
+    _query_cache = None
+
+
+def set_query_cache(cache: QueryCache | None) -> None:
+    """Install a custom query cache (e.g. another backend); ``None`` resets it."""
+
+    global _query_cache
+    _query_cache = cache
+
+
+def set_trace_cache(cache: TraceCache | None) -> None:
+    """Install a custom trace cache; ``None`` resets it."""
+
+    global _trace_cache
+    _trace_cache = cache
+
+
+def cache_bypass_requested(cache_control: str | None = Header(default=None)) -> bool:
+    """FastAPI dependency – ``True`` when the caller sent ``Cache-Control: no-cache``."""
+
+    if not cache_control:
+        return False
+    directives = {part.strip().lower() for part in cache_control.split(",")}
+    return bool(directives & {"no-cache", "no-store"})
@@ -1,107 +1,940 @@
-from typing import Any, List
+import asyncio
+import bisect
+import json
+import math
+import random
+import re
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    List,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
 
 import httpx
 from fastapi import Depends, HTTPException, status
 from fastapi.params import Depends as _DependsClass
 
+from app.breaker import get_breaker, guarded
+from app.bulkhead import backend_slot, get_bulkhead
+from app.cache import (
+    cache_bypass_requested,
+    get_query_cache,
+    get_trace_cache,
+    normalize_query,
+)
 from app.config import Settings, get_settings
+from app.deadline import budget_share, call_timeout, deadline_after, deadline_guard
+from app.hedging import get_hedger
+from app.log_patterns import TemplateMiner
+from app.loki_stream import (
+    LokiFormatError,
+    StratifiedSample,
+    iter_result_items,
+    newest_entries,
+    stratified_sample,
+)
+from app.prom_range import (
+    align_range,
+    chunk_interval,
+    format_ts,
+    merge_matrices,
+    split_chunks,
+    trim_matrix,
+)
+from app.retry import UpstreamError, get_retry_policy, with_retries
+from app.singleflight import get_flight_group
+from app.timeutil import parse_duration, split_time_range
+from app.trace_model import SpanTable, last_span_end, parse_trace, summarize_trace
+from app.trace_search import align_window, compact_trace, decode_cursor, encode_cursor
+
+# Optional HTTP/2 support – httpx needs the ``h2`` package for it.
+try:
+    import h2  # type: ignore  # noqa: F401
+
+    _h2_available = True
+except ModuleNotFoundError:  # pragma: no cover
+    _h2_available = False
+
+# ---------------------------------------------------------------------------
+# Shared connection pools ----------------------------------------------------
+# ---------------------------------------------------------------------------
+
+BACKENDS = ("loki", "prometheus", "tempo", "alertmanager")
+
+# Trace IDs are hex (W3C/OTLP: 16 bytes, older formats 8).  They are put into
+# Tempo URL paths and Loki line filters, so nothing else may get through.
+TRACE_ID_PATTERN = r"^[0-9a-fA-F]{1,32}$"
+_TRACE_ID_RE = re.compile(TRACE_ID_PATTERN)
+
+_T = TypeVar("_T")
+
+# One long-lived pooled client per backend so that requests reuse keep-alive
+# connections instead of paying a TCP/TLS handshake each time.  The pools are
+# opened/closed by the FastAPI lifespan (see ``app.main``) and created lazily
+# when a client is used outside of it (MCP stdio server, unit tests).
+_http_clients: dict[str, httpx.AsyncClient] = {}
+
+
+def _new_http_client(settings: Settings) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        timeout=settings.DEFAULT_HTTP_TIMEOUT,
+        limits=limits,
+        http2=settings.HTTP2_ENABLED and _h2_available,
+    )
+
+
+def get_http_client(
+    backend: str, settings: Settings | None = None
+) -> httpx.AsyncClient:
+    """Return the shared pooled ``httpx.AsyncClient`` for *backend*."""
+
+    client = _http_clients.get(backend)
+    if client is None or client.is_closed:
+        client = _new_http_client(settings or get_settings())
+        _http_clients[backend] = client
+    return client
+
+
+def open_http_clients(settings: Settings | None = None) -> None:
+    """Create the pooled clients for every backend (idempotent)."""
+
+    for backend in BACKENDS:
+        get_http_client(backend, settings)
+
+
+_semaphores: dict[str, tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+
+
+def get_backend_semaphore(backend: str, limit: int) -> asyncio.Semaphore:
+    """Return the process-wide semaphore bounding fan-out to *backend*.
+
+    It is shared by all requests so concurrent batch calls cannot multiply the
+    load on one backend; a new one is created per event loop.
+    """
+
+    loop = asyncio.get_running_loop()
+    entry = _semaphores.get(backend)
+    if entry is None or entry[0] is not loop:
+        entry = (loop, asyncio.Semaphore(limit))
+        _semaphores[backend] = entry
+    return entry[1]
+
+
+async def close_http_clients() -> None:
+    """Close all pooled clients, releasing their keep-alive connections."""
+
+    clients = list(_http_clients.values())
+    _http_clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def check_trace_id(trace_id: str) -> str:
+    """Return *trace_id* if it is a hex trace ID, else raise 400."""
+
+    if not _TRACE_ID_RE.match(trace_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid trace ID {trace_id[:64]!r}: expected 1-32 hex digits",
+        )
+    return trace_id
+
+
+def _stream_selector(labels: dict[str, str]) -> str:
+    """LogQL selector matching exactly the stream with *labels*."""
+
+    matchers = (
+        '{}="{}"'.format(name, value.replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in sorted(labels.items())
+    )
+    return "{" + ",".join(matchers) + "}"
 
 
 class LokiClient:
-    def __init__(self, settings: Settings | Any = Depends(get_settings)):
+    def __init__(
+        self,
+        settings: Settings | Any = Depends(get_settings),
+        bypass_cache: bool | Any = Depends(cache_bypass_requested),
+    ):
         # When instantiated outside a FastAPI request context (e.g. unit tests),
         # FastAPI passes the dependency placeholder instead of actual Settings.
         if isinstance(settings, _DependsClass):  # pragma: no cover – test path
             settings = get_settings()
+        if isinstance(bypass_cache, _DependsClass):
+            bypass_cache = False
 
         self.base_url = settings.LOKI_BASE_URL  # type: ignore[attr-defined]
         self.timeout = settings.DEFAULT_HTTP_TIMEOUT  # type: ignore[attr-defined]
+        self.http = get_http_client("loki", settings)
+        self.bulkhead = get_bulkhead("loki", settings)
+        self.breaker = get_breaker("loki", settings)
+        self.retry = get_retry_policy("loki", settings)
+        self.cache = get_query_cache(settings)
+        self.bypass_cache = bypass_cache
+        self.flights = (
+            get_flight_group("loki") if settings.SINGLEFLIGHT_ENABLED else None
+        )
+        self.shard_seconds = settings.LOKI_SHARD_SECONDS
+        self.max_shards = settings.LOKI_MAX_SHARDS
+        self.shard_concurrency = settings.LOKI_SHARD_CONCURRENCY
+        self.max_entries = max(settings.LOKI_MAX_ENTRIES_PER_QUERY, 1)
+        self.sample_buckets = max(settings.LOKI_SAMPLE_BUCKETS, 1)
+        self.sample_chunk = settings.LOKI_SAMPLE_CHUNK
+        self.sample_max_streams = max(settings.LOKI_SAMPLE_MAX_STREAMS, 1)
+        self.trace_logs_padding = int(settings.LOKI_TRACE_LOGS_PADDING * 1e9)
+        self.trace_logs_fallback = settings.LOKI_TRACE_LOGS_FALLBACK_RANGE
+
+    async def _coalesced(
+        self,
+        endpoint: str,
+        canonical: str,
+        fetch: Callable[[], Awaitable[_T]],
+    ) -> _T:
+        """Serve *fetch* through the result cache and single-flight group."""
+
+        async def run() -> _T:
+            if self.flights is None:
+                return await fetch()
+            return await self.flights.do(canonical, fetch)
+
+        if self.cache is None:
+            return await run()
+        return await self.cache.get_or_fetch(
+            endpoint, canonical, run, bypass=self.bypass_cache
+        )
+
+    async def _query_entries(
+        self, query: str, limit: int = 1000, endpoint: str = "loki_query"
+    ) -> List[dict[str, Any]]:
+        return await self._coalesced(
+            endpoint,
+            normalize_query(query, limit),
+            lambda: self._fetch(query, limit),
+        )
+
+    async def _query(
+        self, query: str, limit: int = 1000, endpoint: str = "loki_query"
+    ) -> List[str]:
+        entries = await self._query_entries(query, limit, endpoint)
+        return [entry["line"] for entry in entries]
+
+    async def query_range(
+        self,
+        query: str,
+        time_range: str,
+        limit: int = 1000,
+        endpoint: str = "loki_query_range",
+    ) -> List[dict[str, Any]]:
+        """Run *query* over the last *time_range*, split into parallel time shards.
+
+        Returns the newest *limit* entries in chronological order.
+        """
+
+        def fetch() -> Awaitable[List[dict[str, Any]]]:
+            end = time.time_ns()
+            start = end - int(parse_duration(time_range) * 1e9)
+            return self._fetch_sharded(query, start, end, limit)
+
+        return await self._coalesced(
+            endpoint, normalize_query(query, "range", time_range, limit), fetch
+        )
+
+    async def query_window(
+        self,
+        query: str,
+        start_ns: int,
+        end_ns: int,
+        limit: int = 1000,
+        endpoint: str = "loki_query_range",
+    ) -> List[dict[str, Any]]:
+        """Like `query_range` but over the absolute window ``[start_ns, end_ns]``."""
+
+        return await self._coalesced(
+            endpoint,
+            normalize_query(query, "window", start_ns, end_ns, limit),
+            lambda: self._fetch_sharded(query, start_ns, end_ns, limit),
+        )
+
+    async def mine_range(
+        self,
+        query: str,
+        time_range: str,
+        limit: int,
+        top: int | None = None,
+        endpoint: str = "log_patterns",
+    ) -> dict[str, Any]:
+        """Mine the newest *limit* lines of the last *time_range* into templates.
+
+        Shards are folded into the `TemplateMiner` as they arrive and then
+        dropped, so memory is bounded by the shards in flight rather than by
+        *limit*; only the mined summary is cached.
+        """
+
+        async def mine() -> dict[str, Any]:
+            end = time.time_ns()
+            start = end - int(parse_duration(time_range) * 1e9)
+            miner = TemplateMiner()
+            remaining = limit
+
+            def fold(chunk: List[dict[str, Any]]) -> None:
+                nonlocal remaining
+                # Shards come newest first, each chronological.
+                newest = chunk[max(len(chunk) - remaining, 0) :] if remaining else []
+                miner.add_entries(newest)
+                remaining -= len(newest)
+
+            await self._scan_shards(query, start, end, limit, fold)
+            return miner.summary(top)
+
+        return await self._coalesced(
+            endpoint, normalize_query(query, "mine", time_range, limit, top), mine
+        )
+
+    async def _fetch_sharded(
+        self, query: str, start_ns: int, end_ns: int, limit: int
+    ) -> List[dict[str, Any]]:
+        chunks: List[List[dict[str, Any]]] = []
+        await self._scan_shards(query, start_ns, end_ns, limit, chunks.append)
+        # Shards are disjoint and each is chronological: oldest shard first.
+        entries = [e for chunk in reversed(chunks) for e in chunk]
+        return entries[-limit:] if limit > 0 else []
+
+    async def _scan_shards(
+        self,
+        query: str,
+        start_ns: int,
+        end_ns: int,
+        limit: int,
+        emit: Callable[[List[dict[str, Any]]], None],
+    ) -> None:
+        """Fetch ``[start_ns, end_ns]`` in time shards, passing each shard's
+        entries (chronological) to *emit* newest shard first until *limit*
+        lines were emitted."""
+
+        duration = end_ns - start_ns
+        shard = max(self.shard_seconds * 10**9, -(-duration // max(self.max_shards, 1)))
+        if limit > self.max_entries:
+            # Each shard can return at most ``max_entries`` lines.
+            shard = min(shard, max(-(-duration * self.max_entries // limit), 1))
+        # Newest shard first: once the newest shards hold *limit* lines the
+        # older ones cannot contribute and are never started (or cancelled).
+        shards = split_time_range(start_ns, end_ns, shard)
+        results: List[List[dict[str, Any]] | None] = [None] * len(shards)
+        running: dict[asyncio.Future[List[dict[str, Any]]], int] = {}
+        concurrency = max(self.shard_concurrency, 1)
+        next_shard = ready = collected = 0
+
+        async def fetch_span(lower: int, upper: int) -> List[dict[str, Any]]:
+            entries = await self._fetch(query, limit, start_ns=lower, end_ns=upper)
+            if limit <= self.max_entries or len(entries) < self.max_entries:
+                return entries
+            if upper - lower < 2:
+                return entries
+            # A dense burst: the span holds more lines than one query returns,
+            # so split it and fetch the halves (newer first).
+            middle = lower + (upper - lower) // 2
+            newer = await fetch_span(middle, upper)
+            if len(newer) >= limit:
+                return newer
+            return await fetch_span(lower, middle) + newer
+
+        async def fetch_shard(
+            lower: int, upper: int, budget: float | None
+        ) -> List[dict[str, Any]]:
+            with deadline_after(budget):
+                return await fetch_span(lower, upper)
+
+        try:
+            while ready < len(shards) and collected < limit:
+                # Keep at most ``shard_concurrency`` shards in flight, each
+                # with its wave's share of the remaining request budget.
+                while next_shard < len(shards) and len(running) < concurrency:
+                    lower, upper = shards[next_shard]
+                    waves = -(-(len(shards) - next_shard) // concurrency)
+                    shard_task = asyncio.ensure_future(
+                        fetch_shard(lower, upper, budget_share(waves))
+                    )
+                    running[shard_task] = next_shard
+                    next_shard += 1
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for finished in done:
+                    results[running.pop(finished)] = finished.result()
+                while ready < len(results) and results[ready] is not None:
+                    chunk = results[ready] or []
+                    results[ready] = []  # emitted: release the entries
+                    collected += len(chunk)
+                    emit(chunk)
+                    ready += 1
+        finally:
+            for pending in running:
+                pending.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+    async def _fetch(
+        self,
+        query: str,
+        limit: int,
+        start_ns: int | None = None,
+        end_ns: int | None = None,
+    ) -> List[dict[str, Any]]:
+        """Stream the Loki response and merge its streams by timestamp.
+
+        Returns the newest *limit* entries in chronological order, each with its
+        timestamp (ns, as sent by Loki) and stream labels.  Passing
+        *start_ns*/*end_ns* issues a ``query_range`` instead of an instant query.
+        """
+
+        limit = min(limit, self.max_entries)
+        return await self._stream_result(
+            query, limit, start_ns, end_ns, lambda chunks: newest_entries(chunks, limit)
+        )
+
+    async def _stream_result(
+        self,
+        query: str,
+        limit: int,
+        start_ns: int | None,
+        end_ns: int | None,
+        consume: Callable[[AsyncIterator[str]], Awaitable[_T]],
+        direction: str = "backward",
+    ) -> _T:
+        """Issue the Loki query and feed the streamed body to *consume*."""
 
-    async def _query(self, query: str, limit: int = 1000) -> List[str]:
-        url = f"{self.base_url.rstrip('/')}/loki/api/v1/query"
         params = {"query": query, "limit": str(limit)}
+        if start_ns is None:
+            url = f"{self.base_url.rstrip('/')}/loki/api/v1/query"
+        else:
+            url = f"{self.base_url.rstrip('/')}/loki/api/v1/query_range"
+            params.update(start=str(start_ns), end=str(end_ns), direction=direction)
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.get(url, params=params)
-            except httpx.HTTPError as exc:
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail=f"Failed to contact Loki: {exc}",
-                ) from exc
+        async def attempt() -> _T:
+            async with guarded(self.breaker, self.bulkhead), self.http.stream(
+                "GET", url, params=params, timeout=call_timeout(self.timeout, "loki")
+            ) as response:
+                if response.status_code != 200:
+                    raise UpstreamError("Loki", response)
+                return await consume(response.aiter_text())
 
-        if response.status_code != 200:
+        try:
+            async with deadline_guard("loki"):
+                return await with_retries(self.retry, attempt)
+        except httpx.HTTPError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Failed to contact Loki: {exc}",
+            ) from exc
+        except (TypeError, ValueError) as exc:
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Loki returned {response.status_code}",
+                detail="Unexpected Loki response format",
+            ) from exc
+
+    async def sample_window(
+        self, query: str, start_ns: int, end_ns: int, limit: int
+    ) -> dict[str, Any]:
+        """A representative *limit* entries of ``[start_ns, end_ns]``.
+
+        The streams are enumerated first with one ``count_over_time`` query,
+        which also gives each stream's exact line count.  Each stream is then
+        read on its own in bounded chunks of ``LOKI_SAMPLE_CHUNK`` lines – in
+        one request if it has no more lines than that, else one per time
+        bucket (``LOKI_SAMPLE_BUCKETS``) – and streamed into a
+        `StratifiedSample` keyed by stream and bucket, so every stream in
+        every bucket is represented however noisy the others are.  At most
+        ``LOKI_SAMPLE_MAX_STREAMS`` streams, chosen at random, are read.
+
+        Returns the entries (chronological), the lines read per stratum, the
+        exact total per stream (``truncated`` when not all were read) and the
+        buckets.
+        """
+
+        span = max(-(-(end_ns - start_ns) // self.sample_buckets), 1)
+        windows = list(reversed(split_time_range(start_ns, end_ns, span)))
+        lowers = [lower for lower, _ in windows]
+        chunk = min(self.max_entries, self.sample_chunk)
+        seconds = max(-(-(end_ns - start_ns) // 10**9), 1)
+        counts = await self.metric_query(
+            f"count_over_time({query} [{seconds}s])", end=end_ns / 1e9
+        )
+        streams = [c for c in counts if c.get("value")]
+        if len(streams) > self.sample_max_streams:
+            streams = random.sample(streams, self.sample_max_streams)
+
+        def bucket_of(ts: int) -> int:
+            return min(max(bisect.bisect_right(lowers, ts) - 1, 0), len(lowers) - 1)
+
+        # The query's line filters apply to each stream's own selector.
+        _, _, pipeline = query.partition("}")
+        requests = []
+        for stream in streams:
+            logql = _stream_selector(stream["labels"]) + pipeline
+            if stream["value"] <= chunk:
+                requests.append((logql, start_ns, end_ns))
+            else:
+                requests.extend((logql, lower, upper) for lower, upper in windows)
+        concurrency = max(self.shard_concurrency, 1)
+        semaphore = asyncio.Semaphore(concurrency)
+        unstarted = len(requests)
+        merged = StratifiedSample(limit)
+
+        async def fetch_chunk(logql: str, lower: int, upper: int) -> None:
+            nonlocal unstarted
+            async with semaphore:
+                waves = -(-unstarted // concurrency)
+                unstarted -= 1
+                with deadline_after(budget_share(waves)):
+                    sample = await self._stream_result(
+                        logql,
+                        chunk,
+                        lower,
+                        upper,
+                        lambda chunks: stratified_sample(chunks, limit, bucket_of),
+                    )
+            merged.merge(sample)
+
+        await asyncio.gather(*(fetch_chunk(*request) for request in requests))
+        strata = merged.strata()
+        read: dict[str, List[int]] = {}
+        lines = [0] * len(windows)
+        for stratum in strata:
+            key = json.dumps(stratum["labels"], sort_keys=True)
+            tally = read.setdefault(key, [0, 0])
+            tally[0] += stratum["total"]
+            tally[1] += stratum["sampled"]
+            lines[stratum["bucket"]] += stratum["total"]
+        stream_totals = []
+        for stream in counts:
+            total = int(stream.get("value") or 0)
+            lines_read, sampled = read.get(
+                json.dumps(stream["labels"], sort_keys=True), [0, 0]
+            )
+            stream_totals.append(
+                {
+                    "labels": stream["labels"],
+                    "total": total,
+                    "read": lines_read,
+                    "sampled": sampled,
+                    "truncated": lines_read < total,
+                }
+            )
+        return {
+            "entries": merged.entries(),
+            "strata": strata,
+            "streams": stream_totals,
+            "buckets": [
+                {"bucket": i, "start": str(lo), "end": str(hi), "lines": lines[i]}
+                for i, (lo, hi) in enumerate(windows)
+            ],
+        }
+
+    @staticmethod
+    def _error_query(service: str | None) -> str:
+        if service:
+            return f'{{level="error",service="{service}"}}'
+        return '{level="error"}'
+
+    @staticmethod
+    def _search_query(query: str, service: str | None) -> str:
+        selector = "{}"
+        if service:
+            selector = f'{{service="{service}"}}'
+        return f'{selector} |= "{query}"'
+
+    async def _log_entries(
+        self, logql: str, limit: int, time_range: str | None, endpoint: str
+    ) -> List[dict[str, Any]]:
+        if time_range:
+            return await self.query_range(logql, time_range, limit, endpoint=endpoint)
+        return await self._query_entries(logql, limit, endpoint=endpoint)
+
+    async def fetch_error_logs(
+        self,
+        limit: int,
+        service: str | None = None,
+        time_range: str | None = None,
+        sample: str = "newest",
+    ) -> List[str]:
+        """The newest *limit* error lines, or with ``sample="stratified"`` a
+        representative *limit* of them (see `sample_errors`)."""
+
+        entries = await self.fetch_error_entries(limit, service, time_range, sample)
+        return [entry["line"] for entry in entries]
+
+    async def fetch_error_entries(
+        self,
+        limit: int,
+        service: str | None = None,
+        time_range: str | None = None,
+        sample: str = "newest",
+    ) -> List[dict[str, Any]]:
+        """Like `fetch_error_logs` but with timestamp and labels for each line."""
+
+        if sample == "stratified":
+            return (await self.sample_errors(limit, service, time_range))["entries"]
+        logql = self._error_query(service)
+        return await self._log_entries(logql, limit, time_range, "error_logs")
+
+    async def mine_logs(
+        self,
+        query: str | None,
+        service: str | None,
+        time_range: str,
+        limit: int,
+        top: int | None = None,
+    ) -> dict[str, Any]:
+        """Templates of the error lines (or of lines matching *query*)."""
+
+        if query:
+            logql = self._search_query(query, service)
+        else:
+            logql = self._error_query(service)
+        return await self.mine_range(logql, time_range, limit, top)
+
+    async def sample_errors(
+        self, limit: int, service: str | None = None, time_range: str | None = None
+    ) -> dict[str, Any]:
+        """`sample_window` of the error lines over *time_range* (default 1h)."""
+
+        logql = self._error_query(service)
+
+        async def fetch() -> dict[str, Any]:
+            end = time.time_ns()
+            start = end - int(parse_duration(time_range or "1h") * 1e9)
+            return await self.sample_window(logql, start, end, limit)
+
+        return await self._coalesced(
+            "error_logs",
+            normalize_query(logql, "stratified", time_range, limit),
+            fetch,
+        )
+
+    async def fetch_error_window(
+        self, limit: int, service: str | None, start_ns: int, end_ns: int
+    ) -> List[dict[str, Any]]:
+        """Like `fetch_error_entries` over the absolute window ``[start_ns, end_ns]``."""
+
+        logql = self._error_query(service)
+        return await self.query_window(logql, start_ns, end_ns, limit, "error_logs")
+
+    async def fetch_error_page(
+        self, limit: int, start_ns: int, end_ns: int
+    ) -> List[dict[str, Any]]:
+        """The *oldest* *limit* error lines of ``[start_ns, end_ns]`` (uncached).
+
+        Loki is queried forward, so a full page continues at its last
+        timestamp – used to page through a window without skipping lines.
+        """
+
+        limit = min(limit, self.max_entries)
+        return await self._stream_result(
+            self._error_query(None),
+            limit,
+            start_ns,
+            end_ns,
+            lambda chunks: newest_entries(chunks, limit),
+            direction="forward",
+        )
+
+    async def search_logs(
+        self, query: str, service: str | None, time_range: str | None
+    ) -> list[str]:
+        entries = await self.search_entries(query, service, time_range)
+        return [entry["line"] for entry in entries]
+
+    async def search_entries(
+        self,
+        query: str,
+        service: str | None,
+        time_range: str | None,
+        limit: int = 1000,
+    ) -> list[dict[str, Any]]:
+        """Like `search_logs` but with timestamp and labels for each line."""
+
+        logql = self._search_query(query, service)
+        return await self._log_entries(logql, limit, time_range, "search_logs")
+
+    @staticmethod
+    def _count_query(
+        selector: str, window: str, by: str, top: int | None, unit: str = "lines"
+    ) -> str:
+        """``count_over_time`` (or ``bytes_over_time``) of *selector* per *by*."""
+
+        func = "bytes_over_time" if unit == "bytes" else "count_over_time"
+        logql = f"sum by ({by}) ({func}({selector} [{window}]))"
+        return f"topk({top}, {logql})" if top else logql
+
+    async def count_errors(
+        self,
+        service: str | None,
+        window: str,
+        top: int | None = None,
+        query: str | None = None,
+        *,
+        step: float | None = None,
+        start: float | None = None,
+        end: float | None = None,
+    ) -> List[dict[str, Any]]:
+        """Error lines (matching *query*, if given) per service over *window*.
+
+        Counted by Loki: an instant query at *end*, or with *step* a range query
+        over ``[start, end]`` whose points count the lines of each *window*.
+        """
+
+        selector = self._error_query(service)
+        if query:
+            selector = f'{selector} |= "{query}"'
+        logql = self._count_query(selector, window, "service", top)
+        return await self.metric_query(logql, step=step, start=start, end=end)
+
+    async def log_volume(
+        self,
+        by: str,
+        window: str,
+        top: int | None = None,
+        service: str | None = None,
+        unit: str = "lines",
+        *,
+        step: float | None = None,
+        start: float | None = None,
+        end: float | None = None,
+    ) -> List[dict[str, Any]]:
+        """Log lines (or bytes) of all levels per label *by* over *window*."""
+
+        selector = f'{{service="{service}"}}' if service else '{service=~".+"}'
+        logql = self._count_query(selector, window, by, top, unit)
+        return await self.metric_query(logql, step=step, start=start, end=end)
+
+    async def metric_query(
+        self,
+        logql: str,
+        *,
+        step: float | None = None,
+        start: float | None = None,
+        end: float | None = None,
+    ) -> List[dict[str, Any]]:
+        """Run a LogQL metric query; Loki aggregates, only samples come back.
+
+        Without *step* an instant query at *end* (default now) returns
+        ``[{"labels", "value"}]``; with *step* a range query over
+        ``[start, end]`` (seconds, aligned to the step) returns
+        ``[{"labels", "values": [[ts, value], ...]}]``.
+        """
+
+        if step is None:
+            params = {"query": logql}
+            if end is not None:
+                params["time"] = str(int(end * 1e9))
+            canonical = normalize_query(logql, "instant", end)
+            api = "query"
+        else:
+            now = time.time()
+            lower, upper = align_range(
+                now - 3600 if start is None else start,
+                now if end is None else end,
+                step,
             )
+            params = {
+                "query": logql,
+                "start": str(int(lower * 1e9)),
+                "end": str(int(upper * 1e9)),
+                "step": format_ts(step),
+            }
+            canonical = normalize_query(logql, "range", lower, upper, step)
+            api = "query_range"
+
+        async def fetch() -> List[dict[str, Any]]:
+            return self._compact_samples(await self._get_result(api, params))
+
+        return await self._coalesced("log_metrics", canonical, fetch)
+
+    @staticmethod
+    def _compact_samples(result: Any) -> List[dict[str, Any]]:
+        """Vector/matrix results as ``{"labels", "value" | "values"}`` floats."""
+
+        try:
+            samples: List[dict[str, Any]] = []
+            for item in result:
+                sample: dict[str, Any] = {"labels": item.get("metric", {})}
+                if "values" in item:
+                    sample["values"] = [[ts, float(v)] for ts, v in item["values"]]
+                else:
+                    sample["value"] = float(item["value"][1])
+                samples.append(sample)
+            return samples
+        except (AttributeError, KeyError, IndexError, TypeError, ValueError) as exc:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Unexpected Loki response format",
+            ) from exc
+
+    async def _get_result(self, api: str, params: dict[str, str]) -> Any:
+        url = f"{self.base_url.rstrip('/')}/loki/api/v1/{api}"
+
+        async def attempt() -> httpx.Response:
+            async with guarded(self.breaker, self.bulkhead):
+                response = await self.http.get(
+                    url, params=params, timeout=call_timeout(self.timeout, "loki")
+                )
+                if response.status_code != 200:
+                    raise UpstreamError("Loki", response)
+                return response
+
+        try:
+            async with deadline_guard("loki"):
+                response = await with_retries(self.retry, attempt)
+        except httpx.HTTPError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Failed to contact Loki: {exc}",
+            ) from exc
 
         data: Any = response.json()
         try:
-            results = data["data"]["result"]
+            return data["data"]["result"]
         except (KeyError, TypeError) as exc:
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
                 detail="Unexpected Loki response format",
             ) from exc
 
-        lines: List[str] = []
-        for stream in results:
-            for _ts, line in stream.get("values", []):
-                lines.append(line)
-        return lines
+    @staticmethod
+    def _trace_query(trace_id: str, services: List[str] | None = None) -> str:
+        """Select the trace's services and line-filter on the trace ID.
 
-    async def fetch_error_logs(
-        self, limit: int, service: str | None = None, time_range: str | None = None
-    ) -> List[str]:
-        selector = '{level="error"}'
-        if service:
-            selector = f'{{level="error",service="{service}"}}'
-        query_str = f"{selector}[{time_range}]" if time_range else selector
-        return await self._query(query_str, limit)
+        ``trace_id`` is deliberately not used as a label: it is unbounded
+        cardinality and rarely indexed.
+        """
 
-    async def search_logs(
-        self, query: str, service: str | None, time_range: str | None
+        if not services:
+            selector = '{service=~".+"}'
+        elif len(services) == 1:
+            selector = f'{{service="{services[0]}"}}'
+        else:
+            pattern = "|".join(re.escape(s) for s in sorted(services))
+            selector = '{service=~"%s"}' % pattern.replace("\\", "\\\\")
+        return f'{selector} |= "{trace_id}"'
+
+    async def fetch_trace_logs(
+        self,
+        trace_id: str,
+        limit: int,
+        services: List[str] | None = None,
+        start_ns: int | None = None,
+        end_ns: int | None = None,
     ) -> list[str]:
-        selector = "{}"
-        if service:
-            selector = f'{{service="{service}"}}'
-        logql = f'{selector} |= "{query}"'
-        if time_range:
-            logql = f"{logql}[{time_range}]"
-        return await self._query(logql)
+        """Return log lines mentioning *trace_id*.
 
-    async def fetch_trace_logs(self, trace_id: str, limit: int) -> list[str]:
-        query = f'{{trace_id="{trace_id}"}}'
-        return await self._query(query, limit)
+        With the trace's window (*start_ns*/*end_ns*, padded by
+        ``LOKI_TRACE_LOGS_PADDING``) and *services*, only those services'
+        streams during those few seconds are read.  Without a window only the
+        last ``LOKI_TRACE_LOGS_FALLBACK_RANGE`` is searched.
+        """
+
+        query = self._trace_query(check_trace_id(trace_id), services)
+        if start_ns is None or end_ns is None:
+            entries = await self.query_range(
+                query, self.trace_logs_fallback, limit, endpoint="trace_logs"
+            )
+            return [entry["line"] for entry in entries]
+        entries = await self.query_window(
+            query,
+            start_ns - self.trace_logs_padding,
+            end_ns + self.trace_logs_padding,
+            limit,
+            endpoint="trace_logs",
+        )
+        return [entry["line"] for entry in entries]
 
 
 class PrometheusClient:
-    def __init__(self, settings: Any = Depends(get_settings)):
+    def __init__(
+        self,
+        settings: Any = Depends(get_settings),
+        bypass_cache: bool | Any = Depends(cache_bypass_requested),
+    ):
         if isinstance(settings, _DependsClass):  # pragma: no cover
             settings = get_settings()
+        if isinstance(bypass_cache, _DependsClass):
+            bypass_cache = False
 
         self.base_url = settings.PROMETHEUS_BASE_URL  # type: ignore[attr-defined]
         self.timeout = settings.DEFAULT_HTTP_TIMEOUT  # type: ignore[attr-defined]
+        self.http = get_http_client("prometheus", settings)
+        self.bulkhead = get_bulkhead("prometheus", settings)
+        self.breaker = get_breaker("prometheus", settings)
+        self.retry = get_retry_policy("prometheus", settings)
+        self.hedger = get_hedger("prometheus", settings)
+        self.hedge_base_url = settings.PROMETHEUS_HEDGE_BASE_URL
+        self.cache = get_query_cache(settings)
+        self.bypass_cache = bypass_cache
+        self.flights = (
+            get_flight_group("prometheus") if settings.SINGLEFLIGHT_ENABLED else None
+        )
+        self.split_concurrency = settings.PROMETHEUS_SPLIT_CONCURRENCY
+        self.chunk_ttl = settings.PROMETHEUS_CHUNK_TTL
+        self.cache_freshness = settings.PROMETHEUS_CACHE_FRESHNESS
+        self.tail_ttl = settings.PROMETHEUS_TAIL_TTL
 
-    async def _query(self, promql: str) -> Any:
-        url = f"{self.base_url.rstrip('/')}/api/v1/query"
-        params = {"query": promql}
+    async def _query(self, promql: str, endpoint: str = "promql") -> Any:
+        canonical = normalize_query(promql)
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.get(url, params=params)
-            except httpx.HTTPError as exc:
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail=f"Failed to contact Prometheus: {exc}",
-                ) from exc
+        async def fetch() -> Any:
+            if self.flights is None:
+                return await self._fetch(promql)
+            return await self.flights.do(canonical, lambda: self._fetch(promql))
+
+        if self.cache is None:
+            return await fetch()
+        return await self.cache.get_or_fetch(
+            endpoint, canonical, fetch, bypass=self.bypass_cache
+        )
+
+    async def _fetch(self, promql: str) -> Any:
+        return await self._get_result("query", {"query": promql})
+
+    async def _get_result(self, api: str, params: dict[str, str]) -> Any:
+        def request(base_url: str) -> Awaitable[httpx.Response]:
+            url = f"{base_url.rstrip('/')}/api/v1/{api}"
+            timeout = call_timeout(self.timeout, "prometheus")
+            return self.http.get(url, params=params, timeout=timeout)
 
-        if response.status_code != 200:
+        async def attempt() -> httpx.Response:
+            async with guarded(self.breaker, self.bulkhead):
+                if self.hedger is None:
+                    response = await request(self.base_url)
+                else:
+                    response = await self.hedger.run(
+                        request,
+                        self.base_url,
+                        self.hedge_base_url,
+                        slot=lambda: backend_slot(self.bulkhead),
+                    )
+                if response.status_code != 200:
+                    raise UpstreamError("Prometheus", response)
+                return response
+
+        try:
+            async with deadline_guard("prometheus"):
+                response = await with_retries(self.retry, attempt)
+        except httpx.HTTPError as exc:
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Prometheus returned {response.status_code}",
-            )
+                detail=f"Failed to contact Prometheus: {exc}",
+            ) from exc
+
         data: Any = response.json()
         try:
             return data["data"]["result"]
@@ -118,7 +951,7 @@ class PrometheusClient:
         if service:
             metric = f'{metric}{{service="{service}"}}'
         promql = f"histogram_quantile({percentile}, sum(rate({metric}[{time_range}])) by (le))"
-        result = await self._query(promql)
+        result = await self._query(promql, endpoint="latency_percentile")
         try:
             return float(result[0]["value"][1])
         except (KeyError, IndexError, TypeError, ValueError) as exc:
@@ -130,31 +963,457 @@ class PrometheusClient:
     async def execute_promql(self, promql: str) -> Any:
         return await self._query(promql)
 
+    async def query_range(
+        self, promql: str, start: float, end: float, step: float
+    ) -> List[dict[str, Any]]:
+        """Run a range query, reusing previously fetched samples where possible.
+
+        The matrix returned for a query fingerprint (expression + step) is
+        remembered up to its last *sealed* sample – older than
+        ``PROMETHEUS_CACHE_FRESHNESS`` and therefore stable.  When the window
+        slides forward only the tail after that sample is fetched and spliced
+        on; samples that aged out of the window are dropped.  Otherwise the
+        query goes through the chunked path (`_query_range_chunked`).
+        """
+
+        start, end = align_range(start, end, step)
+        sealed = min(
+            end, math.floor((time.time() - self.cache_freshness) / step) * step
+        )
+        fingerprint = normalize_query(promql, step)
+
+        tail: Any = None
+        if self.cache is not None and not self.bypass_cache:
+            tail = await self.cache.get_json("query_range_tail", fingerprint)
+        if tail is not None and tail["start"] <= start <= tail["end"] + step:
+            parts = [tail["matrix"]]
+            if tail["end"] < end:
+                parts.append(
+                    await self._range_request(promql, tail["end"] + step, end, step)
+                )
+            matrix = trim_matrix(merge_matrices(parts), start, end)
+        else:
+            matrix = await self._query_range_chunked(promql, start, end, step)
+
+        if self.cache is not None and sealed >= start:
+            await self.cache.set_json(
+                "query_range_tail",
+                fingerprint,
+                {
+                    "start": start,
+                    "end": sealed,
+                    "matrix": trim_matrix(matrix, start, sealed),
+                },
+                self.tail_ttl,
+            )
+        return matrix
+
+    async def _query_range_chunked(
+        self, promql: str, start: float, end: float, step: float
+    ) -> List[dict[str, Any]]:
+        """Run a range query split into step-aligned hour/day chunks.
+
+        Chunks that closed more than ``PROMETHEUS_CACHE_FRESHNESS`` seconds ago
+        are immutable and cached; only the open chunk is fetched on repeat calls.
+        """
+
+        interval = chunk_interval(start, end, step)
+        sealed_before = time.time() - self.cache_freshness
+        concurrency = max(self.split_concurrency, 1)
+        semaphore = asyncio.Semaphore(concurrency)
+        chunks = split_chunks(start, end, interval)
+        unstarted = len(chunks)
+
+        async def fetch_chunk(lo: float, hi: float) -> List[dict[str, Any]]:
+            nonlocal unstarted
+            closed = hi <= sealed_before
+            # Closed chunks are fetched whole so any later window can reuse them.
+            first, last = (lo, hi - step) if closed else (max(lo, start), end)
+            key = normalize_query(promql, step, first, last)
+            if closed and self.cache is not None and not self.bypass_cache:
+                cached = await self.cache.get_json(
+                    "query_range_chunk", key, persistent=True
+                )
+                if cached is not None:
+                    unstarted -= 1
+                    return cached
+
+            async with semaphore:
+                # Split the remaining budget over the waves still to run.
+                waves = -(-unstarted // concurrency)
+                unstarted -= 1
+                with deadline_after(budget_share(waves)):
+                    result = await self._range_request(promql, first, last, step)
+            if closed and self.cache is not None:
+                await self.cache.set_json(
+                    "query_range_chunk", key, result, self.chunk_ttl, persistent=True
+                )
+            return result
+
+        parts = await asyncio.gather(*(fetch_chunk(lo, hi) for lo, hi in chunks))
+        return trim_matrix(merge_matrices(list(parts)), start, end)
+
+    async def _range_request(
+        self, promql: str, first: float, last: float, step: float
+    ) -> List[dict[str, Any]]:
+        """Issue one ``query_range`` call (coalesced with identical in-flight calls)."""
+
+        params = {
+            "query": promql,
+            "start": format_ts(first),
+            "end": format_ts(last),
+            "step": format_ts(step),
+        }
+        if self.flights is None:
+            return await self._get_result("query_range", params)
+        return await self.flights.do(
+            normalize_query(promql, step, first, last),
+            lambda: self._get_result("query_range", params),
+        )
+
 
 class TempoClient:
-    def __init__(self, settings: Any = Depends(get_settings)):
+    def __init__(
+        self,
+        settings: Any = Depends(get_settings),
+        bypass_cache: bool | Any = Depends(cache_bypass_requested),
+    ):
         if isinstance(settings, _DependsClass):  # pragma: no cover
             settings = get_settings()
+        if isinstance(bypass_cache, _DependsClass):
+            bypass_cache = False
 
         self.base_url = settings.TEMPO_BASE_URL  # type: ignore[attr-defined]
         self.timeout = settings.DEFAULT_HTTP_TIMEOUT  # type: ignore[attr-defined]
+        self.http = get_http_client("tempo", settings)
+        self.bulkhead = get_bulkhead("tempo", settings)
+        self.breaker = get_breaker("tempo", settings)
+        self.retry = get_retry_policy("tempo", settings)
+        self.hedger = get_hedger("tempo", settings)
+        self.hedge_base_url = settings.TEMPO_HEDGE_BASE_URL
+        self.cache = get_query_cache(settings)
+        self.traces = get_trace_cache(settings)
+        self.bypass_cache = bypass_cache
+        self.trace_ttl = settings.TEMPO_TRACE_TTL
+        self.trace_settle = settings.TEMPO_TRACE_SETTLE_SECONDS
+        self.recent_trace_ttl = settings.TEMPO_TRACE_RECENT_TTL
+        self.batch_concurrency = settings.TEMPO_BATCH_CONCURRENCY
+        self.search_align = settings.TEMPO_SEARCH_ALIGN
 
     async def fetch_trace_json(self, trace_id: str) -> Any:
-        url = f"{self.base_url.rstrip('/')}/api/traces/{trace_id}"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
+        """Return the trace JSON, served from the trace cache when known.
+
+        Lookups go through the in-process trace LRU, then the shared/disk
+        tiers of the query cache, and only then to Tempo.  A 404 from Tempo is
+        remembered briefly and reported as 404.  A trace whose newest span
+        ended less than ``TEMPO_TRACE_SETTLE_SECONDS`` ago may still grow, so
+        it is only kept in memory for ``TEMPO_TRACE_RECENT_TTL`` seconds.
+        """
+
+        check_trace_id(trace_id)
+        if self.traces is not None and not self.bypass_cache:
+            trace = self.traces.get(trace_id)
+            if trace is not None:
+                return trace
+            if self.traces.is_missing(trace_id):
+                raise self._not_found(trace_id)
+        if self.cache is not None and not self.bypass_cache:
+            trace = await self.cache.get_json(
+                "trace", trace_id, persistent=True, memory=False
+            )
+            if trace is not None:
+                if self.traces is not None:
+                    self.traces.put(trace_id, trace, len(json.dumps(trace)))
+                return trace
+
+        trace, size = await self._fetch_trace(trace_id)
+        if not self._settled(trace):
+            if self.traces is not None:
+                self.traces.put(trace_id, trace, size, self.recent_trace_ttl)
+            return trace
+        if self.traces is not None:
+            self.traces.put(trace_id, trace, size)
+        if self.cache is not None:
+            await self.cache.set_json(
+                "trace", trace_id, trace, self.trace_ttl, persistent=True, memory=False
+            )
+        return trace
+
+    async def fetch_spans(self, trace_id: str) -> SpanTable:
+        """Return the trace as a columnar `SpanTable`."""
+
+        trace = await self.fetch_trace_json(trace_id)
+        try:
+            return parse_trace(trace)
+        except (TypeError, ValueError, AttributeError) as exc:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Unexpected Tempo response format",
+            ) from exc
+
+    async def fetch_trace_summary(self, trace_id: str, top: int = 10) -> Any:
+        """Return critical path, self time per service and slowest spans."""
+
+        summary = summarize_trace(await self.fetch_spans(trace_id), top)
+        return {"trace_id": trace_id, **summary}
+
+    async def fetch_trace_summaries(
+        self, trace_ids: List[str], top: int = 5
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield a summary (or error) per trace ID in completion order.
+
+        Fetches run concurrently, bounded by the shared Tempo semaphore, so a
+        slow or missing trace never holds up the others.  Abandoning the
+        iterator (e.g. on client disconnect) cancels the outstanding fetches.
+        """
+
+        semaphore = get_backend_semaphore("tempo", self.batch_concurrency)
+        unique = list(dict.fromkeys(trace_ids))
+        unstarted = len(unique)
+
+        async def summarize(trace_id: str) -> dict[str, Any]:
+            nonlocal unstarted
+            started = time.monotonic()
             try:
-                response = await client.get(url)
+                async with semaphore:
+                    waves = -(-unstarted // max(self.batch_concurrency, 1))
+                    unstarted -= 1
+                    with deadline_after(budget_share(waves)):
+                        result = await self.fetch_trace_summary(trace_id, top)
+            except HTTPException as exc:
+                result = {
+                    "trace_id": trace_id,
+                    "error": exc.detail,
+                    "status": exc.status_code,
+                }
+            result["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+            return result
+
+        tasks = [asyncio.create_task(summarize(t)) for t in unique]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def search_page(
+        self,
+        query: str,
+        time_range: str = "15m",
+        limit: int = 20,
+        spans_per_trace: int = 3,
+        cursor: str | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield one page of TraceQL hits, then ``{"next_cursor": ...}``.
+
+        Hits are yielded as Tempo's response is parsed.  The cursor continues
+        the same window with traces older than the oldest one on this page (or
+        as old, but not yet returned); it is ``None`` once a page comes back
+        short.
+        """
+
+        if cursor is not None:
+            try:
+                start, before_ns, seen = decode_cursor(cursor)
+            except ValueError as exc:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+                ) from exc
+            end = before_ns / 1e9
+        else:
+            end = time.time()
+            start = int(end - parse_duration(time_range))
+            before_ns, seen = None, ()
+
+        count = 0
+        oldest: int | None = None
+        at_oldest: List[str] = []
+        async for hit in self.search_traces(
+            query, start, end, limit, spans_per_trace, before_ns, seen
+        ):
+            count += 1
+            if oldest is None or hit["start_ns"] < oldest:
+                oldest, at_oldest = hit["start_ns"], []
+            if hit["start_ns"] == oldest:
+                at_oldest.append(hit["trace_id"])
+            yield hit
+        next_cursor = None
+        if count >= limit and oldest is not None:
+            if oldest == before_ns:
+                at_oldest.extend(seen)
+            next_cursor = encode_cursor(
+                align_window(start, end, self.search_align)[0], oldest, at_oldest
+            )
+        yield {"next_cursor": next_cursor}
+
+    async def search_traces(
+        self,
+        query: str,
+        start: float,
+        end: float,
+        limit: int = 20,
+        spans_per_trace: int = 3,
+        before_ns: int | None = None,
+        seen: Sequence[str] = (),
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield compact TraceQL search hits for ``[start, end]`` (seconds).
+
+        The window is aligned to ``TEMPO_SEARCH_ALIGN`` and results are cached
+        under the query plus that aligned window; on a miss hits are streamed
+        to the caller while Tempo's response is still being read.  With
+        *before_ns*, only traces that started before it – or at it, unless
+        their ID is in *seen* – are returned.
+
+        The response is read by a separate task, so the breaker and bulkhead
+        slot are released once Tempo has answered, however slowly the caller
+        consumes the hits.
+        """
+
+        start_s, end_s = align_window(start, end, self.search_align)
+        if before_ns is not None:
+            end_s = min(end_s, math.ceil(before_ns / 1e9))
+        excluded = frozenset(seen) if before_ns is not None else frozenset()
+        key = normalize_query(
+            query, start_s, end_s, limit, spans_per_trace, before_ns, sorted(excluded)
+        )
+        if self.cache is not None and not self.bypass_cache:
+            cached = await self.cache.get_json("trace_search", key)
+            if cached is not None:
+                for hit in cached:
+                    yield hit
+                return
+
+        params = {
+            "q": query,
+            "start": str(start_s),
+            "end": str(end_s),
+            # The excluded traces are matched again; ask for room to skip them.
+            "limit": str(limit + len(excluded)),
+            "spss": str(spans_per_trace),
+            "most_recent": "true",
+        }
+        url = f"{self.base_url.rstrip('/')}/api/search"
+        queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+
+        def wanted(hit: dict[str, Any]) -> bool:
+            if before_ns is None or hit["start_ns"] < before_ns:
+                return True
+            return hit["start_ns"] == before_ns and hit["trace_id"] not in excluded
+
+        async def read() -> None:
+            found = 0
+            try:
+                async with deadline_guard("tempo"), guarded(
+                    self.breaker, self.bulkhead
+                ), self.http.stream(
+                    "GET",
+                    url,
+                    params=params,
+                    timeout=call_timeout(self.timeout, "tempo"),
+                ) as response:
+                    if response.status_code == 400:
+                        detail = (await response.aread()).decode(errors="replace")
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Invalid TraceQL query: {detail.strip()}",
+                        )
+                    if response.status_code != 200:
+                        raise UpstreamError("Tempo", response)
+                    try:
+                        async for item in iter_result_items(
+                            response.aiter_text(), key="traces"
+                        ):
+                            hit = compact_trace(item, spans_per_trace)
+                            if not wanted(hit):
+                                continue
+                            queue.put_nowait(hit)
+                            found += 1
+                            if found >= limit:
+                                break
+                    except LokiFormatError:
+                        pass  # Tempo omits "traces" when nothing matched
             except httpx.HTTPError as exc:
                 raise HTTPException(
                     status_code=status.HTTP_502_BAD_GATEWAY,
                     detail=f"Failed to contact Tempo: {exc}",
                 ) from exc
-        if response.status_code != 200:
+            except (TypeError, ValueError, AttributeError) as exc:
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail="Unexpected Tempo response format",
+                ) from exc
+            finally:
+                queue.put_nowait(None)
+
+        hits: List[dict[str, Any]] = []
+        reader = asyncio.create_task(read())
+        try:
+            while (hit := await queue.get()) is not None:
+                hits.append(hit)
+                yield hit
+            await reader
+        finally:
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+
+        if self.cache is not None:
+            await self.cache.set_json(
+                "trace_search", key, hits, self.cache.ttl_for("trace_search")
+            )
+
+    async def _fetch_trace(self, trace_id: str) -> Tuple[Any, int]:
+        """Fetch a trace from Tempo; return it with its size in bytes."""
+
+        def request(base_url: str) -> Awaitable[httpx.Response]:
+            url = f"{base_url.rstrip('/')}/api/traces/{trace_id}"
+            return self.http.get(url, timeout=call_timeout(self.timeout, "tempo"))
+
+        async def attempt() -> httpx.Response:
+            async with guarded(self.breaker, self.bulkhead):
+                if self.hedger is None:
+                    response = await request(self.base_url)
+                else:
+                    response = await self.hedger.run(
+                        request,
+                        self.base_url,
+                        self.hedge_base_url,
+                        slot=lambda: backend_slot(self.bulkhead),
+                    )
+                if response.status_code not in (200, 404):
+                    raise UpstreamError("Tempo", response)
+                return response
+
+        try:
+            async with deadline_guard("tempo"):
+                response = await with_retries(self.retry, attempt)
+        except httpx.HTTPError as exc:
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Tempo returned {response.status_code}",
-            )
-        return response.json()
+                detail=f"Failed to contact Tempo: {exc}",
+            ) from exc
+        if response.status_code == 404:
+            if self.traces is not None:
+                self.traces.mark_missing(trace_id)
+            raise self._not_found(trace_id)
+        return response.json(), len(response.content)
+
+    def _settled(self, trace: Any) -> bool:
+        """Whether *trace* is old enough that no more spans will arrive."""
+
+        try:
+            end = last_span_end(trace)
+        except (TypeError, ValueError, AttributeError):
+            return False
+        return end is not None and end < time.time_ns() - self.trace_settle * 1e9
+
+    @staticmethod
+    def _not_found(trace_id: str) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Trace {trace_id} not found in Tempo",
+        )
 
 
 class AlertManagerClient:
@@ -164,24 +1423,32 @@ class AlertManagerClient:
 
         self.base_url = settings.ALERTMANAGER_BASE_URL  # type: ignore[attr-defined]
         self.timeout = settings.DEFAULT_HTTP_TIMEOUT  # type: ignore[attr-defined]
+        self.http = get_http_client("alertmanager", settings)
+        self.bulkhead = get_bulkhead("alertmanager", settings)
+        self.breaker = get_breaker("alertmanager", settings)
+        self.retry = get_retry_policy("alertmanager", settings)
 
     async def fetch_active_alerts(
         self, severity: str | None = None, service: str | None = None
     ) -> list[dict[str, Any]]:
         url = f"{self.base_url.rstrip('/')}/api/v2/alerts"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.get(url)
-            except httpx.HTTPError as exc:
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail=f"Failed to contact Alertmanager: {exc}",
-                ) from exc
-        if response.status_code != 200:
+
+        async def attempt() -> httpx.Response:
+            async with guarded(self.breaker, self.bulkhead):
+                timeout = call_timeout(self.timeout, "alertmanager")
+                response = await self.http.get(url, timeout=timeout)
+                if response.status_code != 200:
+                    raise UpstreamError("Alertmanager", response)
+                return response
+
+        try:
+            async with deadline_guard("alertmanager"):
+                response = await with_retries(self.retry, attempt)
+        except httpx.HTTPError as exc:
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Alertmanager returned {response.status_code}",
-            )
+                detail=f"Failed to contact Alertmanager: {exc}",
+            ) from exc
         alerts: Any = response.json()
         if not isinstance(alerts, list):
             raise HTTPException(
@@ -13,6 +13,165 @@ class Settings(BaseSettings):
     TEMPO_BASE_URL: str = "http://tempo:3200"
     ALERTMANAGER_BASE_URL: str = "http://alertmanager:9093"
     DEFAULT_HTTP_TIMEOUT: float = 5.0
+
+    # End-to-end request deadline in seconds, set per request by the
+    # ``X-Request-Timeout`` header or ``_meta.timeout`` of an MCP tool call.
+    # Without one REQUEST_DEFAULT_TIMEOUT applies (0 = none); all are capped
+    # at REQUEST_MAX_TIMEOUT.
+    REQUEST_DEFAULT_TIMEOUT: float = 0.0
+    REQUEST_MAX_TIMEOUT: float = 300.0
+
+    # Shared backend connection pools (one pooled httpx client per backend)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    # Requires the optional ``h2`` package (``pip install httpx[http2]``)
+    HTTP2_ENABLED: bool = False
+
+    # Per-backend bulkheads with adaptive (AIMD) concurrency limits.  Calls
+    # over the limit queue for up to BULKHEAD_QUEUE_TIMEOUT seconds; beyond
+    # BULKHEAD_MAX_QUEUE waiting calls they fail fast with 503 + Retry-After.
+    BULKHEAD_ENABLED: bool = True
+    BULKHEAD_INITIAL_LIMIT: int = 20
+    BULKHEAD_MIN_LIMIT: int = 2
+    BULKHEAD_MAX_LIMIT: int = 100
+    BULKHEAD_MAX_QUEUE: int = 50
+    BULKHEAD_QUEUE_TIMEOUT: float = 2.0
+
+    # Retries of idempotent backend reads after connection errors, timeouts
+    # and 429/502/503/504 answers: up to RETRY_MAX_ATTEMPTS attempts with
+    # exponential backoff from RETRY_BASE_DELAY (full jitter, capped at
+    # RETRY_MAX_DELAY; Retry-After is honoured).  At most RETRY_BUDGET of all
+    # calls are retried.
+    RETRY_ENABLED: bool = True
+    RETRY_MAX_ATTEMPTS: int = 3
+    RETRY_BASE_DELAY: float = 0.1
+    RETRY_MAX_DELAY: float = 2.0
+    RETRY_BUDGET: float = 0.1
+
+    # Per-backend circuit breakers: open once BREAKER_FAILURE_RATE of the last
+    # BREAKER_WINDOW calls (at least BREAKER_MIN_CALLS) failed, fail fast for
+    # BREAKER_OPEN_SECONDS, then let BREAKER_HALF_OPEN_CALLS probes through.
+    # While open, cached endpoints answer with their last-known-good result
+    # (kept BREAKER_STALE_TTL seconds, 0 disables) flagged as stale; those
+    # copies have their own BREAKER_STALE_MAX_BYTES memory budget.
+    BREAKER_ENABLED: bool = True
+    BREAKER_FAILURE_RATE: float = 0.5
+    BREAKER_MIN_CALLS: int = 10
+    BREAKER_WINDOW: int = 20
+    BREAKER_OPEN_SECONDS: float = 10.0
+    BREAKER_HALF_OPEN_CALLS: int = 1
+    BREAKER_STALE_TTL: float = 600.0
+    BREAKER_STALE_MAX_BYTES: int = 8 * 1024 * 1024
+
+    # Query-result cache for Loki/Prometheus reads (see app.cache). TTLs are
+    # per endpoint, in seconds; 0 disables caching for that endpoint.
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_DEFAULT_TTL: float = 15.0
+    CACHE_TTLS: dict[str, float] = {
+        "error_logs": 10.0,
+        "search_logs": 10.0,
+        "log_patterns": 30.0,
+        "log_metrics": 15.0,
+        "trace_logs": 30.0,
+        "latency_percentile": 15.0,
+        "promql": 15.0,
+        "trace_search": 30.0,
+    }
+    # Optional persistent tier for immutable results (closed Prometheus range
+    # chunks, Tempo traces), warm-loaded into memory on startup.
+    CACHE_DISK_PATH: str | None = None
+    CACHE_DISK_MAX_BYTES: int = 512 * 1024 * 1024
+    CACHE_WARM_BYTES: int = 16 * 1024 * 1024
+    # Optional tier shared by all replicas (any Redis-protocol server, e.g.
+    # ``redis://:password@redis:6379/0``); also carries cross-replica
+    # single-flight locks that expire after CACHE_LOCK_TTL seconds.
+    CACHE_REDIS_URL: str | None = None
+    CACHE_REDIS_PREFIX: str = "mcp-obs:"
+    CACHE_REDIS_TIMEOUT: float = 0.25
+    CACHE_LOCK_TTL: float = 5.0
+    # Coalesce identical concurrent Loki/Prometheus queries (see app.singleflight)
+    SINGLEFLIGHT_ENABLED: bool = True
+
+    # Loki range queries are split into time shards run in parallel
+    LOKI_SHARD_SECONDS: int = 3600
+    LOKI_MAX_SHARDS: int = 48
+    LOKI_SHARD_CONCURRENCY: int = 4
+    # Loki's max_entries_limit_per_query: larger limits are split over at
+    # least limit / LOKI_MAX_ENTRIES_PER_QUERY shards, each capped at it.
+    LOKI_MAX_ENTRIES_PER_QUERY: int = 5000
+    # sample=stratified: streams are enumerated with a count query, then at
+    # most LOKI_SAMPLE_CHUNK lines are read per stream (per time bucket for
+    # streams with more) from at most LOKI_SAMPLE_MAX_STREAMS streams, and
+    # sampled across streams and LOKI_SAMPLE_BUCKETS time buckets.
+    LOKI_SAMPLE_BUCKETS: int = 6
+    LOKI_SAMPLE_CHUNK: int = 1000
+    LOKI_SAMPLE_MAX_STREAMS: int = 50
+    # Seconds added around a trace's span window when fetching its logs
+    LOKI_TRACE_LOGS_PADDING: float = 2.0
+    # Lookback for a trace's logs when its span window is unknown (e.g. the
+    # trace is not in Tempo yet)
+    LOKI_TRACE_LOGS_FALLBACK_RANGE: str = "15m"
+
+    # Error fingerprint index behind /logs/errors/new (see app.error_index):
+    # Loki is polled every ERROR_INDEX_INTERVAL seconds for new error lines,
+    # paging forward ERROR_INDEX_BATCH lines at a time (at most
+    # ERROR_INDEX_MAX_PAGES pages per poll; the first poll looks back
+    # ERROR_INDEX_LOOKBACK seconds).  Each poll re-reads the last
+    # ERROR_INDEX_LAG seconds to pick up late lines.  Rolling counts cover
+    # ERROR_INDEX_WINDOW.
+    ERROR_INDEX_ENABLED: bool = True
+    ERROR_INDEX_INTERVAL: float = 30.0
+    ERROR_INDEX_BATCH: int = 5000
+    ERROR_INDEX_MAX_PAGES: int = 10
+    ERROR_INDEX_LAG: float = 60.0
+    ERROR_INDEX_LOOKBACK: float = 24 * 3600.0
+    ERROR_INDEX_WINDOW: float = 3600.0
+    ERROR_INDEX_MAX_FINGERPRINTS: int = 10000
+
+    # Prometheus range queries are split into hour/day chunks; chunks that
+    # closed more than CACHE_FRESHNESS seconds ago are cached for CHUNK_TTL.
+    PROMETHEUS_SPLIT_CONCURRENCY: int = 4
+    PROMETHEUS_CHUNK_TTL: float = 6 * 3600.0
+    PROMETHEUS_CACHE_FRESHNESS: float = 60.0
+    # How long the last matrix of a range query is kept for tail extension
+    # (0 disables it).
+    PROMETHEUS_TAIL_TTL: float = 600.0
+
+    # Hedged reads (Prometheus queries, Tempo trace fetches): when the first
+    # attempt is slower than HEDGE_PERCENTILE of recent latencies a second one
+    # is sent (to *_HEDGE_BASE_URL when set) and the first answer wins.  At most
+    # HEDGE_BUDGET of all requests are hedged.
+    HEDGE_ENABLED: bool = False
+    HEDGE_PERCENTILE: float = 0.95
+    HEDGE_BUDGET: float = 0.1
+    HEDGE_MIN_DELAY: float = 0.05
+    PROMETHEUS_HEDGE_BASE_URL: str | None = None
+    TEMPO_HEDGE_BASE_URL: str | None = None
+
+    # /incident bundles: sections still running after INCIDENT_TIMEOUT seconds
+    # are cut off (partial results are kept) and the bundle is trimmed to
+    # INCIDENT_MAX_BYTES of JSON.
+    INCIDENT_TIMEOUT: float = 8.0
+    INCIDENT_MAX_BYTES: int = 65536
+
+    # Fetched Tempo traces are immutable and cached this long (shared/disk
+    # tiers); in memory they live in an LRU bounded by serialised size.
+    TEMPO_TRACE_TTL: float = 24 * 3600.0
+    TEMPO_TRACE_CACHE_MAX_BYTES: int = 128 * 1024 * 1024
+    # A trace counts as complete only once its newest span ended this many
+    # seconds ago; until then late spans may still arrive, so it is kept in
+    # memory for TEMPO_TRACE_RECENT_TTL seconds only and never persisted.
+    TEMPO_TRACE_SETTLE_SECONDS: float = 60.0
+    TEMPO_TRACE_RECENT_TTL: float = 5.0
+    # Trace IDs Tempo reported as missing are not re-queried for this long
+    TEMPO_NOT_FOUND_TTL: float = 30.0
+    # Concurrent trace fetches across all /traces/batch requests
+    TEMPO_BATCH_CONCURRENCY: int = 8
+    # TraceQL search windows are aligned to this many seconds (cache reuse)
+    TEMPO_SEARCH_ALIGN: int = 30
+
     MCP_TOKEN: str = "testtoken"
 
 
@@ -0,0 +1,229 @@
+"""End-to-end request deadlines and cancellation on client disconnect.
+
+A caller states how long it is willing to wait – ``X-Request-Timeout``
+(seconds) on HTTP requests, ``_meta.timeout`` on MCP tool calls – and the
+resulting absolute deadline is kept in a context variable for the rest of the
+request.  Every backend call then:
+
+* caps its httpx timeout at the remaining budget (`call_timeout`) and is
+  cancelled outright once the deadline passes (`deadline_guard`), failing with
+  504 instead of holding a backend slot nobody is waiting for;
+* when part of a fan-out (Loki shards, Prometheus chunks, trace batches) runs
+  with a share of the budget (`budget_share` / `deadline_after`), so the
+  later waves are not starved by the first one.
+
+`RequestDeadlineMiddleware` sets the deadline for HTTP requests and cancels
+the handler – and with it every backend request it is awaiting – as soon as
+the client disconnects.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import math
+import time
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Iterator, List
+
+import httpx
+from fastapi import HTTPException, status
+from opentelemetry import metrics
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import Settings, get_settings
+
+TIMEOUT_HEADER = "X-Request-Timeout"
+META_TIMEOUT_KEY = "timeout"
+
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+_meter = metrics.get_meter(__name__)
+_cancelled_counter = _meter.create_counter(
+    "mcp.requests.cancelled",
+    description="Requests whose handler was cancelled because the client went away",
+)
+
+
+class DeadlineExceeded(HTTPException):
+    """Raised when the caller's deadline passed before a backend answered."""
+
+
+def resolve_timeout(value: Any, settings: Settings | None = None) -> float | None:
+    """Turn a header/metadata value into a budget in seconds (``None``: none).
+
+    Missing or invalid values fall back to ``REQUEST_DEFAULT_TIMEOUT``; every
+    budget is capped at ``REQUEST_MAX_TIMEOUT``.
+    """
+
+    settings = settings or get_settings()
+    try:
+        timeout = float(value)
+    except (TypeError, ValueError):
+        timeout = math.nan
+    if not timeout > 0 or math.isinf(timeout):
+        timeout = settings.REQUEST_DEFAULT_TIMEOUT
+        if timeout <= 0:
+            return None
+    return min(timeout, settings.REQUEST_MAX_TIMEOUT)
+
+
+@contextlib.contextmanager
+def deadline_after(seconds: float | None) -> Iterator[None]:
+    """Tighten the deadline to at most *seconds* from now within the block."""
+
+    if seconds is None:
+        yield
+        return
+    current = _deadline.get()
+    deadline = time.monotonic() + seconds
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds left until the current deadline, ``None`` without one."""
+
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def without_deadline() -> contextvars.Context:
+    """A copy of the current context with no deadline.
+
+    Work shared by several callers (single-flight) runs in it so that no one
+    caller's budget applies to everybody; each caller bounds only its own wait.
+    """
+
+    context = contextvars.copy_context()
+    context.run(_deadline.set, None)
+    return context
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def _exceeded(backend: str) -> DeadlineExceeded:
+    return DeadlineExceeded(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        detail=f"Request deadline exceeded while waiting for {backend.capitalize()}",
+    )
+
+
+def call_timeout(default: float, backend: str) -> float:
+    """The httpx timeout for one backend call: *default* capped by the budget."""
+
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise _exceeded(backend)
+    return min(default, left)
+
+
+def budget_share(waves: int) -> float | None:
+    """Budget for one of *waves* successive rounds of fan-out calls."""
+
+    left = remaining()
+    if left is None:
+        return None
+    return max(left, 0.0) / max(waves, 1)
+
+
+@contextlib.asynccontextmanager
+async def deadline_guard(backend: str) -> AsyncIterator[None]:
+    """Cancel the block when the deadline passes and report it as 504.
+
+    httpx timeouts apply per connect/read phase, so a slowly streaming response
+    could otherwise outlive the deadline.  Timeouts that fire because the
+    budget ran out are reported the same way.
+    """
+
+    left = remaining()
+    if left is None:
+        yield
+        return
+    if left <= 0:
+        raise _exceeded(backend)
+    try:
+        async with asyncio.timeout(left):
+            yield
+    except (TimeoutError, httpx.TimeoutException) as exc:
+        if isinstance(exc, httpx.TimeoutException) and not expired():
+            raise
+        raise _exceeded(backend) from exc
+
+
+@contextlib.contextmanager
+def request_deadline(timeout: float | None) -> Iterator[None]:
+    """Start a fresh deadline *timeout* seconds from now for one request."""
+
+    token = _deadline.set(None if timeout is None else time.monotonic() + timeout)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class RequestDeadlineMiddleware:
+    """Apply ``X-Request-Timeout`` and cancel handlers of disconnected clients.
+
+    The (small) request body is read up front so that the client's connection
+    can be watched for ``http.disconnect`` while the handler runs; the handler
+    sees the same messages replayed.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        body: List[Message] = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body.append(message)
+            if not message.get("more_body", False):
+                break
+
+        disconnected = asyncio.Event()
+
+        async def replay() -> Message:
+            if body:
+                return body.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def watch() -> None:
+            with contextlib.suppress(Exception):
+                while (await receive())["type"] != "http.disconnect":
+                    pass
+                disconnected.set()
+
+        timeout = resolve_timeout(Headers(scope=scope).get(TIMEOUT_HEADER))
+        with request_deadline(timeout):
+            handler = asyncio.ensure_future(self.app(scope, replay, send))
+        watcher = asyncio.ensure_future(watch())
+        try:
+            await asyncio.wait({handler, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not handler.done() and disconnected.is_set():
+                _cancelled_counter.add(1)
+                handler.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await handler
+                return
+            await handler
+        finally:
+            handler.cancel()
+            watcher.cancel()
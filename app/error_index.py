@@ -0,0 +1,361 @@
+"""In-process index of error fingerprints: "is this error new?" in O(1).
+
+Error lines are normalised with the template miner's masks (IDs, addresses,
+numbers become placeholders) and hashed into a *fingerprint* per service.
+Each fingerprint records its first/last timestamp, a total count and a
+rolling count over ``window`` seconds (per-minute buckets), plus a sample
+line.
+
+A background task (`run_error_indexer`, started from the app lifespan) polls
+Loki every ``ERROR_INDEX_INTERVAL`` seconds for error lines since the newest
+one already indexed, so the index is maintained incrementally and
+`/logs/errors/new` never rescans history.  The first poll backfills
+``ERROR_INDEX_LOOKBACK`` seconds.  Polls page *forward* in pages of
+``ERROR_INDEX_BATCH`` lines: no line is skipped, and a backlog larger than
+``ERROR_INDEX_MAX_PAGES`` pages is simply continued by the next poll.  Each
+poll starts ``ERROR_INDEX_LAG`` seconds before the newest indexed line so
+lines arriving late (e.g. from a lagging service) are still picked up; lines
+seen twice are recognised by stream, timestamp and content.
+
+Memory is bounded: only the ``max_fingerprints`` most recently seen
+fingerprints (across all services) are kept; an evicted fingerprint that
+shows up again is reported as new.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import hashlib
+import time
+from collections import OrderedDict, deque
+from logging import getLogger
+from typing import Any, Deque, Dict, Iterable, List, Set, Tuple
+
+from fastapi import HTTPException
+
+from app.clients import LokiClient
+from app.config import Settings, get_settings
+from app.log_patterns import mask
+
+logger = getLogger(__name__)
+
+UNKNOWN_SERVICE = "unknown"
+MAX_SAMPLE_CHARS = 500
+_BUCKET_NS = 60 * 10**9
+
+
+def normalize(line: str) -> str:
+    """The line with variable parts masked and whitespace collapsed."""
+
+    return " ".join(mask(line).split())
+
+
+def fingerprint(line: str) -> str:
+    """Stable short hash of the normalised *line*."""
+
+    return hashlib.blake2b(normalize(line).encode(), digest_size=8).hexdigest()
+
+
+class ErrorRecord:
+    """One fingerprint of one service with its statistics."""
+
+    __slots__ = (
+        "service",
+        "fingerprint",
+        "template",
+        "sample",
+        "first_seen",
+        "last_seen",
+        "count",
+        "buckets",
+        "evicted",
+        "order",
+    )
+
+    def __init__(self, service: str, fingerprint: str, line: str, timestamp: int):
+        self.service = service
+        self.fingerprint = fingerprint
+        self.template = normalize(line)[:MAX_SAMPLE_CHARS]
+        self.sample = line[:MAX_SAMPLE_CHARS]
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.count = 0
+        # [bucket start (ns), count] pairs, oldest first.
+        self.buckets: Deque[List[int]] = deque()
+        self.evicted = False
+        # (first_seen, sequence number) – its key in the service's index.
+        self.order: Tuple[int, int] = (timestamp, 0)
+
+    def seen(self, timestamp: int, window_ns: int) -> None:
+        self.count += 1
+        self.first_seen = min(self.first_seen, timestamp)
+        self.last_seen = max(self.last_seen, timestamp)
+        bucket = timestamp - timestamp % _BUCKET_NS
+        if self.buckets and self.buckets[-1][0] == bucket:
+            self.buckets[-1][1] += 1
+        elif not self.buckets or self.buckets[-1][0] < bucket:
+            self.buckets.append([bucket, 1])
+        else:  # older than the newest bucket: count it in the next newer one
+            for pair in self.buckets:
+                if pair[0] >= bucket:
+                    pair[1] += 1
+                    break
+        self._prune(self.last_seen - window_ns)
+
+    def recent_count(self, since_ns: int) -> int:
+        return sum(n for start, n in self.buckets if start + _BUCKET_NS > since_ns)
+
+    def _prune(self, since_ns: int) -> None:
+        while self.buckets and self.buckets[0][0] + _BUCKET_NS <= since_ns:
+            self.buckets.popleft()
+
+    def as_dict(self, window_since_ns: int) -> Dict[str, Any]:
+        return {
+            "service": self.service,
+            "fingerprint": self.fingerprint,
+            "template": self.template,
+            "sample": self.sample,
+            "first_seen": str(self.first_seen),
+            "last_seen": str(self.last_seen),
+            "count": self.count,
+            "recent_count": self.recent_count(window_since_ns),
+        }
+
+
+class ErrorIndex:
+    """Fingerprints per service, in discovery order, with LRU eviction."""
+
+    def __init__(
+        self, max_fingerprints: int = 10000, window: float = 3600.0, lag: float = 60.0
+    ):
+        self.max_fingerprints = max(max_fingerprints, 1)
+        self.window_ns = int(window * 1e9)
+        self.lag_ns = int(lag * 1e9)
+        self.lines = 0
+        self.evicted = 0
+        self.polls = 0
+        self.truncated_polls = 0
+        self.indexed_since: int | None = None
+        self.watermark: int | None = None
+        self.last_poll: float | None = None
+        self._services: Dict[str, Dict[str, ErrorRecord]] = {}
+        # Per service, (first_seen, seq, record) sorted by first_seen – kept
+        # sorted as late lines move a record's first_seen back.
+        self._discovered: Dict[str, List[Tuple[int, int, ErrorRecord]]] = {}
+        self._seq = 0
+        # All records in least-recently-seen order for eviction.
+        self._lru: "OrderedDict[Tuple[str, str], ErrorRecord]" = OrderedDict()
+        # Lines indexed within the lag margin: (stream, timestamp, line hash).
+        self._recent: Set[Tuple[Tuple[Tuple[str, str], ...], int, int]] = set()
+
+    @property
+    def ready(self) -> bool:
+        return self.indexed_since is not None
+
+    def observe(self, service: str, line: str, timestamp: int) -> ErrorRecord:
+        """Index one error *line* of *service* logged at *timestamp* (ns)."""
+
+        self.lines += 1
+        fp = fingerprint(line)
+        records = self._services.setdefault(service, {})
+        record = records.get(fp)
+        if record is None:
+            record = records[fp] = ErrorRecord(service, fp, line, timestamp)
+            self._reindex(record)
+            self._lru[(service, fp)] = record
+            if len(self._lru) > self.max_fingerprints:
+                self._evict()
+        else:
+            self._lru.move_to_end((service, fp))
+        record.seen(timestamp, self.window_ns)
+        if record.first_seen != record.order[0]:
+            self._reindex(record)
+        if self.watermark is None or timestamp > self.watermark:
+            self.watermark = timestamp
+        return record
+
+    def ingest(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Index Loki entries (``{"timestamp", "labels", "line"}``).
+
+        Entries already indexed within the lag margin are skipped; returns the
+        number of lines newly indexed.
+        """
+
+        indexed = 0
+        for entry in entries:
+            try:
+                timestamp = int(entry["timestamp"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            labels = entry.get("labels") or {}
+            key = (tuple(sorted(labels.items())), timestamp, hash(entry["line"]))
+            if key in self._recent:
+                continue
+            self._recent.add(key)
+            service = labels.get("service") or UNKNOWN_SERVICE
+            self.observe(service, entry["line"], timestamp)
+            indexed += 1
+        return indexed
+
+    def get(self, service: str, fp: str) -> ErrorRecord | None:
+        return self._services.get(service, {}).get(fp)
+
+    def new_since(
+        self, since_ns: int, service: str | None = None, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Fingerprints first seen at or after *since_ns*, newest first.
+
+        Each service's fingerprints are kept sorted by first sighting, so only
+        the (at most *limit*) newest ones are visited: the cost is proportional
+        to the answer, not to the history indexed.
+        """
+
+        services = [service] if service else list(self._discovered)
+        found: List[ErrorRecord] = []
+        for name in services:
+            ordered = self._discovered.get(name, [])
+            first = max(bisect.bisect_left(ordered, (since_ns,)), len(ordered) - limit)
+            found.extend(record for _, _, record in ordered[first:])
+        found.sort(key=lambda r: r.first_seen, reverse=True)
+        window_since = time.time_ns() - self.window_ns
+        return [record.as_dict(window_since) for record in found[:limit]]
+
+    def report(
+        self, since_ns: int, service: str | None = None, limit: int = 50
+    ) -> Dict[str, Any]:
+        """`new_since` together with the index status."""
+
+        return {
+            **self.status(),
+            "since": str(since_ns),
+            "errors": self.new_since(since_ns, service, limit),
+        }
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "indexed_since": (
+                None if self.indexed_since is None else str(self.indexed_since)
+            ),
+            "watermark": None if self.watermark is None else str(self.watermark),
+            "last_poll": self.last_poll,
+            "fingerprints": len(self._lru),
+            "lines": self.lines,
+            "evicted": self.evicted,
+            "polls": self.polls,
+            "truncated_polls": self.truncated_polls,
+        }
+
+    async def poll(
+        self,
+        loki: LokiClient,
+        limit: int,
+        lookback: float,
+        now_ns: int | None = None,
+        max_pages: int = 10,
+    ) -> int:
+        """Page forward through the error lines logged since the last poll.
+
+        Returns the number of lines newly indexed.  When *max_pages* pages of
+        *limit* lines did not reach *now_ns* the poll counts as truncated and
+        the next one continues where it stopped.
+        """
+
+        end = time.time_ns() if now_ns is None else now_ns
+        if self.watermark is None or self.indexed_since is None:
+            start = end - int(lookback * 1e9)
+            self.indexed_since = start
+        else:
+            start = max(self.watermark - self.lag_ns, self.indexed_since)
+        indexed = 0
+        for _ in range(max(max_pages, 1)):
+            if start >= end:
+                break
+            entries = await loki.fetch_error_page(limit, start, end)
+            indexed += self.ingest(entries)
+            if len(entries) < limit:
+                break
+            last = int(entries[-1]["timestamp"])
+            # A full page of one timestamp cannot be paged past otherwise.
+            start = last if last > start else start + 1
+        else:
+            self.truncated_polls += 1
+        if self.watermark is not None:
+            horizon = self.watermark - self.lag_ns
+            self._recent = {key for key in self._recent if key[1] >= horizon}
+        self.polls += 1
+        self.last_poll = time.time()
+        return indexed
+
+    def _reindex(self, record: ErrorRecord) -> None:
+        """(Re)insert *record* in its service's first_seen order."""
+
+        ordered = self._discovered.setdefault(record.service, [])
+        if not record.evicted and record.order[1]:
+            self._unindex(record)
+        self._seq += 1
+        record.order = (record.first_seen, self._seq)
+        bisect.insort(ordered, (*record.order, record))
+
+    def _unindex(self, record: ErrorRecord) -> None:
+        ordered = self._discovered[record.service]
+        i = bisect.bisect_left(ordered, record.order)
+        del ordered[i]
+
+    def _evict(self) -> None:
+        (service, fp), record = self._lru.popitem(last=False)
+        self._unindex(record)
+        record.evicted = True
+        del self._services[service][fp]
+        self.evicted += 1
+
+
+_error_index: ErrorIndex | None = None
+
+
+def get_error_index(settings: Settings | None = None) -> ErrorIndex:
+    """Return the process-wide error index."""
+
+    global _error_index
+    if _error_index is None:
+        settings = settings or get_settings()
+        _error_index = ErrorIndex(
+            settings.ERROR_INDEX_MAX_FINGERPRINTS,
+            settings.ERROR_INDEX_WINDOW,
+            settings.ERROR_INDEX_LAG,
+        )
+    return _error_index
+
+
+def set_error_index(index: ErrorIndex | None) -> None:
+    """Install a custom error index; ``None`` resets it."""
+
+    global _error_index
+    _error_index = index
+
+
+async def run_error_indexer(settings: Settings | None = None) -> None:
+    """Poll Loki into the error index until cancelled."""
+
+    settings = settings or get_settings()
+    index = get_error_index(settings)
+    while True:
+        try:
+            await index.poll(
+                LokiClient(settings),
+                settings.ERROR_INDEX_BATCH,
+                settings.ERROR_INDEX_LOOKBACK,
+                max_pages=settings.ERROR_INDEX_MAX_PAGES,
+            )
+        except HTTPException as exc:
+            logger.warning("Error index poll failed: %s", exc.detail)
+        await asyncio.sleep(settings.ERROR_INDEX_INTERVAL)
+
+
+def start_error_indexer(settings: Settings) -> asyncio.Task[None] | None:
+    """Start the background indexer (``None`` when ``ERROR_INDEX_ENABLED`` is off)."""
+
+    if not settings.ERROR_INDEX_ENABLED:
+        return None
+    return asyncio.create_task(run_error_indexer(settings))
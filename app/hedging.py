@@ -0,0 +1,176 @@
+"""Hedged requests for idempotent backend reads.
+
+A hedged read sends one request and, if it has not answered within the
+backend's recent latency percentile (``HEDGE_PERCENTILE``), sends a second
+one – to an alternate replica when configured – and returns whichever answers
+first, cancelling the other.  This cuts the tail latency inherited from slow
+Tempo queriers or Prometheus replicas at the cost of a few extra requests.
+
+The extra load is capped by a token-bucket budget: every request earns
+``HEDGE_BUDGET`` tokens (up to a small burst) and every hedge spends one, so
+at most that fraction of requests is ever hedged – even when the backend as a
+whole slows down and every request would otherwise qualify.  The hedge runs
+in its own *slot* (a bulkhead slot of the backend) so it is counted against
+the backend's concurrency limit like any other call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import (
+    Any,
+    AsyncContextManager,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Tuple,
+    TypeVar,
+)
+
+from opentelemetry import metrics
+
+from app.config import Settings, get_settings
+
+_meter = metrics.get_meter(__name__)
+_hedge_counter = _meter.create_counter(
+    "mcp.hedge.requests",
+    description="Hedged backend reads by backend and outcome (sent/won/over_budget)",
+)
+
+T = TypeVar("T")
+
+# Hedge delays are only trusted once this many latencies were observed.
+_MIN_SAMPLES = 20
+_WINDOW = 500
+_BURST = 10.0
+
+
+class Hedger:
+    """Per-backend latency tracker, hedge budget and hedged-call runner."""
+
+    def __init__(
+        self,
+        backend: str,
+        percentile: float = 0.95,
+        budget: float = 0.1,
+        min_delay: float = 0.05,
+    ):
+        self.backend = backend
+        self.percentile = percentile
+        self.budget = budget
+        self.min_delay = min_delay
+        self.latencies: Deque[float] = deque(maxlen=_WINDOW)
+        self.tokens = _BURST
+        self.stats: Dict[str, int] = {"sent": 0, "won": 0, "over_budget": 0}
+
+    def record(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+
+    def delay(self) -> float | None:
+        """Return the current hedge delay or ``None`` while still warming up."""
+
+        if len(self.latencies) < _MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)
+        return max(ordered[index], self.min_delay)
+
+    async def run(
+        self,
+        attempt: Callable[[str], Awaitable[T]],
+        primary: str,
+        alternate: str | None = None,
+        slot: Callable[[], AsyncContextManager[Any]] | None = None,
+    ) -> T:
+        """Call ``attempt(primary)``, hedging with ``attempt(alternate)``.
+
+        The hedge runs inside ``slot()`` when given; the caller already holds
+        one for the primary attempt.
+        """
+
+        self.tokens = min(_BURST, self.tokens + self.budget)
+        started = time.monotonic()
+        first = asyncio.ensure_future(attempt(primary))
+        delay = self.delay()
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait({first}, timeout=delay)
+                if not done:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return await self._race(
+                            first,
+                            self._hedge(attempt, alternate or primary, slot),
+                            started,
+                        )
+                    self._count("over_budget")
+            result = await first
+        except BaseException:
+            first.cancel()
+            raise
+        self.record(time.monotonic() - started)
+        return result
+
+    async def _race(
+        self, first: asyncio.Future[T], hedge: Awaitable[T], started: float
+    ) -> T:
+        self._count("sent")
+        second = asyncio.ensure_future(hedge)
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self._count("won")
+                        self.record(time.monotonic() - started)
+                        return task.result()
+            # Both attempts failed: surface the primary's error.
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    @staticmethod
+    async def _hedge(
+        attempt: Callable[[str], Awaitable[T]],
+        base: str,
+        slot: Callable[[], AsyncContextManager[Any]] | None,
+    ) -> T:
+        if slot is None:
+            return await attempt(base)
+        async with slot():
+            return await attempt(base)
+
+    def _count(self, outcome: str) -> None:
+        self.stats[outcome] += 1
+        _hedge_counter.add(1, {"backend": self.backend, "outcome": outcome})
+
+
+_hedgers: Dict[str, Tuple[Tuple[float, float, float], Hedger]] = {}
+
+
+def get_hedger(backend: str, settings: Settings | None = None) -> Hedger | None:
+    """Return the shared `Hedger` for *backend*, or ``None`` if hedging is off."""
+
+    settings = settings or get_settings()
+    if not settings.HEDGE_ENABLED:
+        return None
+    config = (
+        settings.HEDGE_PERCENTILE,
+        settings.HEDGE_BUDGET,
+        settings.HEDGE_MIN_DELAY,
+    )
+    entry = _hedgers.get(backend)
+    if entry is None or entry[0] != config:
+        entry = (config, Hedger(backend, *config))
+        _hedgers[backend] = entry
+    return entry[1]
@@ -0,0 +1,216 @@
+"""One-shot incident bundles: everything an agent needs about a service.
+
+`build_incident` fans out to every backend at once for one service and time
+window – error logs (Loki), a latency percentile series (Prometheus), active
+alerts (Alertmanager), exemplar error/slow traces (Tempo search) and their
+summaries – and returns one compact bundle.
+
+Each section runs under a shared time budget.  A section that fails – with a
+backend error or any unexpected exception – is reported with its error, and
+one still running when the budget is spent is cancelled and reported as
+``timeout`` together with whatever it had gathered so far (e.g. the trace
+summaries that already completed).  Finally the bundle
+is trimmed to a byte budget by halving its longest lists.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import time
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from fastapi import HTTPException
+
+from app.clients import AlertManagerClient, LokiClient, PrometheusClient, TempoClient
+from app.deadline import DeadlineExceeded, deadline_after
+
+logger = getLogger(__name__)
+
+LATENCY_METRIC = "http_server_request_duration_seconds_bucket"
+MAX_LINE_CHARS = 500
+MAX_SERIES_POINTS = 60
+CRITICAL_PATH_SPANS = 10
+
+Section = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# (section, list) pairs that may be shortened to fit the byte budget.
+_TRIMMABLE: Tuple[Tuple[str, str], ...] = (
+    ("error_logs", "logs"),
+    ("traces", "summaries"),
+    ("traces", "traces"),
+    ("alerts", "alerts"),
+    ("latency", "series"),
+)
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.monotonic() - started) * 1000, 1)
+
+
+async def gather_sections(
+    sections: Dict[str, Section], timeout: float
+) -> Dict[str, Dict[str, Any]]:
+    """Run *sections* concurrently; each fills its own dict as it progresses."""
+
+    results: Dict[str, Dict[str, Any]] = {name: {} for name in sections}
+    started = time.monotonic()
+
+    async def run(name: str, fill: Section) -> None:
+        data = results[name]
+        try:
+            await fill(data)
+            data["status"] = "ok"
+        except DeadlineExceeded:
+            data["status"] = "timeout"
+        except HTTPException as exc:
+            data.update(status="error", error=exc.detail)
+        except Exception as exc:
+            # A malformed backend answer must not take the other sections down.
+            logger.warning("Incident section %s failed", name, exc_info=True)
+            data.update(status="error", error=f"{type(exc).__name__}: {exc}")
+        data["elapsed_ms"] = _elapsed_ms(started)
+
+    with deadline_after(timeout):
+        tasks = [
+            asyncio.create_task(run(name, fill)) for name, fill in sections.items()
+        ]
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    for data in results.values():
+        if "status" not in data:
+            data.update(status="timeout", elapsed_ms=_elapsed_ms(started))
+    return results
+
+
+def fit_bundle(bundle: Dict[str, Any], max_bytes: int) -> Dict[str, Any]:
+    """Halve the bundle's longest lists until its JSON fits *max_bytes*."""
+
+    sections = bundle["sections"]
+    while len(json.dumps(bundle)) > max_bytes:
+        candidates = [
+            (len(json.dumps(sections[name][key])), name, key)
+            for name, key in _TRIMMABLE
+            if sections.get(name, {}).get(key)
+        ]
+        if not candidates:
+            break
+        _, name, key = max(candidates)
+        items = sections[name][key]
+        keep = len(items) // 2
+        if key == "logs":
+            items = items[len(items) - keep :]  # keep the newest lines
+        elif key == "series":
+            items = items[::2] if keep else []  # coarser, same span
+        else:
+            items = items[:keep]
+        sections[name][key] = items
+        sections[name]["truncated"] = True
+    return bundle
+
+
+def _compact_alert(alert: Dict[str, Any]) -> Dict[str, Any]:
+    labels = alert.get("labels", {})
+    annotations = alert.get("annotations", {})
+    return {
+        "alertname": labels.get("alertname"),
+        "severity": labels.get("severity"),
+        "state": (alert.get("status") or {}).get("state"),
+        "starts_at": alert.get("startsAt"),
+        "summary": annotations.get("summary") or annotations.get("description"),
+    }
+
+
+def _number(value: Any) -> float | None:
+    number = float(value)
+    return None if math.isnan(number) or math.isinf(number) else number
+
+
+async def build_incident(
+    loki: LokiClient,
+    prometheus: PrometheusClient,
+    tempo: TempoClient,
+    alertmanager: AlertManagerClient,
+    service: str,
+    start: float,
+    end: float,
+    *,
+    percentile: float = 0.95,
+    slow: str = "1s",
+    log_limit: int = 50,
+    trace_limit: int = 5,
+    timeout: float = 8.0,
+    max_bytes: int = 65536,
+) -> Dict[str, Any]:
+    """Gather the incident bundle for *service* over ``[start, end]`` (seconds)."""
+
+    started = time.monotonic()
+
+    async def error_logs(data: Dict[str, Any]) -> None:
+        entries = await loki.fetch_error_window(
+            log_limit, service, int(start * 1e9), int(end * 1e9)
+        )
+        data["logs"] = [
+            {"timestamp": e["timestamp"], "line": e["line"][:MAX_LINE_CHARS]}
+            for e in entries
+        ]
+
+    async def latency(data: Dict[str, Any]) -> None:
+        step = max(15, math.ceil((end - start) / MAX_SERIES_POINTS))
+        rate_window = f"{max(step, 60)}s"
+        promql = (
+            f"histogram_quantile({percentile}, sum(rate("
+            f'{LATENCY_METRIC}{{service="{service}"}}[{rate_window}])) by (le))'
+        )
+        data.update(percentile=percentile, step=step, query=promql)
+        matrix = await prometheus.query_range(promql, start, end, step)
+        values = matrix[0].get("values", []) if matrix else []
+        data["series"] = [[ts, _number(v)] for ts, v in values]
+        known = [v for _, v in data["series"] if v is not None]
+        data["max_seconds"] = max(known) if known else None
+        data["last_seconds"] = known[-1] if known else None
+
+    async def alerts(data: Dict[str, Any]) -> None:
+        active = await alertmanager.fetch_active_alerts(service=service)
+        data["alerts"] = [_compact_alert(a) for a in active]
+
+    async def traces(data: Dict[str, Any]) -> None:
+        query = (
+            f'{{ resource.service.name = "{service}" '
+            f"&& (status = error || duration > {slow}) }}"
+        )
+        data["query"] = query
+        hits: List[Dict[str, Any]] = []
+        summaries: List[Dict[str, Any]] = []
+        data.update(traces=hits, summaries=summaries)
+        async for hit in tempo.search_traces(query, start, end, trace_limit, 0):
+            hits.append({k: v for k, v in hit.items() if k != "spans"})
+        ids = [hit["trace_id"] for hit in hits if hit.get("trace_id")]
+        async for summary in tempo.fetch_trace_summaries(ids, top=3):
+            if "critical_path" in summary:
+                summary["critical_path"] = summary["critical_path"][
+                    :CRITICAL_PATH_SPANS
+                ]
+            summaries.append(summary)
+
+    sections = await gather_sections(
+        {
+            "error_logs": error_logs,
+            "latency": latency,
+            "alerts": alerts,
+            "traces": traces,
+        },
+        timeout,
+    )
+    bundle = {
+        "service": service,
+        "start": start,
+        "end": end,
+        "sections": sections,
+        "elapsed_ms": _elapsed_ms(started),
+    }
+    return fit_bundle(bundle, max_bytes)
@@ -0,0 +1,225 @@
+"""Online log template mining (Drain).
+
+Error logs are mostly a handful of messages repeated with different IDs,
+numbers and durations.  `TemplateMiner` folds a stream of lines into
+templates such as ``payment <*> declined after <NUM> ms`` with a count,
+first/last timestamp and one sample line each, so agents read a dozen
+patterns instead of a thousand lines.
+
+It follows Drain (He et al., ICWS 2017): obvious variables are masked first
+(UUIDs, IPs, long hex IDs, numbers), then a fixed-depth parse tree routes a
+line by its token count and first tokens to a small group of clusters, and
+the line joins the most similar one (share of identical tokens at least
+``similarity``) – differing positions of that template become ``<*>`` – or
+starts a new cluster.  Each line costs O(depth + clusters in its leaf).
+
+Memory is bounded regardless of how many lines are mined: lines are cut to
+``max_tokens`` tokens, tree nodes have at most ``max_children`` children
+(further tokens share a ``<*>`` child) and only the ``max_clusters`` most
+recently matched clusters are kept.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List
+
+WILDCARD = "<*>"
+
+_MASKS = (
+    (
+        re.compile(
+            r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-"
+            r"[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"
+        ),
+        "<UUID>",
+    ),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<IP>"),
+    (
+        re.compile(
+            r"\b(?:0x[0-9a-fA-F]+|(?=[0-9a-fA-F]*\d)(?=[0-9a-fA-F]*[a-fA-F])"
+            r"[0-9a-fA-F]{8,})\b"
+        ),
+        "<HEX>",
+    ),
+    (
+        re.compile(r"(?<![\w.<])[-+]?\d+(?:\.\d+)?(?:ms|us|ns|s|m|h|%)?(?![\w.>])"),
+        "<NUM>",
+    ),
+)
+_HAS_DIGIT = re.compile(r"\d")
+
+
+def mask(line: str) -> str:
+    """Replace obvious variables (IDs, addresses, numbers) by placeholders."""
+
+    for pattern, replacement in _MASKS:
+        line = pattern.sub(replacement, line)
+    return line
+
+
+class LogCluster:
+    """One template with its statistics."""
+
+    __slots__ = ("tokens", "count", "first_seen", "last_seen", "sample", "leaf")
+
+    def __init__(self, tokens: List[str], sample: str, leaf: List["LogCluster"]):
+        self.tokens = tokens
+        self.count = 0
+        self.first_seen: int | None = None
+        self.last_seen: int | None = None
+        self.sample = sample
+        self.leaf = leaf
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+    def seen(self, timestamp: int | None) -> None:
+        self.count += 1
+        if timestamp is None:
+            return
+        if self.first_seen is None or timestamp < self.first_seen:
+            self.first_seen = timestamp
+        if self.last_seen is None or timestamp > self.last_seen:
+            self.last_seen = timestamp
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "template": self.template,
+            "count": self.count,
+            "first_seen": None if self.first_seen is None else str(self.first_seen),
+            "last_seen": None if self.last_seen is None else str(self.last_seen),
+            "sample": self.sample,
+        }
+
+
+class _Node:
+    __slots__ = ("children", "clusters")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _Node] = {}
+        self.clusters: List[LogCluster] = []
+
+
+class TemplateMiner:
+    """Incremental Drain parse tree with bounded memory."""
+
+    def __init__(
+        self,
+        depth: int = 4,
+        similarity: float = 0.4,
+        max_children: int = 100,
+        max_clusters: int = 1000,
+        max_tokens: int = 64,
+        max_sample_chars: int = 500,
+    ):
+        self.prefix_depth = max(depth - 2, 1)
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.max_tokens = max_tokens
+        self.max_sample_chars = max_sample_chars
+        self.lines = 0
+        self.evicted = 0
+        self._root = _Node()
+        # Clusters in least-recently-matched order for eviction.
+        self._clusters: "OrderedDict[int, LogCluster]" = OrderedDict()
+
+    def add(self, line: str, timestamp: Any = None) -> LogCluster:
+        """Fold one line (with its Loki timestamp, if known) into the templates."""
+
+        self.lines += 1
+        tokens = mask(line).split()[: self.max_tokens]
+        leaf = self._leaf(tokens)
+        cluster = self._best_match(leaf, tokens)
+        if cluster is None:
+            cluster = LogCluster(tokens, line[: self.max_sample_chars], leaf)
+            leaf.append(cluster)
+            self._clusters[id(cluster)] = cluster
+            if len(self._clusters) > self.max_clusters:
+                self._evict()
+        else:
+            cluster.tokens = [
+                old if old == new else WILDCARD
+                for old, new in zip(cluster.tokens, tokens)
+            ]
+            self._clusters.move_to_end(id(cluster))
+        try:
+            ts = None if timestamp is None else int(timestamp)
+        except (TypeError, ValueError):
+            ts = None
+        cluster.seen(ts)
+        return cluster
+
+    def add_entries(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Fold Loki entries (``{"timestamp", "line", ...}``) into the templates."""
+
+        for entry in entries:
+            self.add(entry["line"], entry.get("timestamp"))
+
+    def templates(self, top: int | None = None) -> List[Dict[str, Any]]:
+        """The templates by descending count (the *top* most frequent)."""
+
+        ordered = sorted(self._clusters.values(), key=lambda c: -c.count)
+        return [c.as_dict() for c in ordered[:top]]
+
+    def summary(self, top: int | None = None) -> Dict[str, Any]:
+        return {
+            "patterns": self.templates(top),
+            "lines": self.lines,
+            "clusters": len(self._clusters),
+            "evicted": self.evicted,
+        }
+
+    def _leaf(self, tokens: List[str]) -> List[LogCluster]:
+        node = self._root.children.get(str(len(tokens)))
+        if node is None:
+            node = self._root.children[str(len(tokens))] = _Node()
+        for token in tokens[: self.prefix_depth]:
+            # Tokens that look variable never become their own branch.
+            key = WILDCARD if _HAS_DIGIT.search(token) or "<" in token else token
+            child = node.children.get(key)
+            if child is None:
+                if len(node.children) >= self.max_children:
+                    key = WILDCARD
+                    child = node.children.get(key)
+                if child is None:
+                    child = node.children[key] = _Node()
+            node = child
+        return node.clusters
+
+    def _best_match(
+        self, leaf: List[LogCluster], tokens: List[str]
+    ) -> LogCluster | None:
+        best: LogCluster | None = None
+        best_key = (-1.0, -1)
+        for cluster in leaf:
+            same = params = 0
+            for template_token, token in zip(cluster.tokens, tokens):
+                if template_token == WILDCARD:
+                    params += 1
+                elif template_token == token:
+                    same += 1
+            score = same / len(tokens) if tokens else 1.0
+            if (score, params) > best_key:
+                best, best_key = cluster, (score, params)
+        if best is None or best_key[0] < self.similarity:
+            return None
+        return best
+
+    def _evict(self) -> None:
+        _, cluster = self._clusters.popitem(last=False)
+        cluster.leaf.remove(cluster)
+        self.evicted += 1
+
+
+def mine_templates(
+    entries: Iterable[Dict[str, Any]], top: int | None = None, **options: Any
+) -> Dict[str, Any]:
+    """Mine *entries* and summarise the *top* templates."""
+
+    miner = TemplateMiner(**options)
+    miner.add_entries(entries)
+    return miner.summary(top)
@@ -0,0 +1,318 @@
+"""Incremental parsing and time-ordered merging of Loki stream responses.
+
+Loki answers log queries with one JSON object per stream::
+
+    {"data": {"result": [{"stream": {...labels}, "values": [[ts, line], ...]}, ...]}}
+
+``iter_result_items`` yields the ``result`` elements one by one while the body
+is still being received, so only a single stream is ever decoded at a time.
+``NewestEntries`` merges those streams by timestamp into a bounded min-heap
+holding the newest *limit* entries: each stream's values are already sorted,
+so scanning a stream stops as soon as it reaches entries older than everything
+retained.  Memory stays O(limit) no matter how many streams Loki returns.
+
+``StratifiedSample`` is the alternative for representative rather than newest
+lines: a weighted reservoir (Efraimidis–Spirakis A-Res) of *limit* entries in
+which every stratum – one stream within one time bucket – carries the same
+total weight, so a single noisy stream cannot crowd out the others.  It too
+is filled in one pass with O(limit) memory plus one counter per stratum, and
+reservoirs of different buckets merge exactly.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import math
+import random
+import re
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Tuple
+
+_RESULT_ARRAY_RE = re.compile(r'"result"\s*:\s*\[')
+_STRUCTURAL_RE = re.compile(r'["{}\[\]]')
+_STRING_SPECIAL_RE = re.compile(r'["\\]')
+
+
+class LokiFormatError(ValueError):
+    """Raised when a Loki response does not have the expected shape."""
+
+
+async def iter_result_items(
+    chunks: AsyncIterator[str], key: str = "result"
+) -> AsyncIterator[Any]:
+    """Yield the elements of the ``data.result`` array from streamed text.
+
+    Other responses with one large top-level array (e.g. Tempo's ``traces``)
+    can be consumed the same way by passing its *key*.  Each chunk is scanned
+    once for the end of the current element, which is decoded only when
+    complete, so a single huge stream costs time linear in its size however
+    finely the body is chunked.
+    """
+
+    array_re = (
+        _RESULT_ARRAY_RE
+        if key == "result"
+        else re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    )
+    head = ""  # body received before the array was found
+    found = False
+    parts: List[str] = []  # the element being received, chunk by chunk
+    state = _ScanState()
+    async for chunk in chunks:
+        if not found:
+            head += chunk
+            match = array_re.search(head)
+            if match is None:
+                continue
+            found = True
+            chunk, head = head[match.end() :], ""
+
+        pos = 0
+        while True:
+            if not parts:
+                while pos < len(chunk) and chunk[pos] in " \t\r\n,":
+                    pos += 1
+                if pos >= len(chunk):
+                    break
+                if chunk[pos] == "]":
+                    return
+                if chunk[pos] not in "{[":
+                    raise LokiFormatError("Unexpected Loki response format")
+            start = pos
+            pos = state.scan(chunk, pos)
+            parts.append(chunk[start:pos])
+            if state.depth:
+                break  # element incomplete – wait for more data
+            yield json.loads("".join(parts))
+            parts = []
+
+    raise LokiFormatError("Unexpected Loki response format")
+
+
+class _ScanState:
+    """Where a JSON value being received ends, resumable across chunks."""
+
+    __slots__ = ("depth", "in_string", "escaped")
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def scan(self, text: str, pos: int) -> int:
+        """Advance from *pos*; return the offset just past the value's closing
+        bracket, or ``len(text)`` if the value continues beyond *text*."""
+
+        end = len(text)
+        while pos < end:
+            if self.escaped:
+                self.escaped = False
+                pos += 1
+            elif self.in_string:
+                match = _STRING_SPECIAL_RE.search(text, pos)
+                if match is None:
+                    return end
+                pos = match.end()
+                if match.group() == "\\":
+                    self.escaped = True
+                else:
+                    self.in_string = False
+            else:
+                match = _STRUCTURAL_RE.search(text, pos)
+                if match is None:
+                    return end
+                pos = match.end()
+                char = match.group()
+                if char == '"':
+                    self.in_string = True
+                elif char in "[{":
+                    self.depth += 1
+                else:
+                    self.depth -= 1
+                    if self.depth == 0:
+                        return pos
+        return end
+
+
+def _parse_ts(raw: Any) -> int:
+    try:
+        return int(raw)
+    except (TypeError, ValueError) as exc:
+        raise LokiFormatError(f"Invalid Loki timestamp: {raw!r}") from exc
+
+
+class NewestEntries:
+    """Keep the newest *limit* log entries across any number of streams."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._seq = 0
+        # (timestamp_ns, seq, raw timestamp, labels, line) – seq breaks ties so
+        # label dicts are never compared.
+        self._heap: List[Tuple[int, int, str, Dict[str, str], str]] = []
+
+    def add_stream(self, stream: Any) -> None:
+        if not isinstance(stream, dict):
+            raise LokiFormatError("Unexpected Loki response format")
+        labels = stream.get("stream") or {}
+        values = stream.get("values") or []
+        if self.limit <= 0 or not values:
+            return
+
+        # Loki returns each stream in query direction (newest first by default)
+        # – walk it newest first regardless so we can stop early.
+        ordered: Iterable[Any] = values
+        if len(values) > 1 and _parse_ts(values[0][0]) < _parse_ts(values[-1][0]):
+            ordered = reversed(values)
+
+        heap = self._heap
+        for raw_ts, line in ordered:
+            ts = _parse_ts(raw_ts)
+            if len(heap) >= self.limit:
+                if ts <= heap[0][0]:
+                    break  # the rest of this stream is older still
+                heapq.heapreplace(heap, (ts, self._seq, str(raw_ts), labels, line))
+            else:
+                heapq.heappush(heap, (ts, self._seq, str(raw_ts), labels, line))
+            self._seq += 1
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Return the retained entries in chronological order."""
+
+        return [
+            {"timestamp": raw_ts, "labels": labels, "line": line}
+            for _ts, _seq, raw_ts, labels, line in sorted(self._heap)
+        ]
+
+
+async def newest_entries(
+    chunks: AsyncIterator[str], limit: int
+) -> List[Dict[str, Any]]:
+    """Incrementally merge a streamed Loki response into the newest *limit* entries."""
+
+    merged = NewestEntries(limit)
+    async for stream in iter_result_items(chunks):
+        merged.add_stream(stream)
+    return merged.entries()
+
+
+class StratifiedSample:
+    """Weighted reservoir sample of *limit* entries, stratified by stream and bucket.
+
+    Entries of a stream within time bucket *bucket* get weight ``1 / n`` (``n``
+    = that stratum's line count, known once the stream is decoded), so each
+    stratum is equally likely to be represented and lines within a stratum
+    are sampled uniformly.
+    """
+
+    def __init__(self, limit: int, bucket: int = 0, rng: random.Random | None = None):
+        self.limit = limit
+        self.bucket = bucket
+        self._rng = rng or random.Random()
+        self._seq = 0
+        self.lines = 0
+        # (log A-Res key, seq, timestamp_ns, raw timestamp, labels, stratum,
+        # line) – the smallest key is evicted first; seq breaks ties.
+        self._heap: List[Tuple[float, int, int, str, Dict[str, str], str, str]] = []
+        # stratum -> (labels, bucket, total lines)
+        self._totals: Dict[str, Tuple[Dict[str, str], int, int]] = {}
+
+    def add_stream(
+        self, stream: Any, bucket_of: Callable[[int], int] | None = None
+    ) -> None:
+        """Add one decoded stream.
+
+        *bucket_of* maps a line's timestamp (ns) to its time bucket; without it
+        every line falls into this sample's *bucket*.
+        """
+
+        if not isinstance(stream, dict):
+            raise LokiFormatError("Unexpected Loki response format")
+        labels = stream.get("stream") or {}
+        values = stream.get("values") or []
+        if bucket_of is None:
+            self._add_stratum(labels, self.bucket, values)
+            return
+        groups: Dict[int, List[Any]] = {}
+        for value in values:
+            groups.setdefault(bucket_of(_parse_ts(value[0])), []).append(value)
+        for bucket, group in groups.items():
+            self._add_stratum(labels, bucket, group)
+
+    def _add_stratum(
+        self, labels: Dict[str, str], bucket: int, values: List[Any]
+    ) -> None:
+        if not values:
+            return
+        stratum = f"{bucket}:{json.dumps(labels, sort_keys=True)}"
+        _, _, seen = self._totals.get(stratum, (labels, bucket, 0))
+        self.lines += len(values)
+        weight_inv = seen + len(values)
+        self._totals[stratum] = (labels, bucket, weight_inv)
+        for raw_ts, line in values:
+            # key = u ** (1 / w) with w = 1 / n, compared as n * log(u).
+            key = weight_inv * math.log(self._rng.random() or 5e-324)
+            self._offer(key, _parse_ts(raw_ts), str(raw_ts), labels, stratum, line)
+
+    def merge(self, other: "StratifiedSample") -> None:
+        """Fold in the reservoir of another bucket (keys are comparable)."""
+
+        for key, _seq, ts, raw_ts, labels, stratum, line in other._heap:
+            self._offer(key, ts, raw_ts, labels, stratum, line)
+        self._totals.update(other._totals)
+
+    def _offer(
+        self,
+        key: float,
+        ts: int,
+        raw_ts: str,
+        labels: Dict[str, str],
+        stratum: str,
+        line: str,
+    ) -> None:
+        if self.limit <= 0:
+            return
+        item = (key, self._seq, ts, raw_ts, labels, stratum, line)
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, item)
+        elif key > self._heap[0][0]:
+            heapq.heapreplace(self._heap, item)
+        self._seq += 1
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Return the sampled entries in chronological order."""
+
+        return [
+            {"timestamp": raw_ts, "labels": labels, "line": line}
+            for _key, _seq, _ts, raw_ts, labels, _stratum, line in sorted(
+                self._heap, key=lambda item: (item[2], item[1])
+            )
+        ]
+
+    def strata(self) -> List[Dict[str, Any]]:
+        """Per stratum: labels, bucket, lines seen and lines sampled."""
+
+        sampled: Dict[str, int] = {}
+        for item in self._heap:
+            stratum = item[5]
+            sampled[stratum] = sampled.get(stratum, 0) + 1
+        return [
+            {
+                "labels": labels,
+                "bucket": bucket,
+                "total": total,
+                "sampled": sampled.get(stratum, 0),
+            }
+            for stratum, (labels, bucket, total) in self._totals.items()
+        ]
+
+
+async def stratified_sample(
+    chunks: AsyncIterator[str], limit: int, bucket_of: Callable[[int], int]
+) -> StratifiedSample:
+    """Sample a streamed Loki response, stratified by stream and ``bucket_of(ts)``."""
+
+    sample = StratifiedSample(limit)
+    async for stream in iter_result_items(chunks):
+        sample.add_stream(stream, bucket_of)
+    return sample
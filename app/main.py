@@ -1,9 +1,83 @@
-from fastapi import Depends, FastAPI, status
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
 
-from app.routers import alerts, logs, metrics, traces
+from fastapi import Depends, FastAPI, Request, Response, status
+
+from app.cache import close_query_cache, track_stale_results, warm_query_cache
+from app.clients import close_http_clients, open_http_clients
+from app.config import get_settings
+from app.deadline import RequestDeadlineMiddleware
+from app.error_index import start_error_indexer
+from app.routers import alerts, batch, incident, logs, metrics, traces
+from app.routers.alerts import _fetch_active_alerts  # noqa: F401
+from app.routers.batch import _run_batch  # noqa: F401
+from app.routers.incident import _fetch_incident  # noqa: F401
+from app.routers.logs import (  # noqa: F401
+    _fetch_error_logs,
+    _fetch_log_patterns,
+    _fetch_log_rate,
+    _fetch_log_volume,
+    _fetch_new_errors,
+    _search_logs,
+)
+from app.routers.metrics import (  # noqa: F401  (re-exported for app.mcp_server)
+    _execute_promql,
+    _execute_promql_range,
+    _fetch_latency_percentile,
+)
+from app.routers.traces import (  # noqa: F401
+    _fetch_trace_batch,
+    _fetch_trace_json,
+    _fetch_trace_logs,
+    _fetch_trace_summary,
+    _search_traces,
+)
 from app.security import verify_bearer_token
 
-app = FastAPI(title="MCP Observability API")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Keep one pooled HTTP client per backend open for the app's lifetime.
+
+    The result cache is warm-loaded from its disk tier (when configured) before
+    serving so restarts do not stampede the backends, and the error
+    fingerprint index is fed in the background.
+    """
+
+    settings = get_settings()
+    open_http_clients(settings)
+    await warm_query_cache(settings)
+    indexer = start_error_indexer(settings)
+    try:
+        yield
+    finally:
+        if indexer is not None:
+            indexer.cancel()
+            await asyncio.gather(indexer, return_exceptions=True)
+        await close_http_clients()
+        close_query_cache()
+
+
+app = FastAPI(title="MCP Observability API", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def flag_stale_results(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """Mark responses built from last-known-good data (backend circuit open)."""
+
+    stale = track_stale_results()
+    response = await call_next(request)
+    if stale[0]:
+        response.headers["Warning"] = '110 - "Response is Stale"'
+    return response
+
+
+# Outermost: sets the request deadline and cancels work for clients that left.
+app.add_middleware(RequestDeadlineMiddleware)
+
 
 from app.initialize import router as initialize_router  # noqa: E402
 from app.manifest import router as manifest_router  # noqa: E402
@@ -24,6 +98,8 @@ app.include_router(alerts.router)
 app.include_router(logs.router)
 app.include_router(metrics.router)
 app.include_router(traces.router)
+app.include_router(batch.router)
+app.include_router(incident.router)
 
 # ---------------------------------------------------------------------
 # Observability – tracing & metrics via OpenTelemetry
@@ -1,7 +1,11 @@
-from typing import Any, List
+import re
+from typing import Any, List, Sequence
 
 from mcp.server.fastmcp import FastMCP
+from mcp.types import Content
 
+from app.clients import TRACE_ID_PATTERN
+from app.deadline import META_TIMEOUT_KEY, request_deadline, resolve_timeout
 from app.main import _fetch_error_logs  # type: ignore[attr-defined]
 from app.main import (
     _fetch_latency_percentile,
@@ -10,7 +14,29 @@ from app.main import (
     _search_logs,
 )
 
-mcp = FastMCP("mcp-observability-server")
+
+class ObservabilityMCP(FastMCP):
+    """FastMCP server honouring a per-call deadline in ``_meta.timeout``."""
+
+    async def call_tool(
+        self, name: str, arguments: dict[str, Any]
+    ) -> Sequence[Content]:
+        try:
+            meta = self._mcp_server.request_context.meta
+        except LookupError:
+            meta = None
+        timeout = resolve_timeout(getattr(meta, META_TIMEOUT_KEY, None))
+        with request_deadline(timeout):
+            return await super().call_tool(name, arguments)
+
+
+mcp = ObservabilityMCP("mcp-observability-server")
+
+
+def _check_trace_ids(*trace_ids: str) -> None:
+    for trace_id in trace_ids:
+        if not re.fullmatch(TRACE_ID_PATTERN, trace_id):
+            raise ValueError(f"Invalid trace ID: {trace_id[:64]!r}")
 
 
 @mcp.tool(description="Return simple health status")
@@ -27,6 +53,7 @@ async def error_logs(
     limit: int = 100,
     service: str | None = None,
     range: str | None = None,
+    sample: str = "newest",
 ) -> List[str]:  # type: ignore[override]
     """Return the last *limit* error log lines from Loki.
 
@@ -34,10 +61,14 @@ async def error_logs(
         limit: Number of lines to return (1-1000).
         service: Optional service filter.
         range: Optional time range filter.
+        sample: ``newest`` or ``stratified`` (representative lines across
+            streams and time buckets).
     """
 
+    if sample not in ("newest", "stratified"):
+        raise ValueError("sample must be 'newest' or 'stratified'")
     # Clamp limit to allowed bounds in helper
-    return await _fetch_error_logs(limit, service, range)
+    return await _fetch_error_logs(limit, service, range, sample)
 
 
 @mcp.tool(description="Query Prometheus latency percentile over window")
@@ -59,11 +90,44 @@ async def latency_percentile(
 
 @mcp.tool(description="Return raw trace JSON for given trace_id")
 async def trace_json_tool(trace_id: str) -> Any:  # type: ignore[override]
+    _check_trace_ids(trace_id)
     return await _fetch_trace_json(trace_id)
 
 
+@mcp.tool(
+    description="Summarise a trace: critical path, self time per service, slowest spans"
+)
+async def trace_summary_tool(trace_id: str, top: int = 10) -> Any:  # type: ignore[override]
+    from app.main import _fetch_trace_summary  # type: ignore[attr-defined]
+
+    _check_trace_ids(trace_id)
+    return await _fetch_trace_summary(trace_id, top)
+
+
+@mcp.tool(
+    description="Summarise up to 100 traces concurrently; failures are reported per trace"
+)
+async def trace_batch_tool(trace_ids: List[str], top: int = 5) -> list[Any]:  # type: ignore[override]
+    from app.main import _fetch_trace_batch  # type: ignore[attr-defined]
+
+    _check_trace_ids(*trace_ids)
+    return await _fetch_trace_batch(trace_ids[:100], top)
+
+
+@mcp.tool(
+    description="Search traces with TraceQL over the last range; pass next_cursor to page"
+)
+async def trace_search_tool(query: str, range: str = "15m", limit: int = 20, spans_per_trace: int = 3, cursor: str | None = None) -> Any:  # type: ignore[override]
+    from app.main import _search_traces  # type: ignore[attr-defined]
+
+    return await _search_traces(
+        query, range, min(limit, 100), min(spans_per_trace, 50), cursor
+    )
+
+
 @mcp.tool(description="Return log lines correlated with trace_id")
 async def trace_logs_tool(trace_id: str, limit: int = 100) -> list[str]:  # type: ignore[override]
+    _check_trace_ids(trace_id)
     return await _fetch_trace_logs(trace_id, limit)
 
 
@@ -75,6 +139,50 @@ async def logs_search_tool(query: str, service: str | None = None, range: str |
     return await _search_logs(query, service, range)
 
 
+@mcp.tool(
+    description="Mine error logs (or logs matching query) into message templates with counts, first/last seen and a sample line"
+)
+async def log_patterns_tool(service: str | None = None, range: str = "1h", query: str | None = None, limit: int = 5000, top: int = 50) -> Any:  # type: ignore[override]
+    from app.main import _fetch_log_patterns  # type: ignore[attr-defined]
+
+    return await _fetch_log_patterns(
+        service, range, query, max(1, min(limit, 50_000)), max(1, min(top, 1000))
+    )
+
+
+@mcp.tool(
+    description="Errors first seen within the last `since` (fingerprint, template, first/last seen, counts), from the error index"
+)
+async def new_errors_tool(service: str | None = None, since: str = "15m", limit: int = 50) -> Any:  # type: ignore[override]
+    from app.main import _fetch_new_errors  # type: ignore[attr-defined]
+
+    return await _fetch_new_errors(service, since, max(1, min(limit, 1000)))
+
+
+@mcp.tool(
+    description="Error line counts per service over `range` (or per `step` as a series), counted by Loki instead of pulling lines"
+)
+async def log_rate_tool(service: str | None = None, range: str = "1h", step: str | None = None, query: str | None = None, top: int = 10) -> Any:  # type: ignore[override]
+    from app.main import _fetch_log_rate  # type: ignore[attr-defined]
+
+    return await _fetch_log_rate(service, range, step, query, max(1, min(top, 100)))
+
+
+@mcp.tool(
+    description="Log volume (lines or bytes) of the top values of label `by` over `range` (or per `step`), aggregated by Loki"
+)
+async def log_volume_tool(by: str = "service", range: str = "1h", step: str | None = None, service: str | None = None, top: int = 10, unit: str = "lines") -> Any:  # type: ignore[override]
+    from app.main import _fetch_log_volume  # type: ignore[attr-defined]
+
+    if not re.fullmatch(r"[a-zA-Z_][a-zA-Z0-9_]*", by):
+        raise ValueError(f"Invalid label name: {by!r}")
+    if unit not in ("lines", "bytes"):
+        raise ValueError("unit must be 'lines' or 'bytes'")
+    return await _fetch_log_volume(
+        by, range, step, service, max(1, min(top, 100)), unit
+    )
+
+
 # Metrics query tool --------------------------------------------------------
 
 
@@ -85,6 +193,39 @@ async def metrics_query(query: str) -> Any:  # type: ignore[override]
     return await _execute_promql(query)
 
 
+@mcp.tool(
+    description="Execute PromQL range query over the last `range` at `step` resolution"
+)
+async def metrics_query_range(query: str, range: str = "1h", step: str = "1m") -> Any:  # type: ignore[override]
+    from app.main import _execute_promql_range  # type: ignore[attr-defined]
+
+    return await _execute_promql_range(query, range, step)
+
+
+# Incident tool ------------------------------------------------------------
+
+
+@mcp.tool(
+    description="Incident bundle for a service: error logs, latency series, alerts, exemplar traces and summaries"
+)
+async def incident_tool(service: str, range: str = "15m", end: float | None = None, percentile: float = 0.95) -> Any:  # type: ignore[override]
+    from app.main import _fetch_incident  # type: ignore[attr-defined]
+
+    return await _fetch_incident(service, range, end, percentile)
+
+
+# Batch tool ---------------------------------------------------------------
+
+
+@mcp.tool(
+    description="Run up to 20 tool calls concurrently: [{tool, arguments}] -> ordered results with per-call errors and timings"
+)
+async def batch_tool(calls: List[dict[str, Any]]) -> Any:  # type: ignore[override]
+    from app.main import _run_batch  # type: ignore[attr-defined]
+
+    return await _run_batch(calls)
+
+
 # Alerts tool --------------------------------------------------------------
 
 
@@ -0,0 +1,83 @@
+"""Query-frontend style helpers for Prometheus range queries.
+
+Range queries are aligned to their step and split into absolute hour- or
+day-sized chunks.  Because chunk boundaries do not depend on the caller's
+window, a chunk that lies entirely in the past is immutable and can be cached
+and reused by every later query with the same expression and step; repeated
+dashboard-style queries then only need to fetch the still-open chunk.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Tuple
+
+HOUR = 3600.0
+DAY = 86400.0
+
+
+def align_range(start: float, end: float, step: float) -> Tuple[float, float]:
+    """Align *start* and *end* down to multiples of *step*."""
+
+    return math.floor(start / step) * step, math.floor(end / step) * step
+
+
+def chunk_interval(start: float, end: float, step: float) -> float:
+    """Return the chunk size: hours for ranges up to a day, days beyond that.
+
+    The size is rounded up to a multiple of *step* so every chunk starts on a
+    step boundary.
+    """
+
+    base = HOUR if end - start <= DAY else DAY
+    return math.ceil(base / step) * step
+
+
+def split_chunks(
+    start: float, end: float, interval: float
+) -> List[Tuple[float, float]]:
+    """Split ``[start, end]`` into ``[lo, hi)`` chunks aligned to *interval*."""
+
+    chunks: List[Tuple[float, float]] = []
+    lo = math.floor(start / interval) * interval
+    while lo <= end:
+        chunks.append((lo, lo + interval))
+        lo += interval
+    return chunks
+
+
+def _series_key(metric: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted(metric.items()))
+
+
+def merge_matrices(parts: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Concatenate matrix results of consecutive chunks series by series."""
+
+    merged: Dict[Tuple[Tuple[str, str], ...], Dict[str, Any]] = {}
+    for part in parts:
+        for series in part:
+            metric = series.get("metric", {})
+            entry = merged.setdefault(
+                _series_key(metric), {"metric": metric, "values": []}
+            )
+            entry["values"].extend(series.get("values", []))
+    return list(merged.values())
+
+
+def trim_matrix(
+    matrix: List[Dict[str, Any]], start: float, end: float
+) -> List[Dict[str, Any]]:
+    """Drop samples outside ``[start, end]`` and series left without samples."""
+
+    trimmed: List[Dict[str, Any]] = []
+    for series in matrix:
+        values = [v for v in series["values"] if start <= float(v[0]) <= end]
+        if values:
+            trimmed.append({"metric": series["metric"], "values": values})
+    return trimmed
+
+
+def format_ts(value: float) -> str:
+    """Render a unix timestamp the way Prometheus accepts it (no exponent)."""
+
+    return f"{value:.3f}".rstrip("0").rstrip(".")
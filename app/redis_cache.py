@@ -0,0 +1,207 @@
+"""Shared cross-replica cache tier speaking the Redis protocol (RESP2).
+
+Replicas of the MCP server behind a load balancer share query results and
+single-flight locks through any Redis-compatible server.  The client is a
+deliberately small RESP implementation (GET/SET/EVAL/EXISTS) so no extra
+dependency is needed; a local stand-in is enough for tests.
+
+A lock holds a random token and is released with a compare-and-delete
+script, so a leader whose lock already expired cannot release the lock a
+later leader has taken since.
+
+The shared tier is an optimisation only: when Redis is slow or unreachable,
+lookups behave like misses and locks are treated as acquired, and the server
+is left alone for a short cool-down before it is tried again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import secrets
+import time
+from logging import getLogger
+from typing import Any, List, Tuple
+from urllib.parse import urlparse
+
+from app.cache import SharedBackend
+
+logger = getLogger(__name__)
+
+# How long an unreachable Redis is skipped before reconnecting.
+_COOLDOWN_SECONDS = 5.0
+
+# Deletes the lock only while it still holds the caller's token.
+_RELEASE_SCRIPT = (
+    'if redis.call("GET", KEYS[1]) == ARGV[1] then '
+    'return redis.call("DEL", KEYS[1]) else return 0 end'
+)
+
+
+class RespError(Exception):
+    """Error reply (``-ERR ...``) returned by the server."""
+
+
+def _encode(args: Tuple[Any, ...]) -> bytes:
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+    return b"".join(parts)
+
+
+async def _read_reply(reader: asyncio.StreamReader) -> Any:
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Redis closed the connection")
+    prefix, rest = line[:1], line[1:-2]
+    if prefix == b"+":
+        return rest.decode()
+    if prefix == b"-":
+        raise RespError(rest.decode())
+    if prefix == b":":
+        return int(rest)
+    if prefix == b"$":
+        size = int(rest)
+        if size < 0:
+            return None
+        return (await reader.readexactly(size + 2))[:-2]
+    if prefix == b"*":
+        count = int(rest)
+        if count < 0:
+            return None
+        return [await _read_reply(reader) for _ in range(count)]
+    raise ConnectionError(f"Unexpected Redis reply: {line!r}")
+
+
+class RespClient:
+    """Minimal pooled Redis client for ``redis://[:password@]host[:port][/db]``."""
+
+    def __init__(self, url: str, timeout: float = 0.25, pool_size: int = 4):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._down_until = 0.0
+
+    async def execute(self, *args: Any) -> Any:
+        if time.monotonic() < self._down_until:
+            raise ConnectionError("Redis marked unavailable")
+        conn = self._idle.pop() if self._idle else None
+        try:
+            if conn is None:
+                conn = await asyncio.wait_for(self._connect(), self.timeout)
+            reply = await asyncio.wait_for(self._roundtrip(conn, args), self.timeout)
+        except RespError:
+            self._release(conn)
+            raise
+        except (OSError, asyncio.TimeoutError) as exc:
+            self._discard(conn)
+            if self._down_until < time.monotonic():
+                logger.warning("Shared cache unavailable, skipping it: %s", exc)
+            self._down_until = time.monotonic() + _COOLDOWN_SECONDS
+            raise ConnectionError(str(exc)) from exc
+        except BaseException:
+            # Cancelled mid-reply: the connection state is unknown.
+            self._discard(conn)
+            raise
+        self._release(conn)
+        return reply
+
+    def close(self) -> None:
+        while self._idle:
+            _reader, writer = self._idle.pop()
+            try:
+                writer.close()
+            except RuntimeError:  # event loop already closed
+                pass
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        conn = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._roundtrip(conn, ("AUTH", self.password))
+        if self.db:
+            await self._roundtrip(conn, ("SELECT", self.db))
+        return conn
+
+    @staticmethod
+    async def _roundtrip(
+        conn: Tuple[asyncio.StreamReader, asyncio.StreamWriter], args: Tuple[Any, ...]
+    ) -> Any:
+        reader, writer = conn
+        writer.write(_encode(args))
+        await writer.drain()
+        return await _read_reply(reader)
+
+    def _release(
+        self, conn: Tuple[asyncio.StreamReader, asyncio.StreamWriter] | None
+    ) -> None:
+        if conn is None:
+            return
+        if len(self._idle) < self.pool_size:
+            self._idle.append(conn)
+        else:
+            conn[1].close()
+
+    @staticmethod
+    def _discard(
+        conn: Tuple[asyncio.StreamReader, asyncio.StreamWriter] | None
+    ) -> None:
+        if conn is not None:
+            conn[1].close()
+
+
+class RedisBackend(SharedBackend):
+    """Shared cache backend plus the lock primitives used for single-flight."""
+
+    def __init__(self, url: str, prefix: str = "mcp-obs:", timeout: float = 0.25):
+        self.client = RespClient(url, timeout=timeout)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> bytes | None:
+        try:
+            return await self.client.execute("GET", self.prefix + key)
+        except (ConnectionError, RespError):
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        try:
+            await self.client.execute(
+                "SET", self.prefix + key, value, "PX", max(int(ttl * 1000), 1)
+            )
+        except (ConnectionError, RespError):
+            pass
+
+    async def acquire(self, key: str, ttl: float) -> str | None:
+        """Try to take the lock *key*; a token also when Redis is unavailable."""
+
+        token = secrets.token_hex(16)
+        try:
+            reply = await self.client.execute(
+                "SET", self.prefix + key, token, "NX", "PX", max(int(ttl * 1000), 1)
+            )
+        except (ConnectionError, RespError):
+            return token
+        return token if reply == "OK" else None
+
+    async def release(self, key: str, token: str) -> None:
+        try:
+            await self.client.execute(
+                "EVAL", _RELEASE_SCRIPT, 1, self.prefix + key, token
+            )
+        except (ConnectionError, RespError):
+            pass
+
+    async def locked(self, key: str) -> bool:
+        try:
+            return await self.client.execute("EXISTS", self.prefix + key) == 1
+        except (ConnectionError, RespError):
+            return False
+
+    def close(self) -> None:
+        self.client.close()
@@ -0,0 +1,188 @@
+"""Retries of idempotent backend reads.
+
+All backend calls made by the clients are reads (GET), so a transient failure
+– a connection error, a timeout or a 429/502/503/504 answer – is retried here
+rather than surfacing as 502 and making the agent repeat the whole tool call.
+
+* Delays grow exponentially from ``RETRY_BASE_DELAY`` with *full jitter*
+  (uniform in ``[0, backoff]``) so clients that failed together do not retry
+  together; a backend's ``Retry-After`` is honoured as the minimum delay, and
+  a retry that would not fit into ``RETRY_MAX_DELAY`` or the request's
+  remaining deadline is not attempted.
+* A token bucket caps retries at ``RETRY_BUDGET`` of all calls: every call
+  earns that many tokens (up to a small burst) and every retry spends one,
+  so during an outage retries cannot multiply the load on the backend.
+
+Open circuit breakers, bulkhead rejections and expired deadlines are never
+retried – they are local decisions, not transient backend failures.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import math
+import random
+import time
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+import httpx
+from fastapi import HTTPException, status
+from opentelemetry import metrics
+
+from app.config import Settings, get_settings
+from app.deadline import expired, remaining
+
+_meter = metrics.get_meter(__name__)
+_retry_counter = _meter.create_counter(
+    "mcp.retry.attempts",
+    description="Backend read retries by backend and outcome (retried/exhausted/over_budget)",
+)
+
+T = TypeVar("T")
+
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+_BURST = 10.0
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a ``Retry-After`` header (delta or HTTP date)."""
+
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+class UpstreamError(HTTPException):
+    """A backend answered with an unexpected status; reported to callers as 502."""
+
+    def __init__(self, backend: str, response: httpx.Response):
+        self.upstream_status = response.status_code
+        self.retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        headers = None
+        if self.retry_after is not None:
+            headers = {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+        super().__init__(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"{backend} returned {response.status_code}",
+            headers=headers,
+        )
+
+
+def _retryable(exc: BaseException) -> bool:
+    if isinstance(exc, UpstreamError):
+        return exc.upstream_status in RETRY_STATUSES
+    if isinstance(exc, httpx.TimeoutException):
+        return not expired()
+    return isinstance(exc, (httpx.NetworkError, httpx.RemoteProtocolError))
+
+
+class RetryPolicy:
+    """Per-backend retry schedule and retry budget."""
+
+    def __init__(
+        self,
+        backend: str,
+        max_attempts: int = 3,
+        base_delay: float = 0.1,
+        max_delay: float = 2.0,
+        budget: float = 0.1,
+    ):
+        self.backend = backend
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.tokens = _BURST
+        self.stats: Dict[str, int] = {"retried": 0, "exhausted": 0, "over_budget": 0}
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Await ``call()``, retrying transient failures within the budget."""
+
+        self.tokens = min(_BURST, self.tokens + self.budget)
+        attempt = 1
+        while True:
+            try:
+                return await call()
+            except Exception as exc:
+                delay = self._next_delay(exc, attempt)
+                if delay is None:
+                    raise
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _next_delay(self, exc: Exception, attempt: int) -> float | None:
+        """Delay before the next attempt, or ``None`` to give up."""
+
+        if not _retryable(exc):
+            return None
+        if attempt >= self.max_attempts:
+            self._count("exhausted")
+            return None
+        cap = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = random.uniform(0, cap)
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        left = remaining()
+        if delay > self.max_delay or (left is not None and delay >= left):
+            self._count("exhausted")
+            return None
+        if self.tokens < 1:
+            self._count("over_budget")
+            return None
+        self.tokens -= 1
+        self._count("retried")
+        return delay
+
+    def _count(self, outcome: str) -> None:
+        self.stats[outcome] += 1
+        _retry_counter.add(1, {"backend": self.backend, "outcome": outcome})
+
+
+_policies: Dict[str, Tuple[Tuple[int, float, float, float], RetryPolicy]] = {}
+
+
+def get_retry_policy(
+    backend: str, settings: Settings | None = None
+) -> RetryPolicy | None:
+    """Return the shared `RetryPolicy` for *backend*, or ``None`` if disabled."""
+
+    settings = settings or get_settings()
+    if not settings.RETRY_ENABLED or settings.RETRY_MAX_ATTEMPTS <= 1:
+        return None
+    config = (
+        settings.RETRY_MAX_ATTEMPTS,
+        settings.RETRY_BASE_DELAY,
+        settings.RETRY_MAX_DELAY,
+        settings.RETRY_BUDGET,
+    )
+    entry = _policies.get(backend)
+    if entry is None or entry[0] != config:
+        entry = (config, RetryPolicy(backend, *config))
+        _policies[backend] = entry
+    return entry[1]
+
+
+def reset_retry_policies() -> None:
+    """Forget retry budgets (used by tests)."""
+
+    _policies.clear()
+
+
+async def with_retries(
+    policy: RetryPolicy | None, call: Callable[[], Awaitable[T]]
+) -> T:
+    """``policy.run(call)``, or a single attempt when retries are disabled."""
+
+    if policy is None:
+        return await call()
+    return await policy.run(call)
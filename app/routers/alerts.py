@@ -25,3 +25,17 @@ async def get_alerts(
 
     active_alerts = await client.fetch_active_alerts(severity, service)
     return {"alerts": active_alerts}
+
+
+# ---------------------------------------------------------------------------
+# Internal helper wrappers used by the MCP tools -----------------------------
+# ---------------------------------------------------------------------------
+
+
+async def _fetch_active_alerts(
+    severity: str | None = None, service: str | None = None
+) -> list[dict[str, Any]]:
+    """Wrapper so MCP tools can call `AlertManagerClient.fetch_active_alerts`."""
+
+    client = AlertManagerClient()
+    return await client.fetch_active_alerts(severity, service)
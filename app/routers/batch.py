@@ -0,0 +1,291 @@
+import asyncio
+import time
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, Type
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, Field, ValidationError
+
+from app.clients import TRACE_ID_PATTERN
+from app.routers.alerts import _fetch_active_alerts
+from app.routers.incident import _fetch_incident
+from app.routers.logs import (
+    _fetch_error_logs,
+    _fetch_log_patterns,
+    _fetch_log_rate,
+    _fetch_log_volume,
+    _fetch_new_errors,
+    _search_logs,
+)
+from app.routers.metrics import (
+    _execute_promql,
+    _execute_promql_range,
+    _fetch_latency_percentile,
+)
+from app.routers.traces import (
+    TraceBatchRequest,
+    _fetch_trace_batch,
+    _fetch_trace_json,
+    _fetch_trace_logs,
+    _fetch_trace_summary,
+    _search_traces,
+)
+from app.security import verify_bearer_token
+
+logger = getLogger(__name__)
+
+MAX_BATCH_CALLS = 20
+
+_SERVICE = r"^[a-zA-Z0-9_-]+$"
+_RANGE = r"^\d+[smhd]$"
+_STEP = r"^\d+[smh]$"
+
+router = APIRouter(
+    prefix="/batch",
+    tags=["batch"],
+    dependencies=[Depends(verify_bearer_token)],
+)
+
+
+# Tool arguments – same names and bounds as the MCP tools / REST endpoints.
+
+
+class ErrorLogsArgs(BaseModel):
+    limit: int = Field(100, ge=1, le=1000)
+    service: str | None = Field(None, pattern=_SERVICE)
+    range: str | None = Field(None, pattern=_RANGE)
+    sample: str = Field("newest", pattern=r"^(newest|stratified)$")
+
+
+class LogsSearchArgs(BaseModel):
+    query: str
+    service: str | None = Field(None, pattern=_SERVICE)
+    range: str | None = Field("1h", pattern=_RANGE)
+
+
+class LogPatternsArgs(BaseModel):
+    service: str | None = Field(None, pattern=_SERVICE)
+    range: str = Field("1h", pattern=_RANGE)
+    query: str | None = Field(None, min_length=1)
+    limit: int = Field(5000, ge=1, le=50_000)
+    top: int = Field(50, ge=1, le=1000)
+
+
+class NewErrorsArgs(BaseModel):
+    service: str | None = Field(None, pattern=_SERVICE)
+    since: str = Field("15m", pattern=_RANGE)
+    limit: int = Field(50, ge=1, le=1000)
+
+
+class LogRateArgs(BaseModel):
+    service: str | None = Field(None, pattern=_SERVICE)
+    range: str = Field("1h", pattern=_RANGE)
+    step: str | None = Field(None, pattern=_STEP)
+    query: str | None = Field(None, min_length=1)
+    top: int = Field(10, ge=1, le=100)
+
+
+class LogVolumeArgs(BaseModel):
+    by: str = Field("service", pattern=r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+    range: str = Field("1h", pattern=_RANGE)
+    step: str | None = Field(None, pattern=_STEP)
+    service: str | None = Field(None, pattern=_SERVICE)
+    top: int = Field(10, ge=1, le=100)
+    unit: str = Field("lines", pattern=r"^(lines|bytes)$")
+
+
+class LatencyArgs(BaseModel):
+    percentile: float = Field(0.95, gt=0.0, lt=1.0)
+    window: str = Field("5m", pattern=_RANGE)
+    service: str | None = Field(None, pattern=_SERVICE)
+
+
+class MetricsQueryArgs(BaseModel):
+    query: str
+
+
+class MetricsRangeArgs(BaseModel):
+    query: str
+    range: str = Field("1h", pattern=r"^\d+[smhdw]$")
+    step: str = Field("1m", pattern=_STEP)
+
+
+class AlertsArgs(BaseModel):
+    severity: str | None = Field(None, pattern=_SERVICE)
+    service: str | None = Field(None, pattern=_SERVICE)
+
+
+class TraceArgs(BaseModel):
+    trace_id: str = Field(pattern=TRACE_ID_PATTERN)
+
+
+class TraceSummaryArgs(TraceArgs):
+    top: int = Field(10, ge=1, le=100)
+
+
+class TraceLogsArgs(TraceArgs):
+    limit: int = Field(100, ge=1, le=1000)
+
+
+class TraceSearchArgs(BaseModel):
+    query: str = Field(min_length=1)
+    range: str = Field("15m", pattern=_RANGE)
+    limit: int = Field(20, ge=1, le=100)
+    spans_per_trace: int = Field(3, ge=0, le=50)
+    cursor: str | None = None
+
+
+class IncidentArgs(BaseModel):
+    service: str = Field(pattern=_SERVICE)
+    range: str = Field("15m", pattern=_RANGE)
+    end: float | None = None
+    percentile: float = Field(0.95, gt=0.0, lt=1.0)
+
+
+ToolEntry = Tuple[Type[BaseModel], Callable[[Any], Awaitable[Any]]]
+
+TOOLS: Dict[str, ToolEntry] = {
+    "error_logs": (
+        ErrorLogsArgs,
+        lambda a: _fetch_error_logs(a.limit, a.service, a.range, a.sample),
+    ),
+    "logs_search": (
+        LogsSearchArgs,
+        lambda a: _search_logs(a.query, a.service, a.range),
+    ),
+    "log_patterns": (
+        LogPatternsArgs,
+        lambda a: _fetch_log_patterns(a.service, a.range, a.query, a.limit, a.top),
+    ),
+    "new_errors": (
+        NewErrorsArgs,
+        lambda a: _fetch_new_errors(a.service, a.since, a.limit),
+    ),
+    "log_rate": (
+        LogRateArgs,
+        lambda a: _fetch_log_rate(a.service, a.range, a.step, a.query, a.top),
+    ),
+    "log_volume": (
+        LogVolumeArgs,
+        lambda a: _fetch_log_volume(a.by, a.range, a.step, a.service, a.top, a.unit),
+    ),
+    "latency_percentile": (
+        LatencyArgs,
+        lambda a: _fetch_latency_percentile(a.percentile, a.window, a.service),
+    ),
+    "metrics_query": (MetricsQueryArgs, lambda a: _execute_promql(a.query)),
+    "metrics_query_range": (
+        MetricsRangeArgs,
+        lambda a: _execute_promql_range(a.query, a.range, a.step),
+    ),
+    "alerts": (AlertsArgs, lambda a: _fetch_active_alerts(a.severity, a.service)),
+    "trace_json": (TraceArgs, lambda a: _fetch_trace_json(a.trace_id)),
+    "trace_summary": (
+        TraceSummaryArgs,
+        lambda a: _fetch_trace_summary(a.trace_id, a.top),
+    ),
+    "trace_logs": (TraceLogsArgs, lambda a: _fetch_trace_logs(a.trace_id, a.limit)),
+    "trace_search": (
+        TraceSearchArgs,
+        lambda a: _search_traces(
+            a.query, a.range, a.limit, a.spans_per_trace, a.cursor
+        ),
+    ),
+    "trace_batch": (
+        TraceBatchRequest,
+        lambda a: _fetch_trace_batch(a.trace_ids, a.top),
+    ),
+    "incident": (
+        IncidentArgs,
+        lambda a: _fetch_incident(a.service, a.range, a.end, a.percentile),
+    ),
+}
+
+
+class BatchCall(BaseModel):
+    tool: str
+    arguments: Dict[str, Any] = Field(default_factory=dict)
+
+
+class BatchRequest(BaseModel):
+    calls: List[BatchCall] = Field(min_length=1, max_length=MAX_BATCH_CALLS)
+
+
+async def _run_call(call: BatchCall) -> Dict[str, Any]:
+    """Run one invocation; failures become an error entry, never an exception."""
+
+    started = time.monotonic()
+    outcome: Dict[str, Any] = {"tool": call.tool}
+    # MCP tool names (``alerts_tool``) are accepted as well.
+    entry = TOOLS.get(call.tool) or TOOLS.get(call.tool.removesuffix("_tool"))
+    try:
+        if entry is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown tool {call.tool!r}; expected one of {sorted(TOOLS)}",
+            )
+        model, run = entry
+        result = await run(model.model_validate(call.arguments))
+        outcome.update(ok=True, result=result)
+    except ValidationError as exc:
+        outcome.update(
+            ok=False,
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            error=exc.errors(include_url=False, include_context=False),
+        )
+    except HTTPException as exc:
+        outcome.update(ok=False, status=exc.status_code, error=exc.detail)
+    except Exception as exc:
+        logger.exception("Batch call %s failed", call.tool)
+        outcome.update(
+            ok=False,
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error=f"{type(exc).__name__}: {exc}",
+        )
+    outcome["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+    return outcome
+
+
+async def _execute_batch(calls: List[BatchCall]) -> Dict[str, Any]:
+    started = time.monotonic()
+    results = await asyncio.gather(*(_run_call(call) for call in calls))
+    return {
+        "results": list(results),
+        "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+    }
+
+
+@router.post(
+    "",
+    status_code=status.HTTP_200_OK,
+)
+async def batch(request: BatchRequest) -> Dict[str, Any]:
+    """Run several tool invocations concurrently in one round trip.
+
+    Results are returned in request order, each with ``ok``, the tool's
+    ``result`` or its ``status``/``error``, and ``elapsed_ms``; one failing
+    call never fails the batch.
+
+    Example body: ``{"calls": [{"tool": "alerts"}, {"tool": "error_logs",
+    "arguments": {"service": "checkout", "limit": 20}}]}``
+    """
+
+    return await _execute_batch(request.calls)
+
+
+# ---------------------------------------------------------------------------
+# Internal helper wrappers used by the MCP tools -----------------------------
+# ---------------------------------------------------------------------------
+
+
+async def _run_batch(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Wrapper so the MCP ``batch`` tool can run invocations given as dicts."""
+
+    try:
+        request = BatchRequest.model_validate({"calls": calls})
+    except ValidationError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=exc.errors(include_url=False, include_context=False),
+        ) from exc
+    return await _execute_batch(request.calls)
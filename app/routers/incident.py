@@ -0,0 +1,88 @@
+import time
+from typing import Any
+
+from fastapi import APIRouter, Depends, Query, status
+
+from app.clients import AlertManagerClient, LokiClient, PrometheusClient, TempoClient
+from app.config import Settings, get_settings
+from app.incident import build_incident
+from app.security import verify_bearer_token
+from app.timeutil import parse_duration
+
+router = APIRouter(
+    prefix="/incident",
+    tags=["incident"],
+    dependencies=[Depends(verify_bearer_token)],
+)
+
+
+@router.get(
+    "",
+    status_code=status.HTTP_200_OK,
+)
+async def incident(
+    service: str = Query(..., pattern=r"^[a-zA-Z0-9_-]+$"),
+    range: str = Query("15m", pattern=r"^\d+[smhd]$"),
+    end: float | None = Query(None, description="Unix seconds, defaults to now"),
+    percentile: float = Query(0.95, gt=0.0, lt=1.0),
+    slow: str = Query("1s", pattern=r"^\d+(ms|s|m)$"),
+    loki: LokiClient = Depends(LokiClient),
+    prometheus: PrometheusClient = Depends(PrometheusClient),
+    tempo: TempoClient = Depends(TempoClient),
+    alertmanager: AlertManagerClient = Depends(AlertManagerClient),
+    settings: Settings = Depends(get_settings),
+) -> dict[str, Any]:
+    """Gather error logs, latency, alerts and exemplar traces for *service*.
+
+    All backends are queried concurrently for the *range* ending at *end*.
+    Every section reports ``status`` (``ok``/``error``/``timeout``) and
+    ``elapsed_ms``; sections cut off by ``INCIDENT_TIMEOUT`` keep their partial
+    results, and lists are trimmed (``truncated``) to ``INCIDENT_MAX_BYTES``.
+    Exemplar traces are errors or spans slower than *slow*.
+
+    Example: `/incident?service=checkout&range=30m&end=1718011980`
+    """
+
+    end_s = time.time() if end is None else end
+    return await build_incident(
+        loki,
+        prometheus,
+        tempo,
+        alertmanager,
+        service,
+        end_s - parse_duration(range),
+        end_s,
+        percentile=percentile,
+        slow=slow,
+        timeout=settings.INCIDENT_TIMEOUT,
+        max_bytes=settings.INCIDENT_MAX_BYTES,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Internal helper wrappers used by the MCP tools -----------------------------
+# ---------------------------------------------------------------------------
+
+
+async def _fetch_incident(
+    service: str,
+    time_range: str = "15m",
+    end: float | None = None,
+    percentile: float = 0.95,
+) -> dict[str, Any]:
+    """Wrapper so MCP tools can build an incident bundle."""
+
+    settings = get_settings()
+    end_s = time.time() if end is None else end
+    return await build_incident(
+        LokiClient(),
+        PrometheusClient(),
+        TempoClient(),
+        AlertManagerClient(),
+        service,
+        end_s - parse_duration(time_range),
+        end_s,
+        percentile=percentile,
+        timeout=settings.INCIDENT_TIMEOUT,
+        max_bytes=settings.INCIDENT_MAX_BYTES,
+    )
@@ -1,8 +1,15 @@
+import time
+from typing import Any
+
 from fastapi import APIRouter, Depends, Query, status
 from pydantic import BaseModel
 
 from app.clients import LokiClient
+from app.error_index import get_error_index
+from app.log_patterns import mine_templates
+from app.routers.metrics import _range_bounds
 from app.security import verify_bearer_token
+from app.timeutil import parse_duration
 
 router = APIRouter(
     prefix="/logs",
@@ -19,22 +26,211 @@ async def logs_errors(
     limit: int = Query(100, ge=1, le=1000),
     service: str | None = Query(None, pattern=r"^[a-zA-Z0-9_-]+$"),
     range: str | None = Query(None, pattern=r"^\d+[smhd]$"),
+    detailed: bool = Query(False),
+    summarize: bool = Query(False),
+    sample: str = Query("newest", pattern=r"^(newest|stratified)$"),
     client: LokiClient = Depends(LokiClient),
-) -> dict[str, list[str]]:
+) -> dict[str, Any]:
     """Return the last *limit* error log lines from Loki.
 
     The endpoint proxies a query to the Loki HTTP API, returning only the raw
-    log lines so that API consumers do not need to know Loki's schema.
+    log lines so that API consumers do not need to know Loki's schema.  Lines
+    are the newest *limit* across all streams, oldest first.  With
+    ``detailed=true`` each entry is ``{timestamp, labels, line}`` instead; with
+    ``summarize=true`` the lines are folded into ``patterns`` (see
+    `logs_patterns`).
+
+    ``sample=stratified`` returns a representative *limit* lines of *range*
+    (default 1h) instead, sampled across streams and time buckets so one noisy
+    stream cannot fill the result, with the lines read per stream and bucket
+    (``strata``) and each stream's exact total (``streams``).
     """
 
+    if sample == "stratified" and not summarize:
+        result = await client.sample_errors(limit, service, range)
+        entries = result.pop("entries")
+        logs = entries if detailed else [entry["line"] for entry in entries]
+        return {"logs": logs, **result}
+    if summarize and range and sample == "newest":
+        return await client.mine_logs(None, service, range, limit)
+    if summarize:
+        entries = await client.fetch_error_entries(limit, service, range, sample)
+        return mine_templates(entries)
+    if detailed:
+        return {"logs": await client.fetch_error_entries(limit, service, range)}
     logs = await client.fetch_error_logs(limit, service, range)
     return {"logs": logs}
 
 
+@router.get(
+    "/patterns",
+    status_code=status.HTTP_200_OK,
+)
+async def logs_patterns(
+    service: str | None = Query(None, pattern=r"^[a-zA-Z0-9_-]+$"),
+    range: str = Query("1h", pattern=r"^\d+[smhd]$"),
+    query: str | None = Query(None, min_length=1),
+    limit: int = Query(5000, ge=1, le=50_000),
+    top: int = Query(50, ge=1, le=1000),
+    client: LokiClient = Depends(LokiClient),
+) -> dict[str, Any]:
+    """Return the *top* message templates of recent error logs (or of *query*).
+
+    Up to *limit* lines are mined into Drain templates, e.g.
+    ``payment <*> declined after <NUM>``, each with its ``count``,
+    ``first_seen``/``last_seen`` timestamps (ns) and a ``sample`` line.
+    """
+
+    return await client.mine_logs(query, service, range, limit, top)
+
+
+@router.get(
+    "/errors/new",
+    status_code=status.HTTP_200_OK,
+)
+async def logs_errors_new(
+    service: str | None = Query(None, pattern=r"^[a-zA-Z0-9_-]+$"),
+    since: str = Query("15m", pattern=r"^\d+[smhd]$"),
+    limit: int = Query(50, ge=1, le=1000),
+) -> dict[str, Any]:
+    """Return error fingerprints first seen within the last *since*.
+
+    Answered from the in-process error index (no Loki query): each error has
+    its ``fingerprint``, normalised ``template``, a ``sample`` line,
+    ``first_seen``/``last_seen`` (ns), total ``count`` and ``recent_count``
+    over ``ERROR_INDEX_WINDOW``.  ``indexed_since`` tells how far back the
+    index reaches; ``ready`` is false until its first poll of Loki.
+    """
+
+    since_ns = time.time_ns() - int(parse_duration(since) * 1e9)
+    return get_error_index().report(since_ns, service, limit)
+
+
+@router.get(
+    "/rate",
+    status_code=status.HTTP_200_OK,
+)
+async def logs_rate(
+    service: str | None = Query(None, pattern=r"^[a-zA-Z0-9_-]+$"),
+    range: str = Query("1h", pattern=r"^\d+[smhd]$"),
+    step: str | None = Query(None, pattern=r"^\d+[smh]$"),
+    query: str | None = Query(None, min_length=1),
+    top: int = Query(10, ge=1, le=100),
+    end: float | None = Query(None, description="Unix seconds, defaults to now"),
+    client: LokiClient = Depends(LokiClient),
+) -> dict[str, Any]:
+    """Return error line counts per service, counted by Loki (no line limit).
+
+    Without *step*: ``count`` and ``per_second`` of each service over *range*
+    (the *top* services unless *service* is given).  With *step*: a series of
+    counts per *step* over *range*.  *query* counts only lines containing it.
+
+    Example: `/logs/rate?range=24h&step=1h`
+    """
+
+    return await _log_rate(client, service, range, step, query, top, end)
+
+
+@router.get(
+    "/volume",
+    status_code=status.HTTP_200_OK,
+)
+async def logs_volume(
+    by: str = Query("service", pattern=r"^[a-zA-Z_][a-zA-Z0-9_]*$"),
+    range: str = Query("1h", pattern=r"^\d+[smhd]$"),
+    step: str | None = Query(None, pattern=r"^\d+[smh]$"),
+    service: str | None = Query(None, pattern=r"^[a-zA-Z0-9_-]+$"),
+    top: int = Query(10, ge=1, le=100),
+    unit: str = Query("lines", pattern=r"^(lines|bytes)$"),
+    end: float | None = Query(None, description="Unix seconds, defaults to now"),
+    client: LokiClient = Depends(LokiClient),
+) -> dict[str, Any]:
+    """Return the log volume (all levels) of the *top* values of label *by*.
+
+    Lines (or bytes with ``unit=bytes``) over *range*, or per *step* as a
+    series, aggregated by Loki.
+
+    Example: `/logs/volume?by=level&service=checkout&range=6h`
+    """
+
+    return await _log_volume(client, by, range, step, service, top, unit, end)
+
+
+async def _log_rate(
+    client: LokiClient,
+    service: str | None,
+    time_range: str,
+    step: str | None,
+    query: str | None,
+    top: int,
+    end: float | None,
+) -> dict[str, Any]:
+    top_n = None if service else top
+    if step is None:
+        results = await client.count_errors(service, time_range, top_n, query, end=end)
+        seconds = parse_duration(time_range)
+        return {
+            "range": time_range,
+            "results": [
+                {
+                    "service": r["labels"].get("service"),
+                    "count": r["value"],
+                    "per_second": r["value"] / seconds,
+                }
+                for r in results
+            ],
+        }
+    start_s, end_s, step_s = _range_bounds(time_range, step, end)
+    series = await client.count_errors(
+        service, step, top_n, query, step=step_s, start=start_s, end=end_s
+    )
+    return {
+        "range": time_range,
+        "step": step,
+        "series": [
+            {
+                "service": s["labels"].get("service"),
+                "total": sum(v for _, v in s["values"]),
+                "values": s["values"],
+            }
+            for s in series
+        ],
+    }
+
+
+async def _log_volume(
+    client: LokiClient,
+    by: str,
+    time_range: str,
+    step: str | None,
+    service: str | None,
+    top: int,
+    unit: str,
+    end: float | None,
+) -> dict[str, Any]:
+    report: dict[str, Any] = {"by": by, "unit": unit, "range": time_range}
+    if step is None:
+        results = await client.log_volume(by, time_range, top, service, unit, end=end)
+        report["results"] = [
+            {by: r["labels"].get(by), "value": r["value"]} for r in results
+        ]
+        return report
+    start_s, end_s, step_s = _range_bounds(time_range, step, end)
+    series = await client.log_volume(
+        by, step, top, service, unit, step=step_s, start=start_s, end=end_s
+    )
+    report["step"] = step
+    report["series"] = [
+        {by: s["labels"].get(by), "values": s["values"]} for s in series
+    ]
+    return report
+
+
 class LogSearchRequest(BaseModel):
     query: str
     service: str | None = None
     range: str | None = "1h"
+    detailed: bool = False
 
 
 @router.post(
@@ -43,9 +239,14 @@ class LogSearchRequest(BaseModel):
 )
 async def logs_search(
     request: LogSearchRequest, client: LokiClient = Depends(LokiClient)
-) -> dict[str, list[str]]:
+) -> dict[str, list[Any]]:
     """Return log lines matching query (and optional service) from Loki."""
 
+    if request.detailed:
+        entries = await client.search_entries(
+            request.query, request.service, request.range
+        )
+        return {"logs": entries}
     logs = await client.search_logs(request.query, request.service, request.range)
     return {"logs": logs}
 
@@ -59,6 +260,7 @@ async def _fetch_error_logs(
     limit: int = 100,
     service: str | None = None,
     time_range: str | None = None,
+    sample: str = "newest",
 ) -> list[str]:
     """Convenience wrapper so unit-tests can call Loki fetch directly.
 
@@ -68,7 +270,55 @@ async def _fetch_error_logs(
     """
 
     client = LokiClient()
-    return await client.fetch_error_logs(limit, service, time_range)
+    return await client.fetch_error_logs(limit, service, time_range, sample)
+
+
+async def _fetch_log_patterns(
+    service: str | None = None,
+    time_range: str = "1h",
+    query: str | None = None,
+    limit: int = 5000,
+    top: int = 50,
+) -> dict[str, Any]:
+    """Wrapper so MCP tools can mine log templates from Loki."""
+
+    return await LokiClient().mine_logs(query, service, time_range, limit, top)
+
+
+async def _fetch_new_errors(
+    service: str | None = None, since: str = "15m", limit: int = 50
+) -> dict[str, Any]:
+    """Wrapper so MCP tools can ask the error index for new errors."""
+
+    since_ns = time.time_ns() - int(parse_duration(since) * 1e9)
+    return get_error_index().report(since_ns, service, limit)
+
+
+async def _fetch_log_rate(
+    service: str | None = None,
+    time_range: str = "1h",
+    step: str | None = None,
+    query: str | None = None,
+    top: int = 10,
+) -> dict[str, Any]:
+    """Wrapper so MCP tools can count error lines with a LogQL metric query."""
+
+    return await _log_rate(LokiClient(), service, time_range, step, query, top, None)
+
+
+async def _fetch_log_volume(
+    by: str = "service",
+    time_range: str = "1h",
+    step: str | None = None,
+    service: str | None = None,
+    top: int = 10,
+    unit: str = "lines",
+) -> dict[str, Any]:
+    """Wrapper so MCP tools can measure log volume with a LogQL metric query."""
+
+    return await _log_volume(
+        LokiClient(), by, time_range, step, service, top, unit, None
+    )
 
 
 async def _search_logs(
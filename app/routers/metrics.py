@@ -1,10 +1,16 @@
+import time
 from typing import Any
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel as _PydanticBaseModel
+from pydantic import Field
 
 from app.clients import PrometheusClient
 from app.security import verify_bearer_token
+from app.timeutil import parse_duration
+
+# Prometheus rejects range queries returning more points per series than this.
+MAX_RANGE_POINTS = 11_000
 
 router = APIRouter(
     prefix="/metrics",
@@ -53,3 +59,76 @@ async def metrics_query(
 
     result = await client.execute_promql(request.query)
     return {"result": result}
+
+
+class PrometheusRangeQueryRequest(_PydanticBaseModel):
+    query: str
+    range: str = Field("1h", pattern=r"^\d+[smhdw]$")
+    step: str = Field("1m", pattern=r"^\d+[smh]$")
+    end: float | None = None  # unix seconds, defaults to now
+
+
+def _range_bounds(
+    time_range: str, step: str, end: float | None
+) -> tuple[float, float, float]:
+    step_s = parse_duration(step)
+    end_s = time.time() if end is None else end
+    start_s = end_s - parse_duration(time_range)
+    if step_s <= 0 or (end_s - start_s) / step_s > MAX_RANGE_POINTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"range/step exceeds {MAX_RANGE_POINTS} points per series",
+        )
+    return start_s, end_s, step_s
+
+
+@router.post(
+    "/query_range",
+    status_code=status.HTTP_200_OK,
+)
+async def metrics_query_range(
+    request: PrometheusRangeQueryRequest,
+    client: PrometheusClient = Depends(PrometheusClient),
+) -> dict[str, Any]:
+    """Execute a PromQL range query over the last *range* at *step* resolution.
+
+    Start and end are aligned to the step; past hour/day chunks are served from
+    cache so repeated dashboard-style queries only fetch the newest chunk.
+    """
+
+    start, end, step = _range_bounds(request.range, request.step, request.end)
+    result = await client.query_range(request.query, start, end, step)
+    return {"result": result, "start": start, "end": end, "step": step}
+
+
+# ---------------------------------------------------------------------------
+# Internal helper wrappers used by the MCP tools -----------------------------
+# ---------------------------------------------------------------------------
+
+
+async def _fetch_latency_percentile(
+    percentile: float = 0.95,
+    time_range: str = "5m",
+    service: str | None = None,
+) -> float:
+    """Wrapper so MCP tools can call `PrometheusClient.fetch_latency_percentile`."""
+
+    client = PrometheusClient()
+    return await client.fetch_latency_percentile(percentile, time_range, service)
+
+
+async def _execute_promql(promql: str) -> Any:
+    """Wrapper so MCP tools can call `PrometheusClient.execute_promql`."""
+
+    client = PrometheusClient()
+    return await client.execute_promql(promql)
+
+
+async def _execute_promql_range(
+    promql: str, time_range: str = "1h", step: str = "1m", end: float | None = None
+) -> list[dict[str, Any]]:
+    """Wrapper so MCP tools can call `PrometheusClient.query_range`."""
+
+    start_s, end_s, step_s = _range_bounds(time_range, step, end)
+    client = PrometheusClient()
+    return await client.query_range(promql, start_s, end_s, step_s)
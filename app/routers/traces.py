@@ -1,9 +1,14 @@
-from typing import Any
+import json
+from typing import Annotated, Any, AsyncIterator, List
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
-from app.clients import LokiClient, TempoClient
+from app.clients import TRACE_ID_PATTERN, LokiClient, TempoClient
+from app.deadline import DeadlineExceeded
 from app.security import verify_bearer_token
+from app.trace_model import parse_trace
 
 router = APIRouter(
     prefix="/traces",
@@ -12,26 +17,176 @@ router = APIRouter(
 )
 
 
+TraceId = Annotated[str, Field(pattern=TRACE_ID_PATTERN)]
+
+
+class TraceBatchRequest(BaseModel):
+    trace_ids: List[TraceId] = Field(min_length=1, max_length=100)
+    top: int = Field(5, ge=1, le=100)
+
+
+@router.post(
+    "/batch",
+    status_code=status.HTTP_200_OK,
+)
+async def trace_batch(
+    request: TraceBatchRequest, client: TempoClient = Depends(TempoClient)
+) -> StreamingResponse:
+    """Stream one summary per trace as NDJSON, in completion order."""
+
+    async def lines() -> AsyncIterator[str]:
+        async for result in client.fetch_trace_summaries(
+            request.trace_ids, request.top
+        ):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get(
+    "/search",
+    status_code=status.HTTP_200_OK,
+)
+async def trace_search(
+    q: str = Query(..., min_length=1, description="TraceQL query"),
+    range: str = Query("15m", pattern=r"^\d+[smhd]$"),
+    limit: int = Query(20, ge=1, le=100),
+    spans_per_trace: int = Query(3, ge=0, le=50),
+    cursor: str | None = Query(None),
+    client: TempoClient = Depends(TempoClient),
+) -> StreamingResponse:
+    """Stream TraceQL hits as NDJSON; the last line holds ``next_cursor``.
+
+    Example: `/traces/search?q={ span.http.route = "/checkout" %26%26 duration > 1s }`
+    """
+
+    results = client.search_page(q, range, limit, spans_per_trace, cursor)
+    # Pull the first line before responding so query errors become a proper
+    # HTTP status instead of a truncated stream.
+    first = await results.__anext__()
+
+    async def lines() -> AsyncIterator[str]:
+        yield json.dumps(first) + "\n"
+        async for result in results:
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @router.get(
     "/{trace_id}",
     status_code=status.HTTP_200_OK,
 )
-async def trace_json(trace_id: str, client: TempoClient = Depends(TempoClient)) -> Any:
+async def trace_json(
+    trace_id: str = Path(pattern=TRACE_ID_PATTERN),
+    client: TempoClient = Depends(TempoClient),
+) -> Any:
     """Return raw trace JSON for the given trace ID."""
 
     return await client.fetch_trace_json(trace_id)
 
 
+@router.get(
+    "/{trace_id}/summary",
+    status_code=status.HTTP_200_OK,
+)
+async def trace_summary(
+    trace_id: str = Path(pattern=TRACE_ID_PATTERN),
+    top: int = Query(10, ge=1, le=100),
+    client: TempoClient = Depends(TempoClient),
+) -> Any:
+    """Return the critical path, self time per service and slowest spans."""
+
+    return await client.fetch_trace_summary(trace_id, top)
+
+
 @router.get(
     "/{trace_id}/logs",
     status_code=status.HTTP_200_OK,
 )
 async def trace_logs(
-    trace_id: str,
+    trace_id: str = Path(pattern=TRACE_ID_PATTERN),
     limit: int = Query(100, ge=1, le=1000),
     client: LokiClient = Depends(LokiClient),
+    tempo: TempoClient = Depends(TempoClient),
 ) -> dict[str, list[str]]:
     """Return log lines correlated with the specified trace."""
 
-    logs = await client.fetch_trace_logs(trace_id, limit)
+    logs = await _correlated_logs(tempo, client, trace_id, limit)
     return {"logs": logs}
+
+
+async def _correlated_logs(
+    tempo: TempoClient, loki: LokiClient, trace_id: str, limit: int
+) -> list[str]:
+    """Fetch logs for *trace_id* bounded by the trace's services and window.
+
+    The trace usually comes from the trace cache.  If Tempo does not know it
+    (or fails) the Loki query is still line-filtered, over a short recent
+    window instead of the trace's own.  A spent deadline is not retried.
+    """
+
+    try:
+        spans = parse_trace(await tempo.fetch_trace_json(trace_id))
+    except DeadlineExceeded:
+        raise
+    except (HTTPException, TypeError, ValueError, AttributeError):
+        spans = None
+    if spans is None or not len(spans):
+        return await loki.fetch_trace_logs(trace_id, limit)
+    return await loki.fetch_trace_logs(
+        trace_id,
+        limit,
+        services=[s for s in spans.services if s != "unknown"],
+        start_ns=min(spans.start),
+        end_ns=max(spans.end),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Internal helper wrappers used by the MCP tools -----------------------------
+# ---------------------------------------------------------------------------
+
+
+async def _fetch_trace_json(trace_id: str) -> Any:
+    """Wrapper so MCP tools can call `TempoClient.fetch_trace_json`."""
+
+    client = TempoClient()
+    return await client.fetch_trace_json(trace_id)
+
+
+async def _fetch_trace_summary(trace_id: str, top: int = 10) -> Any:
+    """Wrapper so MCP tools can call `TempoClient.fetch_trace_summary`."""
+
+    client = TempoClient()
+    return await client.fetch_trace_summary(trace_id, top)
+
+
+async def _fetch_trace_batch(trace_ids: List[str], top: int = 5) -> List[Any]:
+    """Wrapper so MCP tools can call `TempoClient.fetch_trace_summaries`."""
+
+    client = TempoClient()
+    return [result async for result in client.fetch_trace_summaries(trace_ids, top)]
+
+
+async def _search_traces(
+    query: str,
+    range: str = "15m",
+    limit: int = 20,
+    spans_per_trace: int = 3,
+    cursor: str | None = None,
+) -> dict[str, Any]:
+    """Wrapper so MCP tools can call `TempoClient.search_page`."""
+
+    client = TempoClient()
+    traces = [
+        r
+        async for r in client.search_page(query, range, limit, spans_per_trace, cursor)
+    ]
+    return {"traces": traces[:-1], **traces[-1]}
+
+
+async def _fetch_trace_logs(trace_id: str, limit: int = 100) -> list[str]:
+    """Wrapper so MCP tools get trace-window-bounded `LokiClient.fetch_trace_logs`."""
+
+    return await _correlated_logs(TempoClient(), LokiClient(), trace_id, limit)
@@ -0,0 +1,93 @@
+"""Single-flight coalescing of identical in-flight backend queries.
+
+When many agent sessions ask the same question at the same moment (typically
+right after an alert fires) only the first caller goes upstream; everybody
+else awaits the same task and receives its result – or its exception.  Once
+every waiter has gone away (deadline, client disconnect) the shared call is
+cancelled as well.
+
+The shared call runs without a request deadline: callers with different
+budgets join it, so each one waits only as long as its own deadline allows
+(504 once it passes) while the call goes on for the others.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from opentelemetry import metrics
+
+from app.deadline import deadline_guard, without_deadline
+
+_meter = metrics.get_meter(__name__)
+_coalesced_counter = _meter.create_counter(
+    "mcp.singleflight.coalesced",
+    description="Backend calls served by joining an identical in-flight request",
+)
+
+
+class SingleFlight:
+    """Group of in-flight calls for one backend, keyed by canonical query."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.coalesced = 0
+        self._inflight: Dict[str, asyncio.Task[Any]] = {}
+        self._waiters: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run *fn* once for all concurrent callers using the same *key*."""
+
+        task = self._inflight.get(key)
+        if task is None:
+            # The call runs in its own task so that a caller going away (client
+            # disconnect) does not cancel the work other waiters depend on.
+            task = asyncio.get_running_loop().create_task(
+                self._call(fn), context=without_deadline()
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.coalesced += 1
+            _coalesced_counter.add(1, {"backend": self.name})
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            async with deadline_guard(self.name):
+                return await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                # Nobody is left to read the result: stop the backend call, and
+                # forget it now so a caller arriving before the cancellation
+                # lands starts a fresh call instead of joining the dying one.
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+                task.cancel()
+
+    @staticmethod
+    async def _call(fn: Callable[[], Awaitable[Any]]) -> Any:
+        return await fn()
+
+    def _done(self, key: str, task: asyncio.Task[Any]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every waiter went away.
+        if not task.cancelled():
+            task.exception()
+
+
+_groups: Dict[str, SingleFlight] = {}
+
+
+def get_flight_group(backend: str) -> SingleFlight:
+    """Return the process-wide single-flight group for *backend*."""
+
+    group = _groups.get(backend)
+    if group is None:
+        group = _groups[backend] = SingleFlight(backend)
+    return group
@@ -0,0 +1,51 @@
+"""Helpers for Prometheus/Loki style durations and time-range splitting."""
+
+from __future__ import annotations
+
+import re
+from typing import List, Tuple
+
+_DURATION_RE = re.compile(r"(\d+)(ms|s|m|h|d|w|y)")
+_UNIT_SECONDS = {
+    "ms": 0.001,
+    "s": 1,
+    "m": 60,
+    "h": 3600,
+    "d": 86400,
+    "w": 7 * 86400,
+    "y": 365 * 86400,
+}
+
+
+def parse_duration(value: str) -> float:
+    """Return the number of seconds in a duration such as ``5m`` or ``1h30m``."""
+
+    pos = 0
+    total = 0.0
+    for match in _DURATION_RE.finditer(value):
+        if match.start() != pos:
+            break
+        total += int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+        pos = match.end()
+    if pos != len(value) or not value:
+        raise ValueError(f"Invalid duration: {value!r}")
+    return total
+
+
+def split_time_range(start: int, end: int, shard: int) -> List[Tuple[int, int]]:
+    """Split ``[start, end)`` into shard-aligned pieces, newest first.
+
+    Boundaries fall on multiples of *shard* so repeated queries over a sliding
+    window produce the same inner shards.
+    """
+
+    if end <= start:
+        return []
+    shards: List[Tuple[int, int]] = []
+    upper = end
+    lower = (end - 1) // shard * shard
+    while upper > start:
+        shards.append((max(lower, start), upper))
+        upper = lower
+        lower -= shard
+    return shards
@@ -0,0 +1,254 @@
+"""Compact columnar span model for Tempo traces and trace summaries.
+
+Tempo returns OTLP JSON (``batches`` or ``resourceSpans`` → ``scopeSpans`` →
+``spans``), which is large and awkward for agents to walk span by span.
+`SpanTable` flattens it into parallel arrays – start/end times, parent
+indices, interned service and span-name IDs – so the analyses below are
+simple passes over integers:
+
+* the critical path (Jaeger-style: repeatedly follow the child that finished
+  last before the current cursor),
+* self time per service (span duration minus the union of its children),
+* the top-N slowest spans.
+
+Apart from two sorts of the span indices (by start and by end time, done once
+for the whole trace) every pass is linear in the number of spans.
+"""
+
+from __future__ import annotations
+
+import heapq
+from array import array
+from typing import Any, Dict, Iterator, List, Tuple
+
+# OTLP status code for errored spans.
+_STATUS_ERROR = 2
+
+
+class SpanTable:
+    """Spans of one trace stored column-wise.
+
+    ``parent[i]`` is the index of span *i*'s parent or ``-1`` for a root (or
+    a span whose parent is missing from the trace).  ``service[i]`` and
+    ``name[i]`` index into the interned `services` and `names` tables.
+    """
+
+    def __init__(self) -> None:
+        self.span_ids: List[str] = []
+        self.parent = array("i")
+        self.start = array("q")
+        self.end = array("q")
+        self.service = array("i")
+        self.name = array("i")
+        self.error = array("b")
+        self.services: List[str] = []
+        self.names: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.span_ids)
+
+    def duration(self, i: int) -> int:
+        return self.end[i] - self.start[i]
+
+    def roots(self) -> List[int]:
+        return [i for i, p in enumerate(self.parent) if p < 0]
+
+    def children(self, order: List[int]) -> Tuple[array, array]:
+        """Return CSR arrays ``(offsets, kids)`` listing children in *order*.
+
+        Children of span *i* are ``kids[offsets[i]:offsets[i + 1]]``, in the
+        relative order they appear in *order*.
+        """
+
+        n = len(self)
+        offsets = array("i", [0]) * (n + 1)
+        for i in range(n):
+            if self.parent[i] >= 0:
+                offsets[self.parent[i] + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        fill = array("i", offsets[:n])
+        kids = array("i", [0]) * offsets[n]
+        for i in order:
+            p = self.parent[i]
+            if p >= 0:
+                kids[fill[p]] = i
+                fill[p] += 1
+        return offsets, kids
+
+
+def _attribute(attributes: List[Dict[str, Any]], key: str) -> str | None:
+    for attr in attributes or []:
+        if attr.get("key") == key:
+            value = attr.get("value", {})
+            return value.get("stringValue")
+    return None
+
+
+def _iter_spans(trace: Any) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ``(service, span)`` pairs from an OTLP JSON trace."""
+
+    if not isinstance(trace, dict):
+        raise ValueError("trace must be a JSON object")
+    batches = trace.get("batches") or trace.get("resourceSpans") or []
+    for batch in batches:
+        resource = batch.get("resource", {})
+        service = _attribute(resource.get("attributes", []), "service.name")
+        scopes = (
+            batch.get("scopeSpans") or batch.get("instrumentationLibrarySpans") or []
+        )
+        for scope in scopes:
+            for span in scope.get("spans", []):
+                yield service or "unknown", span
+
+
+def last_span_end(trace: Any) -> int | None:
+    """The latest ``endTimeUnixNano`` in *trace*, or ``None`` without spans."""
+
+    ends = (
+        int(span.get("endTimeUnixNano") or span.get("startTimeUnixNano") or 0)
+        for _service, span in _iter_spans(trace)
+    )
+    return max(ends, default=None)
+
+
+def parse_trace(trace: Any) -> SpanTable:
+    """Build a `SpanTable` from Tempo's OTLP JSON trace."""
+
+    table = SpanTable()
+    service_ids: Dict[str, int] = {}
+    name_ids: Dict[str, int] = {}
+    parent_ids: List[str] = []
+    for service, span in _iter_spans(trace):
+        table.span_ids.append(span.get("spanId", ""))
+        parent_ids.append(span.get("parentSpanId", ""))
+        start = int(span.get("startTimeUnixNano", 0))
+        table.start.append(start)
+        table.end.append(max(start, int(span.get("endTimeUnixNano", start))))
+        table.service.append(service_ids.setdefault(service, len(service_ids)))
+        name = span.get("name", "")
+        table.name.append(name_ids.setdefault(name, len(name_ids)))
+        code = span.get("status", {}).get("code")
+        table.error.append(code in (_STATUS_ERROR, "STATUS_CODE_ERROR"))
+    table.services = list(service_ids)
+    table.names = list(name_ids)
+
+    index = {span_id: i for i, span_id in enumerate(table.span_ids) if span_id}
+    for i, parent_id in enumerate(parent_ids):
+        p = index.get(parent_id, -1) if parent_id else -1
+        table.parent.append(-1 if p == i else p)
+    return table
+
+
+def critical_path(table: SpanTable, root: int) -> List[Tuple[int, int]]:
+    """Return ``(span, nanoseconds on the critical path)`` for *root*'s tree.
+
+    Starting at the end of a span, the child that finished last (before the
+    cursor) is on the critical path; the cursor then moves to that child's
+    start and the search continues among the remaining children.  Time not
+    covered by any chosen child is attributed to the span itself.  Spans are
+    returned in start-time order.
+    """
+
+    by_end = sorted(range(len(table)), key=lambda i: table.end[i], reverse=True)
+    offsets, kids = table.children(by_end)
+    contribution: Dict[int, int] = {}
+    stack = [(root, table.end[root])]
+    while stack:
+        span, until = stack.pop()
+        if span in contribution:
+            continue  # malformed trace with a parent cycle
+        start = table.start[span]
+        cursor = min(table.end[span], until)
+        own = 0
+        for k in range(offsets[span], offsets[span + 1]):
+            if cursor <= start:
+                break
+            child = kids[k]
+            child_end = min(table.end[child], table.end[span])
+            if child_end <= start:
+                break  # this and all remaining children ended before the span
+            if child_end > cursor or table.end[child] <= table.start[child]:
+                continue  # overlapped the child already on the path
+            own += cursor - child_end
+            stack.append((child, child_end))
+            cursor = max(table.start[child], start)
+        own += max(cursor - start, 0)
+        contribution[span] = own
+    return sorted(contribution.items(), key=lambda item: table.start[item[0]])
+
+
+def self_times(table: SpanTable) -> array:
+    """Return each span's duration minus the union of its children's spans."""
+
+    by_start = sorted(range(len(table)), key=lambda i: table.start[i])
+    offsets, kids = table.children(by_start)
+    result = array("q", [0]) * len(table)
+    for span in range(len(table)):
+        lo, hi = table.start[span], table.end[span]
+        covered = 0
+        cur_start = cur_end = lo
+        for k in range(offsets[span], offsets[span + 1]):
+            child = kids[k]
+            c_start, c_end = max(table.start[child], lo), min(table.end[child], hi)
+            if c_end <= c_start:
+                continue
+            if c_start > cur_end:
+                covered += cur_end - cur_start
+                cur_start = c_start
+            cur_end = max(cur_end, c_end)
+        covered += cur_end - cur_start
+        result[span] = (hi - lo) - covered
+    return result
+
+
+def _ms(ns: int) -> float:
+    return round(ns / 1e6, 3)
+
+
+def summarize_trace(table: SpanTable, top: int = 10) -> Dict[str, Any]:
+    """Return a compact summary of *table* suitable for an agent's context."""
+
+    if not len(table):
+        return {"span_count": 0}
+
+    roots = table.roots()
+    # The longest root is the request; other roots are usually orphans whose
+    # parent was not (yet) ingested.
+    root = max(roots, key=table.duration) if roots else 0
+    trace_start = min(table.start)
+
+    def describe(i: int) -> Dict[str, Any]:
+        return {
+            "span_id": table.span_ids[i],
+            "service": table.services[table.service[i]],
+            "name": table.names[table.name[i]],
+            "start_offset_ms": _ms(table.start[i] - trace_start),
+            "duration_ms": _ms(table.duration(i)),
+        }
+
+    per_service: Dict[str, int] = {}
+    for i, own in enumerate(self_times(table)):
+        service = table.services[table.service[i]]
+        per_service[service] = per_service.get(service, 0) + own
+
+    slowest = heapq.nlargest(top, range(len(table)), key=table.duration)
+    return {
+        "span_count": len(table),
+        "service_count": len(table.services),
+        "error_count": sum(table.error),
+        "duration_ms": _ms(max(table.end) - trace_start),
+        "root": describe(root),
+        "critical_path": [
+            {**describe(i), "self_ms": _ms(ns)}
+            for i, ns in critical_path(table, root)
+            if ns > 0
+        ],
+        "self_time_by_service_ms": {
+            service: _ms(ns)
+            for service, ns in sorted(
+                per_service.items(), key=lambda item: item[1], reverse=True
+            )
+        },
+        "slowest_spans": [describe(i) for i in slowest],
+    }
@@ -0,0 +1,90 @@
+"""Helpers for TraceQL search against Tempo's ``/api/search``.
+
+Search windows are aligned to a fixed grid so that repeated searches ("slow
+/checkout traces in the last 15 minutes") map to the same cache entry for a
+little while, and each hit is compacted to a few fields plus at most
+*spans_per_trace* matched spans to keep agent context small.
+
+Tempo has no native pagination, so pages are walked backwards in time (with
+``most_recent=true`` so Tempo returns the newest matches first): the opaque
+cursor records the fixed window start, the start time of the oldest trace
+already returned and the IDs of the returned traces that started at exactly
+that time, and the next page searches up to that time excluding those IDs, so
+traces sharing a start time are neither skipped nor repeated.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import math
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+def align_window(start: float, end: float, align: float) -> Tuple[int, int]:
+    """Align a ``[start, end]`` window (seconds) outward to *align* seconds."""
+
+    if align <= 0:
+        return math.floor(start), math.ceil(end)
+    return (
+        int(math.floor(start / align) * align),
+        int(math.ceil(end / align) * align),
+    )
+
+
+def encode_cursor(start: int, before_ns: int, seen: Iterable[str] = ()) -> str:
+    data = {"start": start, "before_ns": before_ns, "seen": sorted(seen)}
+    raw = json.dumps(data).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int, Tuple[str, ...]]:
+    """Return ``(window_start, before_ns, seen_ids)``; ``ValueError`` if invalid."""
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        seen = tuple(str(trace_id) for trace_id in data.get("seen", ()))
+        return int(data["start"]), int(data["before_ns"]), seen
+    except (AttributeError, binascii.Error, KeyError, TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def _attributes(raw: List[Dict[str, Any]] | None) -> Dict[str, Any]:
+    attributes: Dict[str, Any] = {}
+    for attr in raw or []:
+        value = attr.get("value", {})
+        attributes[attr.get("key", "")] = next(iter(value.values()), None)
+    return attributes
+
+
+def compact_trace(item: Dict[str, Any], spans_per_trace: int) -> Dict[str, Any]:
+    """Reduce one Tempo search hit to its summary and first matched spans."""
+
+    spans: List[Dict[str, Any]] = []
+    matched = 0
+    span_sets = item.get("spanSets") or ([item["spanSet"]] if "spanSet" in item else [])
+    for span_set in span_sets:
+        matched += int(span_set.get("matched", len(span_set.get("spans", []))))
+        for span in span_set.get("spans", []):
+            if len(spans) >= spans_per_trace:
+                break
+            spans.append(
+                {
+                    "span_id": span.get("spanID"),
+                    "name": span.get("name"),
+                    "start_ns": int(span.get("startTimeUnixNano", 0)),
+                    "duration_ms": round(int(span.get("durationNanos", 0)) / 1e6, 3),
+                    "attributes": _attributes(span.get("attributes")),
+                }
+            )
+    return {
+        "trace_id": item.get("traceID"),
+        "root_service": item.get("rootServiceName"),
+        "root_name": item.get("rootTraceName"),
+        "start_ns": int(item.get("startTimeUnixNano", 0)),
+        "duration_ms": item.get("durationMs"),
+        "matched_spans": matched,
+        "spans": spans,
+    }
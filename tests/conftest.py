@@ -0,0 +1,22 @@
+import pytest
+
+from app.breaker import reset_breakers
+from app.cache import set_query_cache, set_trace_cache
+from app.error_index import set_error_index
+from app.retry import reset_retry_policies
+
+
+@pytest.fixture(autouse=True)
+def _reset_query_cache():
+    """Give every test cold caches, closed circuit breakers, full retry budgets
+    and an empty error index."""
+
+    set_query_cache(None)
+    set_trace_cache(None)
+    set_error_index(None)
+    reset_breakers()
+    reset_retry_policies()
+    yield
+    set_query_cache(None)
+    set_trace_cache(None)
+    set_error_index(None)
@@ -0,0 +1,77 @@
+import pytest
+from fastapi import HTTPException
+from httpx import ASGITransport, AsyncClient
+from pytest_httpx import HTTPXMock
+
+from app.config import get_settings
+from app.main import app
+from app.routers.batch import TOOLS, AlertsArgs, _run_batch
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_calls_and_reports_per_item_errors(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    alerts = [{"labels": {"alertname": "HighCPU", "service": "api"}}]
+    httpx_mock.add_response(url="http://alertmanager:9093/api/v2/alerts", json=alerts)
+    httpx_mock.add_response(
+        url="http://tempo:3200/api/traces/abc", status_code=404, is_optional=True
+    )
+    httpx_mock.add_response(json={"data": {"result": [{"values": [["1", "boom"]]}]}})
+    monkeypatch.setenv("MCP_TOKEN", "tok")
+    get_settings.cache_clear()
+    body = {
+        "calls": [
+            {"tool": "alerts_tool"},
+            {"tool": "trace_json", "arguments": {"trace_id": "abc"}},
+            {"tool": "error_logs", "arguments": {"limit": 5000}},
+            {"tool": "nope"},
+            {"tool": "error_logs", "arguments": {"limit": 10}},
+        ]
+    }
+
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post(
+            "/batch", json=body, headers={"Authorization": "Bearer tok"}
+        )
+
+    get_settings.cache_clear()
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["tool"] for r in results] == [c["tool"] for c in body["calls"]]
+    assert results[0]["ok"] and results[0]["result"] == alerts
+    assert (results[1]["ok"], results[1]["status"]) == (False, 404)
+    assert (results[2]["ok"], results[2]["status"]) == (False, 422)
+    assert (results[3]["ok"], results[3]["status"]) == (False, 400)
+    assert results[4]["result"] == ["boom"]
+    assert all(r["elapsed_ms"] >= 0 for r in results)
+
+
+@pytest.mark.asyncio
+async def test_batch_helper_rejects_oversized_batches():
+    with pytest.raises(HTTPException) as exc_info:
+        await _run_batch([{"tool": "alerts"}] * 21)
+
+    assert exc_info.value.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_unexpected_exception_becomes_an_error_entry(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def broken(_: AlertsArgs) -> None:
+        raise KeyError("labels")
+
+    monkeypatch.setitem(TOOLS, "alerts", (AlertsArgs, broken))
+
+    body = await _run_batch(
+        [{"tool": "alerts"}, {"tool": "new_errors_tool", "arguments": {"since": "5m"}}]
+    )
+
+    broken_call, new_errors = body["results"]
+    assert (broken_call["ok"], broken_call["status"]) == (False, 500)
+    assert broken_call["error"] == "KeyError: 'labels'"
+    assert new_errors["ok"] and new_errors["result"]["errors"] == []
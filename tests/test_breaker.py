@@ -0,0 +1,111 @@
+import httpx
+import pytest
+from fastapi import HTTPException
+from httpx import ASGITransport, AsyncClient
+from pytest_httpx import HTTPXMock
+
+from app.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.clients import AlertManagerClient, PrometheusClient
+from app.config import Settings, get_settings
+from app.main import app
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+async def _call(breaker: CircuitBreaker, exc: BaseException | None = None) -> None:
+    async with breaker.guard():
+        if exc is not None:
+            raise exc
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_on_error_rate_and_recovers_via_half_open():
+    breaker = CircuitBreaker("loki", failure_rate=0.5, min_calls=4, open_seconds=0)
+
+    await _call(breaker)
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            await _call(breaker, httpx.ConnectError("down"))
+    assert breaker.state == CLOSED  # 2 of 3 failed, but below min_calls
+    with pytest.raises(HTTPException):
+        await _call(breaker, HTTPException(502, "Loki returned 500"))
+    assert breaker.state == OPEN
+
+    breaker.before_call()  # open_seconds elapsed: this call is the probe
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(HTTPException) as probing:
+        breaker.before_call()
+    assert probing.value.status_code == 503
+    breaker.record(False, probe=True)
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_backend_4xx_answers_leave_the_breaker_closed(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(status_code=400, text="parse error", is_reusable=True)
+    settings = Settings(BREAKER_MIN_CALLS=2, RETRY_ENABLED=False)
+    client = PrometheusClient(settings)
+
+    for _ in range(10):
+        with pytest.raises(HTTPException) as failed:
+            await client.execute_promql("sum(")
+        assert failed.value.status_code == 502
+
+    assert client.breaker.state == CLOSED
+    assert len(httpx_mock.get_requests()) == 10
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_fails_fast(httpx_mock: HTTPXMock):
+    httpx_mock.add_exception(httpx.ConnectTimeout("slow"), is_reusable=True)
+    settings = Settings(
+        BREAKER_MIN_CALLS=2, BREAKER_OPEN_SECONDS=30, RETRY_ENABLED=False
+    )
+    client = AlertManagerClient(settings)
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as failed:
+            await client.fetch_active_alerts()
+        assert failed.value.status_code == 502
+    with pytest.raises(HTTPException) as fast:
+        await client.fetch_active_alerts()
+
+    assert fast.value.status_code == 503
+    assert fast.value.headers["Retry-After"] == "30"
+    assert len(httpx_mock.get_requests()) == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_endpoint_serves_stale_result_while_open(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    responses = iter(
+        [httpx.Response(200, json={"data": {"result": [{"values": [["1", "boom"]]}]}})]
+    )
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        response = next(responses, None)
+        if response is None:
+            raise httpx.ConnectError("Loki is down")
+        return response
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+    monkeypatch.setenv("MCP_TOKEN", "tok")
+    monkeypatch.setenv("BREAKER_MIN_CALLS", "1")
+    monkeypatch.setenv("RETRY_ENABLED", "false")
+    monkeypatch.setenv("CACHE_TTLS", '{"error_logs": 0.001}')
+    get_settings.cache_clear()
+    headers = {"Authorization": "Bearer tok"}
+
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        fresh = await ac.get("/logs/errors", headers=headers)
+        failed = await ac.get("/logs/errors", headers=headers)  # opens the breaker
+        stale = await ac.get("/logs/errors", headers=headers)
+
+    get_settings.cache_clear()
+    assert fresh.json() == {"logs": ["boom"]} and "Warning" not in fresh.headers
+    assert failed.status_code == 502
+    assert stale.status_code == 200
+    assert stale.json() == {"logs": ["boom"]}
+    assert stale.headers["Warning"] == '110 - "Response is Stale"'
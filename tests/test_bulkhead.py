@@ -0,0 +1,79 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from pytest_httpx import HTTPXMock
+
+from app.bulkhead import Bulkhead
+from app.clients import LokiClient, TempoClient
+from app.config import Settings
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+@pytest.mark.asyncio
+async def test_excess_calls_queue_then_fail_fast_with_retry_after():
+    bulkhead = Bulkhead(
+        "tempo", initial_limit=1, min_limit=1, max_queue=1, queue_timeout=0.05
+    )
+    release = asyncio.Event()
+
+    async def hold():
+        async with bulkhead.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    assert (bulkhead.in_flight, bulkhead.queue_depth) == (1, 1)
+
+    with pytest.raises(HTTPException) as full:
+        async with bulkhead.slot():
+            pass
+    assert full.value.status_code == 503
+    assert full.value.headers == {"Retry-After": "1"}
+
+    with pytest.raises(HTTPException):
+        await queued  # waited longer than queue_timeout
+    release.set()
+    await holder
+    assert (bulkhead.in_flight, bulkhead.queue_depth) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_when_healthy_and_shrinks_on_slow_calls():
+    bulkhead = Bulkhead("loki", initial_limit=10, max_limit=12)
+
+    for _ in range(100):
+        bulkhead._adapt(0.01, overloaded=False)
+    assert bulkhead.limit == 12
+
+    bulkhead._adapt(1.0, overloaded=False)
+    assert bulkhead.limit == 10  # 12 * 0.9
+    bulkhead._adapt(0.01, overloaded=True)
+    assert bulkhead.limit == 10  # same congestion period: no second backoff
+
+
+@pytest.mark.asyncio
+async def test_slow_backend_does_not_starve_others(httpx_mock: HTTPXMock):
+    async def respond(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "tempo":
+            await asyncio.sleep(0.3)
+            return httpx.Response(200, json={"batches": []})
+        return httpx.Response(200, json={"data": {"result": []}})
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+    settings = Settings(BULKHEAD_INITIAL_LIMIT=2, BULKHEAD_QUEUE_TIMEOUT=0.05)
+
+    tempo = [
+        asyncio.create_task(TempoClient(settings).fetch_trace_json(f"a{i}"))
+        for i in range(6)
+    ]
+    await asyncio.sleep(0.01)
+    assert await LokiClient(settings).fetch_error_logs(10) == []
+
+    results = await asyncio.gather(*tempo, return_exceptions=True)
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 4 and all(r.status_code == 503 for r in rejected)
@@ -0,0 +1,109 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from pytest_httpx import HTTPXMock
+
+from app.cache import MemoryBackend, QueryCache, get_query_cache, normalize_query
+from app.clients import LokiClient, PrometheusClient
+from app.config import get_settings
+from app.main import app
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+LOKI_JSON = {"data": {"result": [{"values": [["1", "boom"]]}]}}
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_least_recently_used_by_bytes():
+    backend = MemoryBackend(max_bytes=10)
+    await backend.set("a", b"aaaa", 60)
+    await backend.set("b", b"bbbb", 60)
+    assert await backend.get("a") == b"aaaa"  # "a" becomes most recently used
+
+    await backend.set("c", b"cccc", 60)
+
+    assert await backend.get("b") is None
+    assert await backend.get("a") == b"aaaa"
+    assert backend.size_bytes == 8
+
+    await backend.set("huge", b"x" * 11, 60)
+    assert await backend.get("huge") is None
+    assert len(backend) == 2
+
+
+def test_keys_normalise_query_and_bucket_time():
+    cache = QueryCache(MemoryBackend(1024), ttls={"error_logs": 10})
+
+    key, remaining = cache.key_for(
+        "error_logs", normalize_query('{level="error"}  [5m]'), now=1005.0
+    )
+    same, _ = cache.key_for(
+        "error_logs", normalize_query('{level="error"} [5m]'), now=1009.9
+    )
+    later, _ = cache.key_for(
+        "error_logs", normalize_query('{level="error"} [5m]'), now=1010.0
+    )
+
+    assert key == same
+    assert key != later
+    assert remaining == pytest.approx(5.0)
+
+
+@pytest.mark.asyncio
+async def test_stale_copies_do_not_use_the_fresh_budget():
+    backend = MemoryBackend(max_bytes=64)
+    cache = QueryCache(backend, stale_ttl=600, stale_max_bytes=1024)
+
+    async def fetch() -> str:
+        return "x" * 20
+
+    for query in ("a", "b"):
+        await cache.get_or_fetch("error_logs", query, fetch)
+
+    assert len(backend) == 2 and backend.size_bytes == 44
+    assert cache.stale is not None and len(cache.stale) == 2
+
+
+@pytest.mark.asyncio
+async def test_repeated_loki_query_is_served_from_cache(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(json=LOKI_JSON)
+
+    assert await LokiClient().fetch_error_logs(10, "checkout") == ["boom"]
+    assert await LokiClient().fetch_error_logs(10, "checkout") == ["boom"]
+
+    assert len(httpx_mock.get_requests()) == 1
+    assert get_query_cache().stats == {"hits": 1, "misses": 1, "bypass": 0}
+
+
+@pytest.mark.asyncio
+async def test_upstream_errors_are_not_cached(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(status_code=500)
+    httpx_mock.add_response(
+        json={"data": {"result": [{"value": [1718486400, "0.25"]}]}}
+    )
+
+    client = PrometheusClient()
+    with pytest.raises(Exception):
+        await client.fetch_latency_percentile(0.95, "5m")
+    assert await client.fetch_latency_percentile(0.95, "5m") == 0.25
+
+
+@pytest.mark.asyncio
+async def test_cache_control_no_cache_bypasses_cache(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    httpx_mock.add_response(json=LOKI_JSON)
+    httpx_mock.add_response(json={"data": {"result": []}})
+    monkeypatch.setenv("MCP_TOKEN", "testtoken")
+    get_settings.cache_clear()
+    headers = {"Authorization": "Bearer testtoken"}
+
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        first = await ac.get("/logs/errors?limit=5", headers=headers)
+        fresh = await ac.get(
+            "/logs/errors?limit=5", headers={**headers, "Cache-Control": "no-cache"}
+        )
+
+    assert first.json() == {"logs": ["boom"]}
+    assert fresh.json() == {"logs": []}
+    assert get_query_cache().stats["bypass"] == 1
@@ -0,0 +1,181 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from httpx import ASGITransport, AsyncClient
+from pytest_httpx import HTTPXMock
+
+from app.breaker import CLOSED
+from app.clients import AlertManagerClient
+from app.config import get_settings
+from app.deadline import (
+    RequestDeadlineMiddleware,
+    budget_share,
+    deadline_after,
+    remaining,
+    request_deadline,
+)
+from app.main import app
+from app.singleflight import SingleFlight
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+@pytest.mark.asyncio
+async def test_header_deadline_caps_backend_timeout(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    httpx_mock.add_response(json=[])
+    monkeypatch.setenv("MCP_TOKEN", "tok")
+    get_settings.cache_clear()
+    headers = {"Authorization": "Bearer tok", "X-Request-Timeout": "0.5"}
+
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get("/alerts/", headers=headers)
+
+    get_settings.cache_clear()
+    assert response.status_code == 200
+    timeout = httpx_mock.get_requests()[0].extensions["timeout"]
+    assert 0 < timeout["read"] <= 0.5
+
+
+@pytest.mark.asyncio
+async def test_slow_backend_past_deadline_fails_with_504(httpx_mock: HTTPXMock):
+    async def slow(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(1)
+        return httpx.Response(200, json=[])
+
+    httpx_mock.add_callback(slow)
+    client = AlertManagerClient()
+
+    with request_deadline(0.05), pytest.raises(HTTPException) as exc_info:
+        await client.fetch_active_alerts()
+
+    assert exc_info.value.status_code == 504
+    # The caller's short deadline is not held against the backend.
+    assert client.breaker is not None and client.breaker.state == CLOSED
+    assert not client.breaker._outcomes
+
+
+@pytest.mark.asyncio
+async def test_fanout_budget_is_split_across_waves():
+    assert budget_share(3) is None  # no deadline, no split
+    with request_deadline(3.0):
+        share = budget_share(3)
+        assert share is not None and 0.9 < share <= 1.0
+        with deadline_after(10.0):  # never extends the request's deadline
+            inner = budget_share(1)
+            assert inner is not None and inner <= 3.0
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_cancels_the_handler():
+    cancelled = asyncio.Event()
+
+    async def endpoint(scope, receive, send) -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(0.05)
+        return {"type": "http.disconnect"}
+
+    async def send(message) -> None:
+        raise AssertionError("nothing should be sent to a gone client")
+
+    scope = {"type": "http", "headers": [], "path": "/"}
+    await asyncio.wait_for(
+        RequestDeadlineMiddleware(endpoint)(scope, receive, send), timeout=1
+    )
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_singleflight_call_cancelled_once_all_waiters_leave():
+    group = SingleFlight("test")
+    cancelled = asyncio.Event()
+
+    async def slow() -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiters = [asyncio.ensure_future(group.do("q", slow)) for _ in range(2)]
+    await asyncio.sleep(0)
+    waiters[0].cancel()
+    await asyncio.sleep(0.01)
+    assert not cancelled.is_set()  # the second waiter still needs the result
+    waiters[1].cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_singleflight_caller_after_cancel_starts_a_fresh_call():
+    group = SingleFlight("test")
+
+    async def slow() -> str:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.05)  # e.g. closing the backend connection
+            raise
+        return "stale"
+
+    async def fast() -> str:
+        return "fresh"
+
+    waiter = asyncio.ensure_future(group.do("q", slow))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+
+    # The abandoned call is still being cancelled; a new caller must not join it.
+    assert await group.do("q", fast) == "fresh"
+    await asyncio.sleep(0.1)  # let the abandoned call finish cancelling
+
+
+@pytest.mark.asyncio
+async def test_singleflight_callers_keep_their_own_deadlines():
+    group = SingleFlight("loki")
+    budgets = []
+
+    async def slow() -> str:
+        budgets.append(remaining())
+        await asyncio.sleep(0.3)
+        return "result"
+
+    async def call(timeout: float | None) -> str:
+        with request_deadline(timeout):
+            return await group.do("q", slow)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    # The call is started by a caller with a short deadline...
+    short = asyncio.ensure_future(call(0.05))
+    await asyncio.sleep(0)
+    patient = asyncio.ensure_future(call(None))
+    tight = asyncio.ensure_future(call(0.1))
+
+    with pytest.raises(HTTPException) as exc_info:
+        await short
+    assert exc_info.value.status_code == 504
+    assert loop.time() - started < 0.2
+    with pytest.raises(HTTPException):
+        await tight
+    # ...yet runs unbounded for the caller without one.
+    assert await patient == "result"
+    assert budgets == [None]
+    assert group.coalesced == 2
@@ -0,0 +1,73 @@
+import pytest
+from pytest_httpx import HTTPXMock
+
+from app.cache import (
+    MemoryBackend,
+    QueryCache,
+    SQLiteBackend,
+    TraceCache,
+    close_query_cache,
+    get_query_cache,
+    get_trace_cache,
+    warm_query_cache,
+)
+from app.clients import TempoClient
+from app.config import Settings
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_round_trip_and_size_bound(tmp_path):
+    disk = SQLiteBackend(str(tmp_path / "cache.sqlite"), max_bytes=10)
+
+    await disk.set("a", b"aaaa", 60)
+    await disk.set("b", b"bbbb", 60)
+    await disk.set("c", b"cccc", 60)
+
+    assert await disk.get("c") == b"cccc"
+    assert disk.size_bytes <= 10
+    assert await disk.get("missing") is None
+    disk.close()
+
+
+@pytest.mark.asyncio
+async def test_entries_survive_restart_and_are_warm_loaded(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    before = QueryCache(MemoryBackend(1024), disk=SQLiteBackend(path, 1024))
+    await before.set_json("query_range_chunk", "up", [1], 60, persistent=True)
+    await before.set_json("trace", "abc", {"spans": 3}, 60, persistent=True)
+    await before.set_json("query_range_tail", "up", {"start": 0}, 60)
+    before.disk.close()
+
+    memory = MemoryBackend(1024)
+    traces = TraceCache(1024)
+    after = QueryCache(memory, disk=SQLiteBackend(path, 1024))
+
+    assert await after.warm(max_bytes=1024, traces=traces) == 2
+    assert await memory.get("query_range_chunk:up") == b"[1]"
+    # Traces go to the trace cache only, not into the memory tier as well.
+    assert await memory.get("trace:abc") is None
+    assert traces.get("abc") == {"spans": 3}
+    assert await after.get_json("query_range_tail", "up") is None
+    assert await after.warm(max_bytes=1024) == 1
+    after.disk.close()
+
+
+@pytest.mark.asyncio
+async def test_trace_is_served_from_disk_after_restart(tmp_path, httpx_mock: HTTPXMock):
+    span = {"spanId": "a", "startTimeUnixNano": "0", "endTimeUnixNano": "1000"}
+    trace = {"batches": [{"scopeSpans": [{"spans": [span]}]}]}
+    httpx_mock.add_response(json=trace)
+    settings = Settings(CACHE_DISK_PATH=str(tmp_path / "cache.sqlite"))
+
+    assert await TempoClient(settings).fetch_trace_json("abc") == trace
+    close_query_cache()  # simulate a restart: memory tier is gone
+
+    assert await warm_query_cache(settings) == 1
+    assert await TempoClient(settings).fetch_trace_json("abc") == trace
+    assert len(httpx_mock.get_requests()) == 1
+    # Warmed straight into the trace cache: no lookup reaches the query cache.
+    assert get_trace_cache(settings).get("abc") == trace
+    assert get_query_cache(settings).stats["hits"] == 0
+    close_query_cache()
@@ -0,0 +1,155 @@
+import time
+
+import httpx
+import pytest
+from httpx import ASGITransport, AsyncClient
+from pytest_httpx import HTTPXMock
+
+from app.clients import LokiClient
+from app.config import get_settings
+from app.error_index import ErrorIndex, fingerprint, set_error_index
+from app.main import app
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+MINUTE = 60 * 10**9
+
+
+def test_variable_parts_share_a_fingerprint():
+    index = ErrorIndex()
+    now = time.time_ns()
+    index.observe("checkout", "payment 41 declined after 120ms", now - 30 * MINUTE)
+    index.observe("checkout", "payment 97 declined after 8ms", now - 2 * MINUTE)
+    index.observe("checkout", "db connection reset by 10.0.0.7:5432", now - MINUTE)
+    index.observe("cart", "db connection reset by 10.0.0.9:5432", now - MINUTE)
+
+    assert fingerprint("payment 1 declined after 2ms") == fingerprint(
+        "payment 3 declined after 4ms"
+    )
+    new = index.new_since(now - 5 * MINUTE)
+    assert {(e["service"], e["template"]) for e in new} == {
+        ("checkout", "db connection reset by <IP>"),
+        ("cart", "db connection reset by <IP>"),
+    }
+    assert index.new_since(now - 5 * MINUTE, service="cart")[0]["count"] == 1
+
+    payment = index.new_since(now - 60 * MINUTE, service="checkout")[-1]
+    assert payment["template"] == "payment <NUM> declined after <NUM>"
+    assert payment["count"] == 2
+    assert payment["first_seen"] == str(now - 30 * MINUTE)
+    assert payment["last_seen"] == str(now - 2 * MINUTE)
+    assert payment["sample"] == "payment 41 declined after 120ms"
+
+
+def test_late_lines_do_not_hide_newer_fingerprints():
+    index = ErrorIndex()
+    index.observe("checkout", "payment declined", 100)
+    index.observe("checkout", "cache miss storm", 90)  # re-read within the lag
+    index.observe("checkout", "tls handshake failed", 80)
+
+    assert [e["template"] for e in index.new_since(95)] == ["payment declined"]
+    assert [e["template"] for e in index.new_since(85)] == [
+        "payment declined",
+        "cache miss storm",
+    ]
+    # A late line moves a fingerprint's first sighting back.
+    index.observe("checkout", "payment declined", 70)
+    assert index.new_since(95) == []
+    assert [e["first_seen"] for e in index.new_since(0)] == ["90", "80", "70"]
+
+
+def test_fingerprints_are_bounded():
+    index = ErrorIndex(max_fingerprints=5)
+    now = time.time_ns()
+    for i in range(20):
+        index.observe("checkout", f"failure mode {'abcdefghijklmnopqrst'[i]}", now + i)
+
+    assert index.status()["fingerprints"] == 5
+    assert index.evicted == 15
+    assert len(index.new_since(0)) == 5
+
+
+def _loki(lines: list, windows: list):
+    """Answer forward range queries with the oldest *limit* lines in range."""
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        lower, upper = int(params["start"]), int(params["end"])
+        assert params["direction"] == "forward"
+        windows.append((lower, upper))
+        values = sorted(v for v in lines if lower <= int(v[0]) <= upper)
+        values = values[: int(params["limit"])]
+        stream = {"stream": {"service": "checkout"}, "values": values}
+        return httpx.Response(200, json={"data": {"result": [stream]}})
+
+    return respond
+
+
+@pytest.mark.asyncio
+async def test_polls_are_incremental(httpx_mock: HTTPXMock):
+    now = time.time_ns()
+    lines = [
+        [str(now - 3 * MINUTE), "timeout calling inventory"],
+        [str(now - 2 * MINUTE), "timeout calling inventory"],
+    ]
+    windows: list = []
+    httpx_mock.add_callback(_loki(lines, windows), is_reusable=True)
+    index = ErrorIndex(lag=30)
+
+    assert await index.poll(LokiClient(), 100, 3600, now_ns=now) == 2
+    assert windows == [(now - 3600 * 10**9, now)]
+    # A late line inside the lag margin and a new one; old lines not recounted.
+    lines.append([str(now - 2 * MINUTE + 10**9), "timeout calling inventory"])
+    lines.append([str(now + MINUTE), "timeout calling inventory"])
+    assert await index.poll(LokiClient(), 100, 3600, now_ns=now + 2 * MINUTE) == 2
+
+    assert windows[1][0] == now - 2 * MINUTE - 30 * 10**9
+    (record,) = index.new_since(0, service="checkout")
+    assert record["count"] == 4
+    assert index.status()["indexed_since"] == str(now - 3600 * 10**9)
+
+
+@pytest.mark.asyncio
+async def test_backlog_is_paged_forward_without_gaps(httpx_mock: HTTPXMock):
+    now = time.time_ns()
+    lines = [
+        [str(now - (50 - i) * MINUTE), f"failure mode {c}"]
+        for i, c in enumerate("abcdefg")
+    ]
+    windows: list = []
+    httpx_mock.add_callback(_loki(lines, windows), is_reusable=True)
+    index = ErrorIndex()
+
+    assert await index.poll(LokiClient(), 3, 3600, now_ns=now, max_pages=2) == 5
+    assert index.status()["truncated_polls"] == 1
+    assert await index.poll(LokiClient(), 3, 3600, now_ns=now, max_pages=2) == 2
+
+    assert len(index.new_since(now - 3600 * 10**9)) == 7
+    assert index.status()["indexed_since"] == str(now - 3600 * 10**9)
+    assert index.status()["truncated_polls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_new_errors_endpoint(monkeypatch: pytest.MonkeyPatch):
+    index = ErrorIndex()
+    now = time.time_ns()
+    index.observe("checkout", "cache miss storm", now - 60 * MINUTE)
+    index.observe("checkout", "tls handshake failed", now - MINUTE)
+    index.indexed_since = now - 120 * MINUTE
+    set_error_index(index)
+    monkeypatch.setenv("MCP_TOKEN", "tok")
+    get_settings.cache_clear()
+
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get(
+            "/logs/errors/new?service=checkout&since=15m",
+            headers={"Authorization": "Bearer tok"},
+        )
+
+    get_settings.cache_clear()
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] is True
+    assert [e["template"] for e in body["errors"]] == ["tls handshake failed"]
+    assert body["errors"][0]["recent_count"] == 1
@@ -0,0 +1,95 @@
+import asyncio
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from app.bulkhead import get_bulkhead
+from app.clients import TempoClient
+from app.config import Settings
+from app.hedging import Hedger, get_hedger
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+def _warm(hedger: Hedger, seconds: float = 0.01) -> None:
+    for _ in range(50):
+        hedger.record(seconds)
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_fast_answer_wins():
+    hedger = Hedger("test", percentile=0.9, min_delay=0.01)
+    _warm(hedger)
+    calls = []
+
+    async def attempt(base: str) -> str:
+        calls.append(base)
+        await asyncio.sleep(1 if base == "primary" else 0.01)
+        return base
+
+    assert await hedger.run(attempt, "primary", "replica") == "replica"
+    assert calls == ["primary", "replica"]
+    assert hedger.stats == {"sent": 1, "won": 1, "over_budget": 0}
+
+
+@pytest.mark.asyncio
+async def test_no_hedging_while_warming_up_or_over_budget():
+    hedger = Hedger("test", budget=0.0, min_delay=0.01)
+    hedger.tokens = 0
+
+    async def attempt(base: str) -> str:
+        await asyncio.sleep(0.03)
+        return base
+
+    assert await hedger.run(attempt, "primary") == "primary"  # no samples yet
+    _warm(hedger)
+    assert await hedger.run(attempt, "primary") == "primary"
+    assert hedger.stats == {"sent": 0, "won": 0, "over_budget": 1}
+
+
+@pytest.mark.asyncio
+async def test_tempo_trace_fetch_uses_alternate_replica(httpx_mock: HTTPXMock):
+    async def respond(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "tempo":
+            await asyncio.sleep(1)
+        return httpx.Response(200, json={"batches": [], "from": request.url.host})
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+    settings = Settings(
+        HEDGE_ENABLED=True, TEMPO_HEDGE_BASE_URL="http://tempo-replica:3200"
+    )
+    hedger = get_hedger("tempo", settings)
+    assert hedger is not None
+    _warm(hedger)
+
+    trace = await TempoClient(settings).fetch_trace_json("abc")
+
+    assert trace["from"] == "tempo-replica"
+    assert get_hedger("tempo", Settings()) is None
+
+
+@pytest.mark.asyncio
+async def test_hedge_takes_its_own_bulkhead_slot(httpx_mock: HTTPXMock):
+    settings = Settings(
+        HEDGE_ENABLED=True, TEMPO_HEDGE_BASE_URL="http://tempo-replica:3200"
+    )
+    bulkhead = get_bulkhead("tempo", settings)
+    assert bulkhead is not None
+    in_flight = []
+
+    async def respond(request: httpx.Request) -> httpx.Response:
+        in_flight.append(bulkhead.in_flight)
+        if request.url.host == "tempo":
+            await asyncio.sleep(1)
+        return httpx.Response(200, json={"batches": []})
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+    hedger = get_hedger("tempo", settings)
+    assert hedger is not None
+    _warm(hedger)
+
+    await TempoClient(settings).fetch_trace_json("abc")
+
+    assert in_flight == [1, 2]
+    assert bulkhead.in_flight == 0
@@ -0,0 +1,68 @@
+import pytest
+from pytest_httpx import HTTPXMock
+
+from app import clients
+from app.clients import (
+    LokiClient,
+    PrometheusClient,
+    TempoClient,
+    close_http_clients,
+    get_http_client,
+)
+from app.config import Settings
+from app.main import app
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+@pytest.mark.asyncio
+async def test_clients_share_one_pool_per_backend():
+    await close_http_clients()
+
+    first, second = LokiClient(), LokiClient()
+    assert first.http is second.http
+    assert PrometheusClient().http is not first.http
+    assert TempoClient().http is get_http_client("tempo")
+
+    await close_http_clients()
+
+
+@pytest.mark.asyncio
+async def test_pool_limits_come_from_settings():
+    await close_http_clients()
+    settings = Settings(HTTP_MAX_CONNECTIONS=7, HTTP_MAX_KEEPALIVE_CONNECTIONS=3)
+
+    http = get_http_client("loki", settings)
+    pool = http._transport._pool  # pyright: ignore[reportPrivateUsage]
+
+    assert pool._max_connections == 7
+    assert pool._max_keepalive_connections == 3
+
+    await close_http_clients()
+
+
+@pytest.mark.asyncio
+async def test_closed_pool_is_recreated(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(json={"data": {"result": []}})
+    await close_http_clients()
+
+    stale = get_http_client("loki")
+    await close_http_clients()
+    assert stale.is_closed
+
+    assert await LokiClient().fetch_error_logs(10) == []
+    assert get_http_client("loki") is not stale
+
+    await close_http_clients()
+
+
+@pytest.mark.asyncio
+async def test_lifespan_opens_and_closes_pools():
+    await close_http_clients()
+
+    async with app.router.lifespan_context(app):
+        assert set(clients._http_clients) == set(clients.BACKENDS)
+        opened = list(clients._http_clients.values())
+
+    assert clients._http_clients == {}
+    assert all(http.is_closed for http in opened)
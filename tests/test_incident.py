@@ -0,0 +1,118 @@
+import asyncio
+
+import httpx
+import pytest
+from httpx import ASGITransport, AsyncClient
+from pytest_httpx import HTTPXMock
+
+from app.clients import AlertManagerClient, LokiClient, PrometheusClient, TempoClient
+from app.config import get_settings
+from app.incident import build_incident, fit_bundle, gather_sections
+from app.main import app
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+def _backends(alerts_delay: float = 0.0):
+    async def respond(request: httpx.Request) -> httpx.Response:
+        host, path = request.url.host, request.url.path
+        if host == "loki":
+            lines = [["1718011900000000000", "payment declined"]]
+            return httpx.Response(200, json={"data": {"result": [{"values": lines}]}})
+        if host == "prometheus":
+            values = [[1718011800, "0.2"], [1718011860, "NaN"], [1718011920, "1.5"]]
+            result = [{"metric": {}, "values": values}]
+            return httpx.Response(200, json={"data": {"result": result}})
+        if host == "alertmanager":
+            await asyncio.sleep(alerts_delay)
+            alert = {"labels": {"alertname": "HighLatency", "service": "checkout"}}
+            return httpx.Response(200, json=[alert])
+        if path == "/api/search":
+            hit = {"traceID": "a1", "startTimeUnixNano": "1718011900000000000"}
+            return httpx.Response(200, json={"traces": [hit]})
+        span = {"spanId": "s1", "startTimeUnixNano": "0", "endTimeUnixNano": "9000000"}
+        return httpx.Response(
+            200, json={"batches": [{"scopeSpans": [{"spans": [span]}]}]}
+        )
+
+    return respond
+
+
+@pytest.mark.asyncio
+async def test_incident_bundle_gathers_all_sections(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    httpx_mock.add_callback(_backends(), is_reusable=True)
+    monkeypatch.setenv("MCP_TOKEN", "tok")
+    get_settings.cache_clear()
+
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get(
+            "/incident?service=checkout&range=15m&end=1718012000",
+            headers={"Authorization": "Bearer tok"},
+        )
+
+    get_settings.cache_clear()
+    assert response.status_code == 200
+    sections = response.json()["sections"]
+    assert {s["status"] for s in sections.values()} == {"ok"}
+    assert sections["error_logs"]["logs"][0]["line"] == "payment declined"
+    assert sections["latency"]["max_seconds"] == 1.5
+    assert sections["latency"]["series"][1][1] is None  # NaN is not valid JSON
+    assert sections["alerts"]["alerts"][0]["alertname"] == "HighLatency"
+    assert sections["traces"]["traces"][0]["trace_id"] == "a1"
+    assert sections["traces"]["summaries"][0]["duration_ms"] == 9.0
+    assert all(s["elapsed_ms"] >= 0 for s in sections.values())
+
+
+@pytest.mark.asyncio
+async def test_slow_backend_times_out_without_failing_the_bundle(
+    httpx_mock: HTTPXMock,
+):
+    httpx_mock.add_callback(_backends(alerts_delay=1.0), is_reusable=True)
+    bundle = await build_incident(
+        LokiClient(),
+        PrometheusClient(),
+        TempoClient(),
+        AlertManagerClient(),
+        "checkout",
+        1718011100,
+        1718012000,
+        timeout=0.2,
+    )
+
+    sections = bundle["sections"]
+    assert sections["alerts"]["status"] == "timeout"
+    assert sections["error_logs"]["status"] == "ok"
+    assert sections["traces"]["status"] == "ok"
+    assert bundle["elapsed_ms"] < 1000
+
+
+@pytest.mark.asyncio
+async def test_unexpected_section_error_is_reported_not_raised():
+    async def broken(data: dict) -> None:
+        data["partial"] = True
+        raise KeyError("values")
+
+    async def fine(data: dict) -> None:
+        data["alerts"] = []
+
+    results = await gather_sections({"latency": broken, "alerts": fine}, 1.0)
+
+    assert results["latency"]["status"] == "error"
+    assert results["latency"]["error"] == "KeyError: 'values'"
+    assert results["latency"]["partial"] is True
+    assert results["alerts"]["status"] == "ok"
+
+
+def test_bundle_is_trimmed_to_max_bytes():
+    logs = [{"timestamp": str(i), "line": "x" * 200} for i in range(100)]
+    bundle = {"sections": {"error_logs": {"status": "ok", "logs": logs}}}
+
+    fit_bundle(bundle, 5000)
+
+    section = bundle["sections"]["error_logs"]
+    assert section["truncated"] is True
+    assert 0 < len(section["logs"]) < 100
+    assert section["logs"][-1]["timestamp"] == "99"  # newest lines kept
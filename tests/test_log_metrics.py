@@ -0,0 +1,98 @@
+import httpx
+import pytest
+from httpx import ASGITransport, AsyncClient
+from pytest_httpx import HTTPXMock
+
+from app.config import get_settings
+from app.main import app
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+async def _get(monkeypatch: pytest.MonkeyPatch, url: str) -> httpx.Response:
+    monkeypatch.setenv("MCP_TOKEN", "tok")
+    get_settings.cache_clear()
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get(url, headers={"Authorization": "Bearer tok"})
+    get_settings.cache_clear()
+    return response
+
+
+@pytest.mark.asyncio
+async def test_error_rate_is_counted_by_loki(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    vector = [
+        {"metric": {"service": "checkout"}, "value": [1718012000, "7200"]},
+        {"metric": {"service": "cart"}, "value": [1718012000, "36"]},
+    ]
+    httpx_mock.add_response(json={"data": {"resultType": "vector", "result": vector}})
+
+    response = await _get(monkeypatch, "/logs/rate?range=1h&top=5&end=1718012000")
+
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"service": "checkout", "count": 7200.0, "per_second": 2.0},
+        {"service": "cart", "count": 36.0, "per_second": 0.01},
+    ]
+    request = httpx_mock.get_request()
+    assert request.url.path == "/loki/api/v1/query"
+    assert request.url.params["query"] == (
+        'topk(5, sum by (service) (count_over_time({level="error"} [1h])))'
+    )
+    assert request.url.params["time"] == "1718012000000000000"
+
+
+@pytest.mark.asyncio
+async def test_error_rate_series_per_step(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    matrix = [
+        {
+            "metric": {"service": "checkout"},
+            "values": [[1718011200, "3"], [1718011800, "5"]],
+        }
+    ]
+    httpx_mock.add_response(json={"data": {"resultType": "matrix", "result": matrix}})
+
+    response = await _get(
+        monkeypatch,
+        "/logs/rate?service=checkout&query=timeout&range=1h&step=10m&end=1718012000",
+    )
+
+    assert response.status_code == 200
+    (series,) = response.json()["series"]
+    assert series == {
+        "service": "checkout",
+        "total": 8.0,
+        "values": [[1718011200, 3.0], [1718011800, 5.0]],
+    }
+    params = httpx_mock.get_request().url.params
+    assert params["query"] == (
+        "sum by (service) "
+        '(count_over_time({level="error",service="checkout"} |= "timeout" [10m]))'
+    )
+    assert (params["start"], params["end"], params["step"]) == (
+        "1718008200000000000",
+        "1718011800000000000",
+        "600",
+    )
+
+
+@pytest.mark.asyncio
+async def test_log_volume_in_bytes_by_label(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    vector = [{"metric": {"level": "info"}, "value": [1718012000, "1048576"]}]
+    httpx_mock.add_response(json={"data": {"resultType": "vector", "result": vector}})
+
+    response = await _get(
+        monkeypatch, "/logs/volume?by=level&service=checkout&unit=bytes&range=6h"
+    )
+
+    assert response.status_code == 200
+    assert response.json()["results"] == [{"level": "info", "value": 1048576.0}]
+    assert httpx_mock.get_request().url.params["query"] == (
+        'topk(10, sum by (level) (bytes_over_time({service="checkout"} [6h])))'
+    )
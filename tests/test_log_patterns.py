@@ -0,0 +1,98 @@
+import time
+
+import httpx
+import pytest
+from httpx import ASGITransport, AsyncClient
+from pytest_httpx import HTTPXMock
+
+from app.config import get_settings
+from app.log_patterns import TemplateMiner, mine_templates
+from app.main import app
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+def test_miner_folds_variables_into_templates():
+    entries = [
+        {"timestamp": str(100 + i), "line": f"payment {i} declined after {i * 7}ms"}
+        for i in range(50)
+    ]
+    entries.append({"timestamp": "90", "line": "db connection reset"})
+
+    summary = mine_templates(entries)
+
+    assert summary["lines"] == 51
+    assert summary["clusters"] == 2
+    payment = summary["patterns"][0]
+    assert payment["template"] == "payment <NUM> declined after <NUM>"
+    assert payment["count"] == 50
+    assert (payment["first_seen"], payment["last_seen"]) == ("100", "149")
+    assert payment["sample"] == "payment 0 declined after 0ms"
+    assert summary["patterns"][1]["template"] == "db connection reset"
+
+
+def test_differing_words_become_wildcards():
+    miner = TemplateMiner()
+    miner.add("login failed for alice from web")
+    miner.add("login failed for bob from web")
+
+    assert [t["template"] for t in miner.templates()] == [
+        "login failed for <*> from web"
+    ]
+
+
+def test_cluster_count_is_bounded():
+    miner = TemplateMiner(max_clusters=10)
+    for i in range(200):
+        miner.add(f"{'abcdefghijklmnopqrstuvwxyz'[i % 26]}{i // 26} failed")
+        miner.add(f"distinct{'x' * (i % 40)} failure mode {'y' * (i % 7)}")
+
+    summary = miner.summary()
+    assert summary["clusters"] <= 10
+    assert summary["evicted"] > 0
+    assert summary["lines"] == 400
+
+
+@pytest.mark.asyncio
+async def test_patterns_endpoint_and_summarized_errors(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    now = time.time_ns()
+    values = [
+        [str(now - 10**9 + i), f"timeout calling inventory after {i}s"]
+        for i in range(20)
+    ]
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        lower, upper = int(params.get("start", 0)), int(params.get("end", now))
+        shard = [v for v in values if lower <= int(v[0]) <= upper]
+        return httpx.Response(200, json={"data": {"result": [{"values": shard}]}})
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+    monkeypatch.setenv("MCP_TOKEN", "tok")
+    get_settings.cache_clear()
+
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers = {"Authorization": "Bearer tok"}
+        patterns = await ac.get(
+            "/logs/patterns?service=checkout&range=1h&limit=20000", headers=headers
+        )
+        summarized = await ac.get(
+            "/logs/errors?limit=20&summarize=true", headers=headers
+        )
+
+    get_settings.cache_clear()
+    assert patterns.status_code == 200
+    assert patterns.json()["patterns"][0] == {
+        "template": "timeout calling inventory after <NUM>",
+        "count": 20,
+        "first_seen": values[0][0],
+        "last_seen": values[-1][0],
+        "sample": "timeout calling inventory after 0s",
+    }
+    assert summarized.json()["patterns"][0]["count"] == 20
+    # Limits above Loki's per-query maximum are capped per request.
+    limits = {r.url.params["limit"] for r in httpx_mock.get_requests()}
+    assert max(int(v) for v in limits) <= 5000
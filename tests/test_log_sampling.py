@@ -0,0 +1,148 @@
+import random
+
+import httpx
+import pytest
+from httpx import ASGITransport, AsyncClient
+from pytest_httpx import HTTPXMock
+
+from app.config import get_settings
+from app.loki_stream import StratifiedSample
+from app.main import app
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+def _stream(service: str, count: int, start: int = 0) -> dict:
+    values = [[str(start + i), f"{service} error {i}"] for i in range(count)]
+    return {"stream": {"service": service}, "values": values}
+
+
+def test_noisy_stream_does_not_crowd_out_the_others():
+    sample = StratifiedSample(30, rng=random.Random(7))
+    sample.add_stream(_stream("noisy", 10_000))
+    sample.add_stream(_stream("cart", 5))
+    sample.add_stream(_stream("auth", 8))
+
+    entries = sample.entries()
+    assert len(entries) == 30
+    assert [int(e["timestamp"]) for e in entries] == sorted(
+        int(e["timestamp"]) for e in entries
+    )
+    strata = {s["labels"]["service"]: s for s in sample.strata()}
+    assert {k: s["total"] for k, s in strata.items()} == {
+        "noisy": 10_000,
+        "cart": 5,
+        "auth": 8,
+    }
+    assert sum(s["sampled"] for s in strata.values()) == 30
+    assert strata["cart"]["sampled"] >= 3
+    assert strata["auth"]["sampled"] >= 3
+
+
+def test_bucket_reservoirs_merge_into_one_sample():
+    merged = StratifiedSample(10, rng=random.Random(1))
+    for bucket in range(3):
+        part = StratifiedSample(10, bucket, rng=random.Random(bucket))
+        part.add_stream(_stream("checkout", 100, start=bucket * 1000))
+        merged.merge(part)
+
+    assert len(merged.entries()) == 10
+    strata = merged.strata()
+    assert sorted(s["bucket"] for s in strata) == [0, 1, 2]
+    assert all(s["total"] == 100 and s["sampled"] >= 1 for s in strata)
+
+
+@pytest.mark.asyncio
+async def test_stratified_error_logs_read_every_stream(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    counts = [
+        {"metric": {"level": "error", "service": s}, "value": [1718012000, n]}
+        for s, n in (("noisy", "50000"), ("cart", "2"))
+    ]
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        if request.url.path.endswith("/query"):
+            assert params["query"].startswith('count_over_time({level="error"} [')
+            return httpx.Response(200, json={"data": {"result": counts}})
+        lower = int(params["start"])
+        if 'service="cart"' in params["query"]:
+            stream = _stream("cart", 2, lower)
+        else:
+            stream = _stream("noisy", int(params["limit"]), lower + 10)
+        stream["stream"]["level"] = "error"
+        return httpx.Response(200, json={"data": {"result": [stream]}})
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+    monkeypatch.setenv("MCP_TOKEN", "tok")
+    # The reservoir only makes a quiet stream *likely* to survive a noisy one;
+    # seed it so the test does not depend on the draw.
+    unpatched = random.Random
+    monkeypatch.setattr("app.loki_stream.random.Random", lambda: unpatched(0))
+    get_settings.cache_clear()
+
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get(
+            "/logs/errors?limit=50&range=6h&sample=stratified&detailed=true",
+            headers={"Authorization": "Bearer tok"},
+        )
+
+    get_settings.cache_clear()
+    assert response.status_code == 200
+    body = response.json()
+    reads = [r for r in httpx_mock.get_requests() if "query_range" in r.url.path]
+    # The noisy stream is read per bucket, the quiet one in a single request.
+    queries = [r.url.params["query"] for r in reads]
+    assert queries.count('{level="error",service="cart"}') == 1
+    assert queries.count('{level="error",service="noisy"}') == len(body["buckets"])
+    assert len(body["buckets"]) >= 6
+    assert {r.url.params["limit"] for r in reads} == {"1000"}
+    assert len(body["logs"]) == 50
+    cart = [e for e in body["logs"] if e["labels"]["service"] == "cart"]
+    assert len(cart) == 2
+    streams = {s["labels"]["service"]: s for s in body["streams"]}
+    assert streams["cart"] == {
+        "labels": {"level": "error", "service": "cart"},
+        "total": 2,
+        "read": 2,
+        "sampled": 2,
+        "truncated": False,
+    }
+    assert streams["noisy"]["total"] == 50000
+    assert streams["noisy"]["read"] == 1000 * len(body["buckets"])
+    assert streams["noisy"]["truncated"] is True
+
+
+@pytest.mark.asyncio
+async def test_stratified_sample_is_served_from_the_cache(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    counts = [{"metric": {"level": "error", "service": "cart"}, "value": [0, "2"]}]
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/query"):
+            return httpx.Response(200, json={"data": {"result": counts}})
+        stream = _stream("cart", 2, int(request.url.params["start"]))
+        return httpx.Response(200, json={"data": {"result": [stream]}})
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+    monkeypatch.setenv("MCP_TOKEN", "tok")
+    get_settings.cache_clear()
+
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        bodies = [
+            (
+                await ac.get(
+                    "/logs/errors?limit=10&range=1h&sample=stratified",
+                    headers={"Authorization": "Bearer tok"},
+                )
+            ).json()
+            for _ in range(2)
+        ]
+
+    get_settings.cache_clear()
+    assert bodies[0] == bodies[1]
+    assert len(httpx_mock.get_requests()) == 2
@@ -66,7 +66,8 @@ async def test_fetch_error_logs_loki_unavailable(httpx_mock: HTTPXMock):
     import httpx
 
     httpx_mock.add_exception(
-        ConnectError("conn", request=httpx.Request("GET", "http://loki"))
+        ConnectError("conn", request=httpx.Request("GET", "http://loki")),
+        is_reusable=True,  # still down when the request is retried
     )
 
     client = LokiClient()
@@ -24,7 +24,8 @@ async def test_search_logs(httpx_mock: HTTPXMock):
 @pytest.mark.asyncio
 async def test_search_logs_loki_unavailable(httpx_mock: HTTPXMock):
     httpx_mock.add_exception(
-        ConnectError("conn", request=httpx.Request("GET", "http://loki"))
+        ConnectError("conn", request=httpx.Request("GET", "http://loki")),
+        is_reusable=True,  # still down when the request is retried
     )
 
     client = LokiClient()
@@ -0,0 +1,98 @@
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from app.clients import LokiClient
+from app.config import Settings
+from app.timeutil import parse_duration, split_time_range
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+def test_parse_duration():
+    assert parse_duration("5m") == 300
+    assert parse_duration("1h30m") == 5400
+    assert parse_duration("250ms") == 0.25
+    with pytest.raises(ValueError):
+        parse_duration("5 minutes")
+
+
+def test_split_time_range_is_aligned_and_newest_first():
+    assert split_time_range(5, 35, 10) == [(30, 35), (20, 30), (10, 20), (5, 10)]
+    assert split_time_range(10, 10, 10) == []
+
+
+def _shard_responder(lines_per_shard: int):
+    """Return one stream per shard with lines stamped inside the shard window."""
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        end = int(request.url.params["end"])
+        values = [
+            [str(end - i - 1), f"line@{end - i - 1}"] for i in range(lines_per_shard)
+        ]
+        return httpx.Response(
+            200, json={"data": {"result": [{"stream": {}, "values": values}]}}
+        )
+
+    return respond
+
+
+@pytest.mark.asyncio
+async def test_range_query_is_split_into_concurrent_shards(httpx_mock: HTTPXMock):
+    httpx_mock.add_callback(_shard_responder(2), is_reusable=True)
+    client = LokiClient(Settings(LOKI_SHARD_SECONDS=3600))
+
+    entries = await client.fetch_error_entries(100, "checkout", "3h")
+
+    requests = httpx_mock.get_requests()
+    assert 3 <= len(requests) <= 4
+    assert all(r.url.path == "/loki/api/v1/query_range" for r in requests)
+    assert requests[0].url.params["query"] == '{level="error",service="checkout"}'
+    timestamps = [int(e["timestamp"]) for e in entries]
+    assert timestamps == sorted(timestamps)
+    assert len(entries) == 2 * len(requests)
+
+
+@pytest.mark.asyncio
+async def test_range_query_stops_once_newest_shards_fill_limit(httpx_mock: HTTPXMock):
+    httpx_mock.add_callback(_shard_responder(5), is_reusable=True)
+    client = LokiClient(Settings(LOKI_SHARD_SECONDS=3600, LOKI_SHARD_CONCURRENCY=1))
+
+    logs = await client.fetch_error_logs(5, None, "24h")
+
+    assert len(httpx_mock.get_requests()) == 1
+    assert len(logs) == 5
+
+
+@pytest.mark.asyncio
+async def test_shard_count_is_capped(httpx_mock: HTTPXMock):
+    httpx_mock.add_callback(_shard_responder(0), is_reusable=True)
+    client = LokiClient(Settings(LOKI_SHARD_SECONDS=60, LOKI_MAX_SHARDS=4))
+
+    assert await client.search_logs("timeout", None, "1h") == []
+    assert len(httpx_mock.get_requests()) <= 5
+
+
+@pytest.mark.asyncio
+async def test_dense_burst_shards_are_split_until_limit_is_met(httpx_mock: HTTPXMock):
+    end = 10 * 3600 * 10**9
+    start = end - 3600 * 10**9
+    # 300 lines within the last second: far denser than the shard sizing assumes.
+    burst = [end - 10**9 + i * 10**6 for i in range(300)]
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        lower, upper = int(params["start"]), int(params["end"])
+        inside = [ts for ts in burst if lower <= ts < upper]
+        values = [[str(ts), f"line@{ts}"] for ts in inside[-int(params["limit"]) :]]
+        return httpx.Response(
+            200, json={"data": {"result": [{"stream": {}, "values": values[::-1]}]}}
+        )
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+    client = LokiClient(Settings(LOKI_MAX_ENTRIES_PER_QUERY=50, CACHE_ENABLED=False))
+
+    entries = await client.query_window("{}", start, end, limit=200)
+
+    assert [int(e["timestamp"]) for e in entries] == burst[-200:]
+    assert all(int(r.url.params["limit"]) <= 50 for r in httpx_mock.get_requests())
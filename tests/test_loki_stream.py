@@ -0,0 +1,117 @@
+import json
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from pytest_httpx import HTTPXMock
+
+from app.clients import LokiClient
+from app.config import get_settings
+from app.loki_stream import LokiFormatError, NewestEntries, iter_result_items
+from app.main import app
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+STREAMS = {
+    "status": "success",
+    "data": {
+        "resultType": "streams",
+        "result": [
+            {
+                "stream": {"service": "checkout"},
+                "values": [["50", "checkout 50"], ["30", "checkout 30"]],
+            },
+            {
+                "stream": {"service": "payments"},
+                "values": [["60", "payments 60"], ["40", "payments 40"]],
+            },
+            {
+                "stream": {"service": "cart"},
+                "values": [["10", "cart 10"], ["20", "cart 20"]],  # ascending
+            },
+        ],
+    },
+}
+
+
+async def _chunks(text: str, size: int):
+    for i in range(0, len(text), size):
+        yield text[i : i + size]
+
+
+@pytest.mark.asyncio
+async def test_iter_result_items_parses_across_chunk_boundaries():
+    body = json.dumps(STREAMS)
+
+    items = [item async for item in iter_result_items(_chunks(body, 7))]
+
+    assert items == STREAMS["data"]["result"]
+
+
+@pytest.mark.asyncio
+async def test_iter_result_items_handles_brackets_and_escapes_in_strings():
+    result = [
+        {"stream": {"pod": 'a"]}'}, "values": [["1", 'quote \\" and {[ \\']]},
+        {"stream": {}, "values": []},
+    ]
+    body = json.dumps({"data": {"result": result}})
+
+    for size in (1, 2, 3, 5):
+        items = [item async for item in iter_result_items(_chunks(body, size))]
+        assert items == result
+
+
+@pytest.mark.asyncio
+async def test_iter_result_items_rejects_missing_result():
+    with pytest.raises(LokiFormatError):
+        _ = [i async for i in iter_result_items(_chunks('{"data": {}}', 4))]
+
+
+def test_newest_entries_merges_streams_by_timestamp():
+    merged = NewestEntries(limit=3)
+    for stream in STREAMS["data"]["result"]:
+        merged.add_stream(stream)
+
+    entries = merged.entries()
+
+    assert [e["line"] for e in entries] == ["payments 40", "checkout 50", "payments 60"]
+    assert entries[0] == {
+        "timestamp": "40",
+        "labels": {"service": "payments"},
+        "line": "payments 40",
+    }
+
+
+@pytest.mark.asyncio
+async def test_loki_client_returns_latest_lines_in_time_order(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(json=STREAMS)
+
+    logs = await LokiClient().fetch_error_logs(4)
+
+    assert logs == ["checkout 30", "payments 40", "checkout 50", "payments 60"]
+
+
+@pytest.mark.asyncio
+async def test_detailed_error_logs_endpoint(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    httpx_mock.add_response(json=STREAMS)
+    monkeypatch.setenv("MCP_TOKEN", "testtoken")
+    get_settings.cache_clear()
+
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get(
+            "/logs/errors?limit=1&detailed=true",
+            headers={"Authorization": "Bearer testtoken"},
+        )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "logs": [
+            {
+                "timestamp": "60",
+                "labels": {"service": "payments"},
+                "line": "payments 60",
+            }
+        ]
+    }
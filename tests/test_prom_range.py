@@ -0,0 +1,137 @@
+import time
+
+import httpx
+import pytest
+from httpx import ASGITransport, AsyncClient
+from pytest_httpx import HTTPXMock
+
+from app.clients import PrometheusClient
+from app.config import get_settings
+from app.main import app
+from app.prom_range import (
+    align_range,
+    chunk_interval,
+    merge_matrices,
+    split_chunks,
+    trim_matrix,
+)
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+def test_alignment_and_chunking():
+    assert align_range(1001, 7259, 60) == (960, 7200)
+    assert chunk_interval(0, 6 * 3600, 60) == 3600
+    assert chunk_interval(0, 3 * 86400, 60) == 86400
+    assert chunk_interval(0, 3600, 7 * 60) == 3780  # rounded up to a step multiple
+    assert split_chunks(960, 7200, 3600) == [(0, 3600), (3600, 7200), (7200, 10800)]
+
+
+def test_merge_and_trim_matrices():
+    first = [{"metric": {"job": "api"}, "values": [[0, "1"], [60, "2"]]}]
+    second = [
+        {"metric": {"job": "api"}, "values": [[120, "3"]]},
+        {"metric": {"job": "db"}, "values": [[120, "9"]]},
+    ]
+
+    merged = merge_matrices([first, second])
+
+    assert merged[0]["values"] == [[0, "1"], [60, "2"], [120, "3"]]
+    assert trim_matrix(merged, 60, 100) == [
+        {"metric": {"job": "api"}, "values": [[60, "2"]]}
+    ]
+
+
+def _matrix_responder(request: httpx.Request) -> httpx.Response:
+    start = float(request.url.params["start"])
+    end = float(request.url.params["end"])
+    step = float(request.url.params["step"])
+    values = []
+    t = start
+    while t <= end:
+        values.append([t, "1"])
+        t += step
+    return httpx.Response(
+        200,
+        json={
+            "data": {
+                "resultType": "matrix",
+                "result": [{"metric": {}, "values": values}],
+            }
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_closed_chunks_are_served_from_cache(httpx_mock: HTTPXMock):
+    httpx_mock.add_callback(_matrix_responder, is_reusable=True)
+    end = 1_700_000_000.0
+    client = PrometheusClient()
+
+    first = await client.query_range("up", end - 3 * 3600, end, 60)
+    fetched = len(httpx_mock.get_requests())
+    second = await client.query_range("up", end - 3 * 3600, end, 60)
+
+    assert fetched == 4
+    assert len(httpx_mock.get_requests()) == fetched
+    assert first == second
+    samples = first[0]["values"]
+    assert len(samples) == 3 * 60 + 1
+    assert samples[0][0] == 1_699_989_180.0 and samples[-1][0] == 1_699_999_980.0
+
+
+@pytest.mark.asyncio
+async def test_repeat_query_ending_now_only_fetches_open_chunk(httpx_mock: HTTPXMock):
+    httpx_mock.add_callback(_matrix_responder, is_reusable=True)
+    client = PrometheusClient()
+
+    await client.query_range("up", time.time() - 6 * 3600, time.time(), 60)
+    fetched = len(httpx_mock.get_requests())
+    await client.query_range("up", time.time() - 6 * 3600, time.time(), 60)
+
+    assert fetched >= 6
+    # The open chunk (plus one more right after an hour boundary) is refetched.
+    assert len(httpx_mock.get_requests()) - fetched <= 2
+
+
+@pytest.mark.asyncio
+async def test_query_range_endpoint_rejects_too_many_points(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setenv("MCP_TOKEN", "testtoken")
+    get_settings.cache_clear()
+
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post(
+            "/metrics/query_range",
+            json={"query": "up", "range": "30d", "step": "1s"},
+            headers={"Authorization": "Bearer testtoken"},
+        )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_only_fetches_new_tail(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    httpx_mock.add_callback(_matrix_responder, is_reusable=True)
+    now = 1_700_000_000.0
+    monkeypatch.setattr(time, "time", lambda: now)
+    client = PrometheusClient()
+
+    await client.query_range("up", now - 3600, now, 60)
+    fetched = len(httpx_mock.get_requests())
+
+    now += 60
+    matrix = await client.query_range("up", now - 3600, now, 60)
+
+    tail = httpx_mock.get_requests()[fetched:]
+    assert len(tail) == 1
+    # Everything up to the last sealed sample (now - freshness) was reused.
+    assert float(tail[0].url.params["start"]) == 1_699_999_920.0 + 60
+    samples = [v[0] for v in matrix[0]["values"]]
+    assert samples[0] == 1_699_996_440.0  # aged-out samples dropped
+    assert samples[-1] == 1_700_000_040.0
+    assert len(samples) == 61
@@ -0,0 +1,80 @@
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from pytest_httpx import HTTPXMock
+
+from app.clients import LokiClient, PrometheusClient
+from app.config import Settings
+from app.retry import RetryPolicy, UpstreamError, parse_retry_after
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+LOKI_OK = {"data": {"result": [{"values": [["1", "recovered"]]}]}}
+
+
+@pytest.mark.asyncio
+async def test_transient_503_is_retried(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(status_code=503)
+    httpx_mock.add_response(json=LOKI_OK)
+
+    logs = await LokiClient(Settings(RETRY_BASE_DELAY=0.01)).fetch_error_logs(10)
+
+    assert logs == ["recovered"]
+    assert len(httpx_mock.get_requests()) == 2
+
+
+@pytest.mark.asyncio
+async def test_non_transient_status_is_not_retried(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(status_code=500, is_reusable=True)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await PrometheusClient().execute_promql("up")
+
+    assert exc_info.value.status_code == 502
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(status_code=429, headers={"Retry-After": "0.2"})
+    httpx_mock.add_response(json={"data": {"result": []}})
+
+    started = time.monotonic()
+    assert await PrometheusClient().execute_promql("up") == []
+    assert time.monotonic() - started >= 0.2
+
+    # A Retry-After beyond RETRY_MAX_DELAY is passed on instead of waited for.
+    httpx_mock.add_response(status_code=503, headers={"Retry-After": "120"})
+    with pytest.raises(UpstreamError) as exc_info:
+        await PrometheusClient().execute_promql("rate(x[5m])")
+    assert exc_info.value.headers == {"Retry-After": "120"}
+    assert len(httpx_mock.get_requests()) == 3
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_caps_retries():
+    policy = RetryPolicy("test", max_attempts=5, base_delay=0, budget=0.5)
+    policy.tokens = 0
+    calls = 0
+
+    async def down() -> None:
+        nonlocal calls
+        calls += 1
+        raise httpx.ConnectError("down")
+
+    for _ in range(4):
+        with pytest.raises(httpx.ConnectError):
+            await policy.run(down)
+
+    # Four calls earned two tokens: two retries, the rest over budget.
+    assert policy.stats["retried"] == 2
+    assert calls == 6
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
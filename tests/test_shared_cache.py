@@ -0,0 +1,164 @@
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+from app.cache import MemoryBackend, QueryCache
+from app.deadline import call_timeout, request_deadline
+from app.redis_cache import RedisBackend
+
+
+class _RespStandIn:
+    """Tiny in-process server speaking enough RESP for the shared cache."""
+
+    def __init__(self):
+        self.data: dict[bytes, tuple[bytes, float]] = {}
+        self.commands: list[str] = []
+
+    def _live(self, key: bytes) -> bytes | None:
+        entry = self.data.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            self.data.pop(key, None)
+            return None
+        return entry[0]
+
+    def _run(self, args: list[bytes]) -> bytes:
+        name = args[0].decode().upper()
+        self.commands.append(name)
+        if name == "GET":
+            value = self._live(args[1])
+            return (
+                b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+            )
+        if name == "SET":
+            options = [a.decode().upper() for a in args[3:]]
+            if "NX" in options and self._live(args[1]) is not None:
+                return b"$-1\r\n"
+            ttl = int(options[options.index("PX") + 1]) / 1000
+            self.data[args[1]] = (args[2], time.monotonic() + ttl)
+            return b"+OK\r\n"
+        if name == "EVAL":  # only the lock-release compare-and-delete
+            held = self._live(args[3]) == args[4]
+            if held:
+                del self.data[args[3]]
+            return b":%d\r\n" % held
+        if name == "EXISTS":
+            return b":%d\r\n" % (self._live(args[1]) is not None)
+        return b"-ERR unknown command\r\n"
+
+    async def handle(self, reader, writer):
+        while line := await reader.readline():
+            args = []
+            for _ in range(int(line[1:])):
+                size = int((await reader.readline())[1:])
+                args.append((await reader.readexactly(size + 2))[:-2])
+            writer.write(self._run(args))
+            await writer.drain()
+        writer.close()
+
+
+@pytest_asyncio.fixture
+async def resp_server():
+    stand_in = _RespStandIn()
+    server = await asyncio.start_server(stand_in.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    stand_in.url = f"redis://127.0.0.1:{port}/0"
+    yield stand_in
+    server.close()
+
+
+def _replica(url: str) -> QueryCache:
+    return QueryCache(
+        MemoryBackend(1024), shared=RedisBackend(url), lock_poll_interval=0.01
+    )
+
+
+@pytest.mark.asyncio
+async def test_replicas_share_results(resp_server):
+    first, second = _replica(resp_server.url), _replica(resp_server.url)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return ["line"]
+
+    assert await first.get_or_fetch("search_logs", "q", fetch) == ["line"]
+    assert await second.get_or_fetch("search_logs", "q", fetch) == ["line"]
+    assert calls == 1
+    assert second.stats["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_only_one_replica_runs_a_concurrent_query(resp_server):
+    replicas = [_replica(resp_server.url) for _ in range(3)]
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"value": 1}
+
+    results = await asyncio.gather(
+        *(r.get_or_fetch("promql", "up", fetch) for r in replicas)
+    )
+
+    assert results == [{"value": 1}] * 3
+    assert calls == 1
+    assert sum(r.shared_waits for r in replicas) == 2
+    assert not any(key.startswith(b"mcp-obs:lock:") for key in resp_server.data)
+
+
+@pytest.mark.asyncio
+async def test_unreachable_shared_tier_degrades_to_local_cache():
+    cache = _replica("redis://127.0.0.1:1/0")
+
+    async def fetch():
+        return [1]
+
+    assert await cache.get_or_fetch("promql", "up", fetch) == [1]
+    assert await cache.get_or_fetch("promql", "up", fetch) == [1]
+    assert cache.stats["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lock_wait_is_bounded_by_the_callers_deadline(resp_server):
+    leader, follower = _replica(resp_server.url), _replica(resp_server.url)
+
+    async def slow():
+        await asyncio.sleep(0.5)
+        return [1]
+
+    async def fetch():
+        call_timeout(5.0, "loki")  # what every backend call checks first
+        return [2]
+
+    leading = asyncio.ensure_future(leader.get_or_fetch("promql", "up", slow))
+    await asyncio.sleep(0.05)
+    started = time.monotonic()
+    with request_deadline(0.1), pytest.raises(HTTPException) as exc_info:
+        await follower.get_or_fetch("promql", "up", fetch)
+
+    assert exc_info.value.status_code == 504
+    assert time.monotonic() - started < 0.3
+    assert await leading == [1]
+
+
+@pytest.mark.asyncio
+async def test_expired_lock_holder_does_not_release_the_next_lock(resp_server):
+    first, second = RedisBackend(resp_server.url), RedisBackend(resp_server.url)
+
+    stale = await first.acquire("lock:q", 0.02)
+    await asyncio.sleep(0.05)  # the first leader overran its lock
+    fresh = await second.acquire("lock:q", 5)
+    assert stale is not None and fresh is not None
+
+    await first.release("lock:q", stale)
+    assert await second.locked("lock:q")
+    await second.release("lock:q", fresh)
+    assert not await second.locked("lock:q")
+    first.close()
+    second.close()
@@ -0,0 +1,68 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from pytest_httpx import HTTPXMock
+
+from app.clients import LokiClient
+from app.singleflight import SingleFlight, get_flight_group
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_queries_share_one_request(httpx_mock: HTTPXMock):
+    async def slow_loki(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.05)
+        return httpx.Response(
+            200, json={"data": {"result": [{"values": [["1", "x"]]}]}}
+        )
+
+    httpx_mock.add_callback(slow_loki)
+    before = get_flight_group("loki").coalesced
+
+    results = await asyncio.gather(
+        *(LokiClient().fetch_error_logs(10, "checkout") for _ in range(5))
+    )
+
+    assert results == [["x"]] * 5
+    assert len(httpx_mock.get_requests()) == 1
+    assert get_flight_group("loki").coalesced - before == 4
+
+
+@pytest.mark.asyncio
+async def test_waiters_receive_the_shared_error():
+    group = SingleFlight("test")
+    calls = 0
+
+    async def failing() -> None:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise HTTPException(status_code=502, detail="Loki returned 503")
+
+    results = await asyncio.gather(
+        *(group.do("q", failing) for _ in range(3)), return_exceptions=True
+    )
+
+    assert calls == 1
+    assert all(isinstance(r, HTTPException) for r in results)
+    assert len(group) == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_other_waiters():
+    group = SingleFlight("test")
+
+    async def work() -> str:
+        await asyncio.sleep(0.02)
+        return "done"
+
+    leader = asyncio.ensure_future(group.do("q", work))
+    follower = asyncio.ensure_future(group.do("q", work))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "done"
+    assert group.coalesced == 1
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from httpx import ASGITransport, AsyncClient
+from pytest_httpx import HTTPXMock
+
+from app.clients import TempoClient
+from app.config import Settings, get_settings
+from app.main import app
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+def _trace(span_id: str) -> dict:
+    span = {"spanId": span_id, "startTimeUnixNano": "0", "endTimeUnixNano": "1000000"}
+    return {"batches": [{"scopeSpans": [{"spans": [span]}]}]}
+
+
+@pytest.mark.asyncio
+async def test_batch_streams_ndjson_with_per_trace_errors(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    def respond(request: httpx.Request) -> httpx.Response:
+        trace_id = request.url.path.rsplit("/", 1)[-1]
+        if trace_id == "dead":
+            return httpx.Response(404)
+        return httpx.Response(200, json=_trace(trace_id))
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+    monkeypatch.setenv("MCP_TOKEN", "tok")
+    get_settings.cache_clear()
+
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post(
+            "/traces/batch",
+            json={"trace_ids": ["a1", "dead", "b2", "a1"]},
+            headers={"Authorization": "Bearer tok"},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    results = {r["trace_id"]: r for r in map(json.loads, response.text.splitlines())}
+    assert set(results) == {"a1", "dead", "b2"}
+    assert results["dead"]["status"] == 404
+    assert results["a1"]["span_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_is_bounded_and_yields_fast_traces_first(httpx_mock: HTTPXMock):
+    in_flight = peak = 0
+
+    async def respond(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        trace_id = request.url.path.rsplit("/", 1)[-1]
+        await asyncio.sleep(0.2 if trace_id == "5105" else 0.01)
+        in_flight -= 1
+        return httpx.Response(200, json=_trace(trace_id))
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+    client = TempoClient(Settings(TEMPO_BATCH_CONCURRENCY=2))
+
+    ids = ["5105"] + [f"a{i}" for i in range(5)]
+    order = [r["trace_id"] async for r in client.fetch_trace_summaries(ids)]
+
+    assert order[-1] == "5105"
+    assert sorted(order) == sorted(ids)
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_non_hex_trace_ids(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setenv("MCP_TOKEN", "tok")
+    get_settings.cache_clear()
+
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post(
+            "/traces/batch",
+            json={"trace_ids": ["a1", "../search?q=x"]},
+            headers={"Authorization": "Bearer tok"},
+        )
+
+    assert response.status_code == 422
+    assert not httpx_mock.get_requests()
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from pytest_httpx import HTTPXMock
+
+from app.cache import TraceCache, close_query_cache, get_query_cache, get_trace_cache
+from app.clients import TempoClient
+from app.config import Settings
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+def test_trace_cache_evicts_by_bytes():
+    cache = TraceCache(max_bytes=100)
+
+    cache.put("a", {"id": "a"}, 40)
+    cache.put("b", {"id": "b"}, 40)
+    assert cache.get("a") == {"id": "a"}  # "a" is now most recently used
+    cache.put("c", {"id": "c"}, 40)
+
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    assert cache.size_bytes == 80
+    cache.put("huge", {}, 101)
+    assert cache.get("huge") is None and len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_repeated_trace_reads_hit_tempo_once(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(json={"batches": [{"spans": 1}]})
+
+    first = await TempoClient().fetch_trace_json("abc")
+    second = await TempoClient().fetch_trace_json("abc")
+
+    assert first is second  # served without re-decoding
+    assert len(httpx_mock.get_requests()) == 1
+    assert get_trace_cache().size_bytes == len(b'{"batches":[{"spans":1}]}')
+
+
+@pytest.mark.asyncio
+async def test_missing_trace_is_negatively_cached(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(status_code=404, is_reusable=True)
+    client = TempoClient(Settings(TEMPO_NOT_FOUND_TTL=30))
+
+    for _ in range(3):
+        with pytest.raises(HTTPException) as exc:
+            await client.fetch_trace_json("dead")
+        assert exc.value.status_code == 404
+
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_recent_trace_is_not_cached_as_complete(httpx_mock: HTTPXMock, tmp_path):
+    end = str(time.time_ns())
+    span = {"spanId": "a", "startTimeUnixNano": "0", "endTimeUnixNano": end}
+    httpx_mock.add_response(
+        json={"batches": [{"scopeSpans": [{"spans": [span]}]}]}, is_reusable=True
+    )
+    settings = Settings(
+        CACHE_DISK_PATH=str(tmp_path / "cache.sqlite"), TEMPO_TRACE_RECENT_TTL=0.05
+    )
+
+    await TempoClient(settings).fetch_trace_json("abc")
+    await TempoClient(settings).fetch_trace_json("abc")
+    assert len(httpx_mock.get_requests()) == 1
+    stored = await get_query_cache(settings).get_json(
+        "trace", "abc", persistent=True, memory=False
+    )
+    assert stored is None
+
+    await asyncio.sleep(0.1)  # the short TTL has run out: Tempo is asked again
+    await TempoClient(settings).fetch_trace_json("abc")
+    assert len(httpx_mock.get_requests()) == 2
+    close_query_cache()
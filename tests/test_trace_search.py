@@ -0,0 +1,162 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from httpx import ASGITransport, AsyncClient
+from pytest_httpx import HTTPXMock
+
+from app.clients import TempoClient
+from app.config import get_settings
+from app.main import app
+from app.trace_search import align_window, compact_trace, decode_cursor, encode_cursor
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+def _hit(trace_id: str, start_s: int, spans: int = 4) -> dict:
+    return {
+        "traceID": trace_id,
+        "rootServiceName": "frontend",
+        "rootTraceName": "GET /checkout",
+        "startTimeUnixNano": str(start_s * 10**9),
+        "durationMs": 1200,
+        "spanSets": [
+            {
+                "matched": spans,
+                "spans": [
+                    {"spanID": f"s{i}", "durationNanos": "1000000"}
+                    for i in range(spans)
+                ],
+            }
+        ],
+    }
+
+
+def test_window_alignment_and_cursor_round_trip():
+    assert align_window(1001, 1049, 30) == (990, 1050)
+    assert decode_cursor(encode_cursor(990, 123, ["b", "a"])) == (990, 123, ("a", "b"))
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_compact_trace_caps_spans():
+    hit = compact_trace(_hit("t1", 100, spans=10), spans_per_trace=2)
+
+    assert hit["matched_spans"] == 10
+    assert [s["span_id"] for s in hit["spans"]] == ["s0", "s1"]
+
+
+@pytest.mark.asyncio
+async def test_search_is_cached_on_aligned_window(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(json={"traces": [_hit("t1", 100)], "metrics": {}})
+    client = TempoClient()
+
+    first = [h async for h in client.search_traces("{}", 1001, 1049)]
+    second = [h async for h in client.search_traces("{}", 1005, 1040)]
+
+    assert first == second and first[0]["trace_id"] == "t1"
+    request = httpx_mock.get_requests()[0]
+    assert (request.url.params["start"], request.url.params["end"]) == ("990", "1050")
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint_streams_pages(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    def respond(request: httpx.Request) -> httpx.Response:
+        end = int(request.url.params["end"])
+        hits = [_hit(f"t{s}", s) for s in range(end - 1, end - 4, -1)]
+        return httpx.Response(
+            200, json={"traces": hits[: int(request.url.params["limit"])]}
+        )
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+    monkeypatch.setenv("MCP_TOKEN", "tok")
+    get_settings.cache_clear()
+    headers = {"Authorization": "Bearer tok"}
+
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        page = await ac.get(
+            "/traces/search", params={"q": "{}", "limit": 2}, headers=headers
+        )
+        lines = [json.loads(line) for line in page.text.splitlines()]
+        cursor = lines[-1]["next_cursor"]
+        following = await ac.get(
+            "/traces/search",
+            params={"q": "{}", "limit": 2, "cursor": cursor},
+            headers=headers,
+        )
+        invalid = await ac.get(
+            "/traces/search", params={"q": "{}", "cursor": "zz"}, headers=headers
+        )
+
+    assert page.headers["content-type"] == "application/x-ndjson"
+    assert len(lines) == 3 and cursor
+    first_page = [line["start_ns"] for line in lines[:-1]]
+    second_page = [json.loads(line) for line in following.text.splitlines()][:-1]
+    assert all(hit["start_ns"] < min(first_page) for hit in second_page)
+    assert invalid.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_invalid_traceql_is_reported(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(status_code=400, text="parse error at line 1")
+
+    with pytest.raises(HTTPException) as exc:
+        [h async for h in TempoClient().search_traces("{ broken", 0, 60)]
+
+    assert exc.value.status_code == 400
+    assert "parse error" in exc.value.detail
+
+
+@pytest.mark.asyncio
+async def test_pages_break_start_time_ties_by_trace_id(httpx_mock: HTTPXMock):
+    # Five traces started in the same second, newer ones in the next second.
+    traces = [_hit(f"n{i}", 1001) for i in range(2)] + [
+        _hit(f"t{i}", 1000) for i in range(5)
+    ]
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        assert params["most_recent"] == "true"
+        end_ns = int(params["end"]) * 10**9
+        hits = [t for t in traces if int(t["startTimeUnixNano"]) <= end_ns]
+        return httpx.Response(200, json={"traces": hits[: int(params["limit"])]})
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+    client = TempoClient()
+
+    seen: list = []
+    cursor = None
+    for _ in range(10):
+        page = [h async for h in client.search_page("{}", "1h", 2, 0, cursor)]
+        seen += [h["trace_id"] for h in page[:-1]]
+        cursor = page[-1]["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(t["traceID"] for t in traces)
+    assert client.bulkhead.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_search_releases_bulkhead_before_hits_are_consumed(
+    httpx_mock: HTTPXMock,
+):
+    httpx_mock.add_response(json={"traces": [_hit("t1", 100), _hit("t2", 99)]})
+    client = TempoClient()
+
+    hits = client.search_traces("{}", 0, 120)
+    first = await anext(hits)
+    for _ in range(10):
+        if client.bulkhead.in_flight == 0:
+            break
+        await asyncio.sleep(0.01)
+
+    assert first["trace_id"] == "t1"
+    assert client.bulkhead.in_flight == 0
+    assert [h["trace_id"] async for h in hits] == ["t2"]
@@ -0,0 +1,98 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from pytest_httpx import HTTPXMock
+
+from app.config import get_settings
+from app.main import app
+from app.trace_model import critical_path, parse_trace, self_times, summarize_trace
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+MS = 1_000_000
+
+
+def _span(span_id, name, start_ms, end_ms, parent="", error=False):
+    span = {
+        "spanId": span_id,
+        "name": name,
+        "startTimeUnixNano": str(start_ms * MS),
+        "endTimeUnixNano": str(end_ms * MS),
+    }
+    if parent:
+        span["parentSpanId"] = parent
+    if error:
+        span["status"] = {"code": 2}
+    return span
+
+
+def _batch(service, *spans):
+    return {
+        "resource": {
+            "attributes": [{"key": "service.name", "value": {"stringValue": service}}]
+        },
+        "scopeSpans": [{"spans": list(spans)}],
+    }
+
+
+# frontend GET /checkout 0-100ms
+#   ├─ cart   load   10-40ms
+#   ├─ pay    charge 20-90ms (error)
+#   │    └─ db  insert 30-60ms
+#   └─ cart   audit  50-70ms  (concurrent with charge, not critical)
+TRACE = {
+    "batches": [
+        _batch("frontend", _span("r", "GET /checkout", 0, 100)),
+        _batch(
+            "cart",
+            _span("a", "load", 10, 40, parent="r"),
+            _span("c", "audit", 50, 70, parent="r"),
+        ),
+        _batch("pay", _span("b", "charge", 20, 90, parent="r", error=True)),
+        _batch("db", _span("d", "insert", 30, 60, parent="b")),
+    ]
+}
+
+
+def test_parse_trace_is_columnar():
+    table = parse_trace(TRACE)
+
+    assert len(table) == 5
+    assert table.services == ["frontend", "cart", "pay", "db"]
+    assert list(table.parent) == [-1, 0, 0, 0, 3]
+    assert table.duration(3) == 70 * MS
+
+
+def test_critical_path_and_self_time():
+    table = parse_trace(TRACE)
+
+    path = [(table.span_ids[i], ns // MS) for i, ns in critical_path(table, 0)]
+    # r: 0-20 and 90-100; b: 20-30 and 60-90; d: 30-60 ("load" overlaps "charge")
+    assert path == [("r", 30), ("b", 40), ("d", 30)]
+    assert [ns // MS for ns in self_times(table)] == [20, 30, 20, 40, 30]
+
+
+@pytest.mark.asyncio
+async def test_summary_endpoint(httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch):
+    httpx_mock.add_response(json=TRACE)
+    monkeypatch.setenv("MCP_TOKEN", "tok")
+    get_settings.cache_clear()
+
+    transport = ASGITransport(app=app, raise_app_exceptions=True)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get(
+            "/traces/abc/summary?top=2", headers={"Authorization": "Bearer tok"}
+        )
+
+    assert response.status_code == 200
+    summary = response.json()
+    assert summary["trace_id"] == "abc"
+    assert summary["error_count"] == 1
+    assert summary["duration_ms"] == 100
+    assert [s["name"] for s in summary["slowest_spans"]] == ["GET /checkout", "charge"]
+    assert summary["self_time_by_service_ms"] == {
+        "cart": 50,
+        "pay": 40,
+        "db": 30,
+        "frontend": 20,
+    }
+    assert summarize_trace(parse_trace({"batches": []})) == {"span_count": 0}
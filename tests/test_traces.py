@@ -1,13 +1,30 @@
+import asyncio
+import re
+import time
+
 import pytest
-from httpx import ASGITransport, AsyncClient, Response
+from fastapi import HTTPException
+from httpx import ASGITransport, AsyncClient, Request, Response
 from pytest_httpx import HTTPXMock
 
 from app.clients import LokiClient, TempoClient
-from app.main import app
+from app.deadline import request_deadline
+from app.main import _fetch_trace_logs, app  # type: ignore[attr-defined]
 
 pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
 
 
+def _loki_lines(lines: list[tuple[int, str]]):
+    """Answer Loki range queries with the *lines* inside the requested window."""
+
+    def respond(request: Request) -> Response:
+        start, end = (int(request.url.params[k]) for k in ("start", "end"))
+        values = [[str(ts), line] for ts, line in lines if start <= ts <= end]
+        return Response(200, json={"data": {"result": [{"values": values}]}})
+
+    return respond
+
+
 @pytest.mark.asyncio
 async def test_trace_endpoints(monkeypatch: pytest.MonkeyPatch):
     fake_trace = {"data": {"traceID": "abc"}}
@@ -17,7 +34,7 @@ async def test_trace_endpoints(monkeypatch: pytest.MonkeyPatch):
             return fake_trace
 
     class MockLokiClient:
-        async def fetch_trace_logs(self, trace_id: str, limit: int):
+        async def fetch_trace_logs(self, trace_id: str, limit: int, **window):
             return ["l1"]
 
     app.dependency_overrides[TempoClient] = MockTempoClient
@@ -56,10 +73,72 @@ async def test_fetch_trace_json(httpx_mock: HTTPXMock):
 
 @pytest.mark.asyncio
 async def test_fetch_trace_logs(httpx_mock: HTTPXMock):
-    fake_json = {"data": {"result": [{"values": [["1", "log1"], ["2", "log2"]]}]}}
-    httpx_mock.add_response(json=fake_json, is_optional=True)
+    now = time.time_ns()
+    httpx_mock.add_callback(
+        _loki_lines([(now - 2, "log1"), (now - 1, "log2")]), is_reusable=True
+    )
 
     client = LokiClient()
     logs = await client.fetch_trace_logs("abc", 10)
 
     assert logs == ["log1", "log2"]
+
+
+@pytest.mark.asyncio
+async def test_trace_logs_are_bounded_by_trace_window(httpx_mock: HTTPXMock):
+    span = {
+        "spanId": "s",
+        "startTimeUnixNano": "5000000000",
+        "endTimeUnixNano": "7000000000",
+    }
+    resource = {
+        "attributes": [{"key": "service.name", "value": {"stringValue": "api"}}]
+    }
+    httpx_mock.add_response(
+        url="http://tempo:3200/api/traces/abc",
+        json={"batches": [{"resource": resource, "scopeSpans": [{"spans": [span]}]}]},
+    )
+    httpx_mock.add_response(json={"data": {"result": []}})
+
+    await _fetch_trace_logs("abc", 10)
+
+    loki = httpx_mock.get_requests()[-1]
+    assert loki.url.path == "/loki/api/v1/query_range"
+    assert loki.url.params["query"] == '{service="api"} |= "abc"'
+    assert loki.url.params["start"] == str(3_000_000_000)
+    assert loki.url.params["end"] == str(9_000_000_000)
+
+
+@pytest.mark.asyncio
+async def test_trace_logs_of_unknown_trace_search_a_short_window(
+    httpx_mock: HTTPXMock,
+):
+    httpx_mock.add_response(url="http://tempo:3200/api/traces/abc", status_code=404)
+    httpx_mock.add_callback(
+        _loki_lines([]), url=re.compile(".*loki.*"), is_reusable=True
+    )
+
+    before = time.time_ns()
+    await _fetch_trace_logs("abc", 10)
+
+    # The window may span a shard boundary, i.e. take more than one request.
+    loki = httpx_mock.get_requests()[1:]
+    assert {r.url.path for r in loki} == {"/loki/api/v1/query_range"}
+    assert {r.url.params["query"] for r in loki} == {'{service=~".+"} |= "abc"'}
+    start = min(int(r.url.params["start"]) for r in loki)
+    assert before - start <= 15 * 60 * 10**9
+
+
+@pytest.mark.asyncio
+async def test_trace_logs_do_not_fall_back_past_the_deadline(httpx_mock: HTTPXMock):
+    async def slow(request: Request) -> Response:
+        await asyncio.sleep(1)
+        return Response(404)
+
+    httpx_mock.add_callback(slow, url="http://tempo:3200/api/traces/abc")
+
+    with request_deadline(0.05), pytest.raises(HTTPException) as exc_info:
+        await _fetch_trace_logs("abc", 10)
+
+    assert exc_info.value.status_code == 504
+    assert len(httpx_mock.get_requests()) == 1